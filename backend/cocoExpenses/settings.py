@@ -154,8 +154,64 @@ REST_FRAMEWORK = {
 }
 
 
-if "test" in sys.argv:
-    REST_FRAMEWORK["PAGE_SIZE"] = 5
+OPENEXCHANGERATES_APP_ID = os.getenv("OPENEXCHANGERATES_APP_ID")
+OPENEXCHANGERATES_BASE_URL = os.getenv(
+    "OPENEXCHANGERATES_BASE_URL", "https://openexchangerates.org/api"
+)
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    # Per-user statistics and forecasts. Stored in the database so that the
+    # invalidations of the import worker and of the cron jobs reach the web server
+    "shared": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "expenses_cache",
+        "OPTIONS": {"MAX_ENTRIES": 10_000},
+    },
+}
 
+# Maximum number of DollarExchangeRate rows kept in the in-process LRU, 0 disables it
+EXCHANGE_RATE_CACHE_SIZE = 50_000
 
-OPENEXCHANGERATES_APP_ID = os.getenv("OPENEXCHANGERATES_APP_ID")
+# Seconds a validated login token is kept in the Django cache, 0 disables it. Tokens
+# are invalidated on logout and user changes, but only in the local process unless
+# a shared cache backend is configured
+TOKEN_CACHE_TIMEOUT = 60
+
+# Seconds the projected amounts of the recurring expense forecast are cached, 0
+# disables it. They are also dropped whenever a recurring expense of the user changes
+FORECAST_CACHE_TIMEOUT = 60 * 60
+
+# Seconds the statistics of a user are cached, 0 disables it. They are also dropped
+# whenever an expense, category, trip or the settings of the user change; new
+# exchange rates only show up once the entries expire
+STATISTICS_CACHE_TIMEOUT = 60 * 10
+
+# How a missing rate is resolved: "exact" fetches the day from the API, "previous"
+# uses the most recent rate on or before the day and only calls the API if none exists
+EXCHANGE_RATE_RESOLUTION: Literal["exact", "previous"] = os.getenv(
+    "EXCHANGE_RATE_RESOLUTION", "exact"
+)
+
+# Currency conversion used by statistics: "table" converts each amount exactly with
+# Decimal, "matrix" converts whole columns at once with NumPy, rounding to the cent
+EXCHANGE_RATE_ENGINE: Literal["table", "matrix"] = os.getenv(
+    "EXCHANGE_RATE_ENGINE", "table"
+)
+
+# Source of the statistics endpoints: "expenses" amortizes every expense on each
+# request, "rollup" sums the DailyAmortization rows in the database. The rows are
+# only kept up to date with "rollup", run rebuild_daily_amortizations once when
+# switching to it.
+STATISTICS_BACKEND: Literal["expenses", "rollup"] = os.getenv(
+    "STATISTICS_BACKEND", "expenses"
+)
+
+
+if "test" in sys.argv:
+    REST_FRAMEWORK["PAGE_SIZE"] = 5
+    # Test transactions are rolled back, the process-wide cache would outlive them
+    EXCHANGE_RATE_CACHE_SIZE = 0
+    TOKEN_CACHE_TIMEOUT = 0
+    FORECAST_CACHE_TIMEOUT = 0
+    STATISTICS_CACHE_TIMEOUT = 0
@@ -1,5 +1,8 @@
-from typing import Tuple
+import uuid
+from typing import Iterable, Tuple
 
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework import authentication
 from rest_framework import exceptions
 from rest_framework.request import Request
@@ -8,19 +11,41 @@ from expenses.models import User
 from expenses.models.token import Token
 
 
+def _cache_key(token: uuid.UUID) -> str:
+    return f"auth-token:{token}"
+
+
+def get_token(token: uuid.UUID) -> Token | None:
+    """The token with its user, read from the cache for
+    settings.TOKEN_CACHE_TIMEOUT seconds after the first lookup."""
+    timeout = settings.TOKEN_CACHE_TIMEOUT
+    if timeout:
+        cached = cache.get(_cache_key(token))
+        if cached is not None:
+            return cached
+    instance = Token.objects.select_related("user").filter(token=token).first()
+    if instance is not None and timeout:
+        cache.set(_cache_key(token), instance, timeout)
+    return instance
+
+
+def invalidate_tokens(tokens: Iterable[uuid.UUID]) -> None:
+    cache.delete_many([_cache_key(token) for token in tokens])
+
+
 class CustomTokenAuthentication(authentication.BaseAuthentication):
     def authenticate(self, request: Request) -> Tuple[User, None]:
         token = request.COOKIES.get("token")
         if not token:
             return None
         try:
-            token = Token.objects.get(token=token)
-            user = token.user
-            token.extend_expiration_date()
-        except Token.DoesNotExist:
+            token = get_token(uuid.UUID(token))
+        except ValueError:
             return None
-
-        return user, None
+        if token is None:
+            return None
+        token.extend_expiration_date()
+        return token.user, None
 
     def authenticate_header(self, request):
         return 'XXXBasic realm="API"'
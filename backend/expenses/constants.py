@@ -1,3 +1,11 @@
 import datetime as dt
 
 TOKEN_DURATION = dt.timedelta(days=90)
+# Token expirations are only written when they would move forward by at least this
+TOKEN_EXTENSION_INTERVAL = dt.timedelta(days=1)
+# Interval at which the worker running an import job refreshes its heartbeat
+IMPORT_JOB_HEARTBEAT_INTERVAL = dt.timedelta(seconds=30)
+# Running import jobs without a heartbeat for this long are considered abandoned by
+# a crashed worker and run again. Imports are atomic, an abandoned one left nothing
+# behind
+IMPORT_JOB_TIMEOUT = dt.timedelta(minutes=5)
@@ -0,0 +1,90 @@
+import datetime as dt
+import random
+import time
+from decimal import Decimal
+
+from django.core.management import BaseCommand
+
+from expenses import utils
+from expenses.managers.exchange_rate_manager import RateTable
+from expenses.models import Currency, DollarExchangeRate
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the linear rate scan used by the bulk converters with the "
+        "RateTable lookup. Works on in-memory rows, the database is not touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[1_000, 10_000, 100_000],
+            help="Number of expenses to convert in each run",
+        )
+        parser.add_argument(
+            "--days", type=int, default=365, help="Distinct days covered by rates"
+        )
+        parser.add_argument(
+            "--currencies", type=int, default=3, help="Number of foreign currencies"
+        )
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        currencies = [
+            Currency(id=i + 1, code=f"C{i}", symbol="", display_name=f"C{i}")
+            for i in range(options["currencies"])
+        ]
+        first_day = dt.date(2020, 1, 1)
+        days = [first_day + dt.timedelta(days=i) for i in range(options["days"])]
+        rates = [
+            DollarExchangeRate(
+                currency=currency,
+                date=day,
+                rate=Decimal(rng.randint(5_000, 20_000)) / 10_000,
+            )
+            for currency in currencies
+            for day in days
+        ]
+
+        self.stdout.write(
+            f"{len(rates)} rates ({len(currencies)} currencies x {len(days)} days)"
+        )
+        for size in options["sizes"]:
+            entries = [
+                (rng.choice(currencies), rng.choice(days), Decimal("100.00"))
+                for _ in range(size)
+            ]
+            legacy_seconds, legacy_result = _timed(_convert_with_scan, entries, rates)
+            table_seconds, table_result = _timed(_convert_with_table, entries, rates)
+            if legacy_result != table_result:
+                raise AssertionError("RateTable and linear scan results differ")
+            self.stdout.write(
+                f"{size:>8} expenses: scan {legacy_seconds:8.3f}s | "
+                f"table {table_seconds:8.3f}s | "
+                f"speedup x{legacy_seconds / max(table_seconds, 1e-9):.0f}"
+            )
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def _convert_with_scan(entries, rates):
+    result = []
+    for currency, day, amount in entries:
+        exchange_rate = utils.find_first(
+            rates, lambda rate: rate.currency == currency and rate.date == day
+        )
+        result.append(amount / exchange_rate.rate)
+    return result
+
+
+def _convert_with_table(entries, rates):
+    table = RateTable((rate.currency_id, rate.date, rate.rate) for rate in rates)
+    return [amount / table.get(currency.id, day) for currency, day, amount in entries]
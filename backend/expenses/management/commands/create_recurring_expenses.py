@@ -1,20 +1,96 @@
-from django.core.management import BaseCommand
-from django.db.models import QuerySet
-from expenses import date_utils
+import datetime as dt
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.core.management import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Q, QuerySet
+from expenses import date_utils, user_cache
 from expenses.models import Expense
 from expenses.models.recurring_expense import RecurringExpense
-from expenses.utils.cron_parser.cron import Cron
+from expenses.recurring_forecast import get_firing_matrix
+from expenses.statistics_rollup import refresh_daily_amortizations
+from expenses.utils.cron_parser.batch import CronBatch
+from expenses.utils.cron_parser.cron import parse_cron
+
+BATCH_SIZE = 1_000
+# Users whose recurring expenses are backfilled in the same transaction
+USERS_PER_CHUNK = 200
 
 
 class Command(BaseCommand):
+    help = (
+        "Creates today's expense of every active recurring expense firing today. "
+        "With --since, creates the missing expenses of every day from --since to "
+        "--until (today by default) instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            type=dt.date.fromisoformat,
+            help="First day to backfill (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--until",
+            type=dt.date.fromisoformat,
+            help="Last day to backfill (YYYY-MM-DD), today by default",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Chunks of users backfilled in parallel, each with its own connection",
+        )
+
     def handle(self, *args, **options):
-        active_recurring_expenses = (
-            get_active_recurring_expenses_without_expense_today()
+        if options["since"] or options["until"]:
+            self.backfill(options["since"], options["until"], options["workers"])
+            return
+        start = time.perf_counter()
+        recurring_expenses = list(get_active_recurring_expenses_without_expense_today())
+        loaded = time.perf_counter()
+        firing = get_firing_today(recurring_expenses)
+        classified = time.perf_counter()
+        expenses = create_expenses(firing)
+        created = time.perf_counter()
+        self.stdout.write(
+            f"{len(recurring_expenses)} active recurring expenses without an expense "
+            f"today, {len(firing)} firing today, {len(expenses)} expenses created"
+        )
+        self.stdout.write(
+            f"Load {loaded - start:.3f}s | schedules {classified - loaded:.3f}s | "
+            f"insert {created - classified:.3f}s | total {created - start:.3f}s"
+        )
+
+    def backfill(self, since: dt.date | None, until: dt.date | None, workers: int):
+        today = date_utils.today()
+        until = until or today
+        if since is None:
+            raise CommandError("--until requires --since")
+        if since > until:
+            raise CommandError("--since must not be after --until")
+        if until > today:
+            raise CommandError("Future days cannot be backfilled")
+
+        start = time.perf_counter()
+        chunks = get_user_chunks(get_recurring_expenses_in_range(since, until))
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                counts = list(
+                    executor.map(
+                        lambda chunk: backfill_in_thread(chunk, since, until), chunks
+                    )
+                )
+        else:
+            counts = [backfill(chunk, since, until) for chunk in chunks]
+        self.stdout.write(
+            f"{sum(counts)} expenses created from {since} to {until} for "
+            f"{sum(len(chunk) for chunk in chunks)} recurring expenses in "
+            f"{len(chunks)} chunks, {time.perf_counter() - start:.3f}s"
         )
-        print(f"Found {active_recurring_expenses.count()} expenses to create")
-        for recurring_expense in active_recurring_expenses.iterator():
-            if fires_today(recurring_expense.schedule):
-                create_expense(recurring_expense)
 
 
 def get_active_recurring_expenses_without_expense_today() -> QuerySet[RecurringExpense]:
@@ -30,33 +106,125 @@ def get_active_recurring_expenses_without_expense_today() -> QuerySet[RecurringE
     )
 
 
-def fires_today(schedule: str) -> bool:
-    cron = Cron(schedule)
-    now = date_utils.now()
-    next_run = cron.schedule(now).next()
-    prev_run = cron.schedule(now).prev()
-    return (
-        next_run.date() == date_utils.today() or prev_run.date() == date_utils.today()
-    )
+def get_firing_today(
+    recurring_expenses: list[RecurringExpense],
+) -> list[RecurringExpense]:
+    # Recurring expenses often share schedules, they are parsed once per process
+    crons = [
+        parse_cron(recurring_expense.schedule)
+        for recurring_expense in recurring_expenses
+    ]
+    fires = CronBatch(crons).fires_on(date_utils.today())
+    return list(itertools.compress(recurring_expenses, fires))
 
 
-def create_expense(recurring_expense: RecurringExpense):
-    today = date_utils.today()
+def build_expense(recurring_expense: RecurringExpense, day: dt.date) -> Expense:
     amortization_start_date, amortization_end_date = (
-        recurring_expense.calculate_amortization_dates(today)
+        recurring_expense.calculate_amortization_dates(day)
     )
-    expense = Expense(
-        user=recurring_expense.user,
-        expense_date=today,
+    return Expense(
+        user_id=recurring_expense.user_id,
+        expense_date=day,
         description=recurring_expense.description,
         amount=recurring_expense.amount,
         amortization_start_date=amortization_start_date,
         amortization_end_date=amortization_end_date,
-        category=recurring_expense.category,
-        trip=recurring_expense.trip,
+        category_id=recurring_expense.category_id,
+        trip_id=recurring_expense.trip_id,
         is_expense=recurring_expense.is_expense,
-        currency=recurring_expense.currency,
+        currency_id=recurring_expense.currency_id,
         recurring_expense=recurring_expense,
     )
-    expense.save()
-    print(f"Expense created: {expense.description}")
+
+
+def create_expenses(recurring_expenses: list[RecurringExpense]) -> list[Expense]:
+    """Creates the expenses of the recurring expenses in one transaction.
+
+    The expense_recurring_date constraint makes an overlapping run fail and roll
+    back instead of creating the same expenses twice.
+    """
+    today = date_utils.today()
+    expenses = [
+        build_expense(recurring_expense, today)
+        for recurring_expense in recurring_expenses
+    ]
+    return insert_expenses(expenses)
+
+
+def insert_expenses(expenses: list[Expense]) -> list[Expense]:
+    with transaction.atomic():
+        Expense.objects.bulk_create(expenses, batch_size=BATCH_SIZE)
+        # bulk_create does not send post_save
+        for i in range(0, len(expenses), BATCH_SIZE):
+            refresh_daily_amortizations(expenses[i : i + BATCH_SIZE])
+        user_cache.invalidate(
+            user_cache.STATISTICS, [expense.user_id for expense in expenses]
+        )
+    return expenses
+
+
+def get_recurring_expenses_in_range(
+    since: dt.date, until: dt.date
+) -> QuerySet[RecurringExpense]:
+    """Recurring expenses active on at least one day of the range."""
+    return (
+        RecurringExpense.objects.filter(start_date__lte=until)
+        .filter(Q(end_date__gte=since) | Q(end_date__isnull=True))
+        .order_by("user_id", "id")
+    )
+
+
+def get_user_chunks(
+    recurring_expenses: QuerySet[RecurringExpense],
+) -> list[list[RecurringExpense]]:
+    """Splits the recurring expenses in chunks of USERS_PER_CHUNK users."""
+    chunks, chunk, users = [], [], 0
+    for _, rows in itertools.groupby(recurring_expenses, key=lambda r: r.user_id):
+        if users == USERS_PER_CHUNK:
+            chunks.append(chunk)
+            chunk, users = [], 0
+        chunk.extend(rows)
+        users += 1
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def build_backfill_expenses(
+    recurring_expenses: list[RecurringExpense], since: dt.date, until: dt.date
+) -> list[Expense]:
+    """The expenses of every day of the range on which a recurring expense is
+    active and fires, skipping the days that already have one."""
+    days = date_utils.all_dates_in_range(since, until)
+    fires = get_firing_matrix(recurring_expenses, days)
+
+    existing = set(
+        Expense.objects.filter(
+            expense_date__range=(since, until),
+            recurring_expense__in=[r.id for r in recurring_expenses],
+        ).values_list("recurring_expense_id", "expense_date")
+    )
+    return [
+        build_expense(recurring_expense, days[i])
+        for recurring_expense, row in zip(recurring_expenses, fires)
+        for i in np.flatnonzero(row)
+        if (recurring_expense.id, days[i]) not in existing
+    ]
+
+
+def backfill(
+    recurring_expenses: list[RecurringExpense], since: dt.date, until: dt.date
+) -> int:
+    return len(
+        insert_expenses(build_backfill_expenses(recurring_expenses, since, until))
+    )
+
+
+def backfill_in_thread(
+    recurring_expenses: list[RecurringExpense], since: dt.date, until: dt.date
+) -> int:
+    try:
+        return backfill(recurring_expenses, since, until)
+    finally:
+        # Connections are per thread, the executor threads would leave them open
+        connections.close_all()
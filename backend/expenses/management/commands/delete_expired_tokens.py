@@ -0,0 +1,49 @@
+from django.core.management import BaseCommand
+from expenses import date_utils
+from expenses.models.token import Token
+
+BATCH_SIZE = 1_000
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes the login tokens past their expiration date, in batches so the "
+        "token table is never locked for long. Meant to run daily, like "
+        "create_recurring_expenses."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Tokens deleted per query",
+        )
+
+    def handle(self, *args, **options):
+        deleted, batches = delete_expired_tokens(options["batch_size"])
+        remaining = Token.objects.count()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{deleted} expired tokens deleted in {batches} batches, "
+                f"{remaining} tokens left"
+            )
+        )
+
+
+def delete_expired_tokens(batch_size: int = BATCH_SIZE) -> tuple[int, int]:
+    """Returns the number of tokens deleted and of batches used."""
+    now = date_utils.now()
+    deleted = batches = 0
+    while True:
+        ids = list(
+            Token.objects.filter(expiration_date__lt=now)
+            .order_by("expiration_date")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted, batches
+        # Sends post_delete, which drops the tokens from the authentication cache
+        count, _ = Token.objects.filter(id__in=ids).delete()
+        deleted += count
+        batches += 1
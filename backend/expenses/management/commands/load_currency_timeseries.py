@@ -4,6 +4,7 @@ from functools import reduce
 from django.core.management import BaseCommand
 
 from django.conf import settings
+from expenses.managers.exchange_rate_cache import rate_cache
 from expenses.models.currency import Currency
 import datetime as dt
 from expenses.models.dollar_exchange_rate import DollarExchangeRate
@@ -34,7 +35,7 @@ class Command(BaseCommand):
 
             rates = list(reader)
             rates = [
-                (dt.datetime.strptime(row[0], "%Y-%m-%d"), Decimal(row[1]))
+                (dt.datetime.strptime(row[0], "%Y-%m-%d").date(), Decimal(row[1]))
                 for row in rates
             ]
 
@@ -50,3 +51,4 @@ class Command(BaseCommand):
                 for date, rate in rates
             ]
             DollarExchangeRate.objects.bulk_create(rates)
+            rate_cache.invalidate((currency.id, rate.date) for rate in rates)
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management import BaseCommand
+from django.db import close_old_connections
+
+from expenses.managers.import_job_manager import process_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Background worker running the CSV imports queued through the API."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait before looking for new jobs",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the pending jobs and exit instead of polling",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            # Like a request, every iteration drops the connections that are
+            # broken or older than CONN_MAX_AGE
+            close_old_connections()
+            try:
+                count = process_pending_jobs()
+            except Exception as e:
+                # The database is unreachable, tried again at the next iteration
+                self.stderr.write(f"Import jobs could not be processed: {e}")
+                count = 0
+            if count:
+                self.stdout.write(f"{count} import jobs processed")
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,23 @@
+from django.core.management import BaseCommand, CommandError
+
+from expenses.models import User
+from expenses.statistics_rollup import rebuild_daily_amortizations
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the DailyAmortization rows read by the statistics endpoints when "
+        "STATISTICS_BACKEND is rollup."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=str, help="Only rebuild this user (email)")
+
+    def handle(self, *args, **options):
+        user = None
+        if options["user"]:
+            user = User.objects.filter(email=options["user"]).first()
+            if user is None:
+                raise CommandError(f"User with email {options['user']} not found")
+        count = rebuild_daily_amortizations(user)
+        self.stdout.write(self.style.SUCCESS(f"{count} daily amortizations created"))
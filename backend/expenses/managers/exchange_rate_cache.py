@@ -0,0 +1,144 @@
+import datetime as dt
+import threading
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from typing import Iterable, NamedTuple
+
+from django.conf import settings
+from expenses.models import DollarExchangeRate
+
+__all__ = ["CacheInfo", "ExchangeRateCache", "rate_cache"]
+
+CacheKey = tuple[int, dt.date]
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class ExchangeRateCache:
+    """Process-wide LRU of DollarExchangeRate rows keyed by (currency_id, date).
+
+    Historical rates never change once written, so rows are kept until they are
+    evicted or explicitly invalidated by the code paths that write rates.
+    Only rows that exist are cached: a missing rate is always looked up again.
+    The size is read from settings.EXCHANGE_RATE_CACHE_SIZE, 0 disables it.
+
+    Days resolved to an earlier rate (EXCHANGE_RATE_RESOLUTION="previous") are
+    kept apart as (currency_id, day) -> rate date, so they share the row of
+    that date and are dropped when a rate between the two dates is written.
+    """
+
+    def __init__(self):
+        self._rows: OrderedDict[CacheKey, DollarExchangeRate] = OrderedDict()
+        self._resolved: OrderedDict[CacheKey, dt.date] = OrderedDict()
+        # Days of _resolved by currency, so invalidations only scan their own
+        self._resolved_days: defaultdict[int, set[dt.date]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def maxsize(self) -> int:
+        return settings.EXCHANGE_RATE_CACHE_SIZE
+
+    def get(self, currency_id: int, day: dt.date) -> DollarExchangeRate | None:
+        return self.get_many([(currency_id, day)]).get((currency_id, day))
+
+    def get_many(self, keys: Iterable[CacheKey]) -> dict[CacheKey, DollarExchangeRate]:
+        if not self.maxsize:
+            return {}
+        found = {}
+        with self._lock:
+            for key in keys:
+                row = self._rows.get(key)
+                if row is None:
+                    self.misses += 1
+                else:
+                    self._rows.move_to_end(key)
+                    self.hits += 1
+                    found[key] = row
+        return found
+
+    def set_many(self, rows: Iterable[DollarExchangeRate]) -> None:
+        maxsize = self.maxsize
+        if not maxsize:
+            return
+        with self._lock:
+            for row in rows:
+                key = (row.currency_id, row.date)
+                self._rows[key] = row
+                self._rows.move_to_end(key)
+            while len(self._rows) > maxsize:
+                self._rows.popitem(last=False)
+
+    def resolve(self, currency_id: int, day: dt.date) -> DollarExchangeRate | None:
+        """The row of the day, or the earlier one it was resolved to."""
+        if not self.maxsize:
+            return None
+        with self._lock:
+            rate_date = self._resolved.get((currency_id, day), day)
+            row = self._rows.get((currency_id, rate_date))
+            if row is None:
+                self.misses += 1
+                return None
+            self._rows.move_to_end((currency_id, rate_date))
+            if rate_date != day:
+                self._resolved.move_to_end((currency_id, day))
+            self.hits += 1
+            return row
+
+    def set_resolved(
+        self, currency_id: int, day: dt.date, row: DollarExchangeRate
+    ) -> None:
+        """Caches the row the day was resolved to."""
+        self.set_many([row])
+        if row.date == day or not self.maxsize:
+            return
+        with self._lock:
+            self._resolved[(currency_id, day)] = row.date
+            self._resolved.move_to_end((currency_id, day))
+            self._resolved_days[currency_id].add(day)
+            while len(self._resolved) > self.maxsize:
+                self._drop_resolved(*self._resolved.popitem(last=False)[0])
+
+    def _drop_resolved(self, currency_id: int, day: dt.date) -> None:
+        self._resolved.pop((currency_id, day), None)
+        days = self._resolved_days[currency_id]
+        days.discard(day)
+        if not days:
+            del self._resolved_days[currency_id]
+
+    def invalidate(self, keys: Iterable[CacheKey]) -> None:
+        with self._lock:
+            rate_dates = defaultdict(list)
+            for currency_id, rate_date in keys:
+                self._rows.pop((currency_id, rate_date), None)
+                if currency_id in self._resolved_days:
+                    rate_dates[currency_id].append(rate_date)
+            # A rate written between a day and the rate it was resolved to is
+            # now the one of that day: one pass over the days of each currency
+            for currency_id, dates in rate_dates.items():
+                dates.sort()
+                for day in list(self._resolved_days[currency_id]):
+                    position = bisect_left(dates, self._resolved[(currency_id, day)])
+                    if position < len(dates) and dates[position] <= day:
+                        self._drop_resolved(currency_id, day)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows.clear()
+            self._resolved.clear()
+            self._resolved_days.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._rows))
+
+
+rate_cache = ExchangeRateCache()
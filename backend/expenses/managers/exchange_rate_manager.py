@@ -1,13 +1,20 @@
+from bisect import bisect_right
+from collections import defaultdict
 from dataclasses import dataclass
 from decimal import Decimal
 
 from django.db.models import Subquery
+from expenses.date_utils import all_dates_in_range
+from expenses.managers.exchange_rate_cache import rate_cache
 from expenses.models import Currency, DollarExchangeRate
 import datetime as dt
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
 import requests
-from typing import Literal
-from expenses import utils
+from requests.adapters import HTTPAdapter
+from typing import Iterable, Literal
 
 __all__ = [
     "convert_to_dollars",
@@ -15,18 +22,35 @@ __all__ = [
     "convert_currency_to_currency",
     "Money",
     "ExchangeRateError",
+    "ExchangeRateApiError",
     "bulk_convert_to_dollars",
     "bulk_convert_from_dollars",
     "bulk_convert_to_currency",
+    "RateTable",
+    "PreviousRateIndex",
 ]
 
 MAX_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.5
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+REQUEST_TIMEOUT_SECONDS = 10
+# Bounds for a single bulk backfill run
+MAX_CONCURRENT_REQUESTS = 4
+MAX_REQUESTS_PER_SECOND = 10
+# Longest range served by a single time-series request
+TIME_SERIES_MAX_DAYS = 31
 
 
 class ExchangeRateError(Exception):
     pass
 
 
+class ExchangeRateApiError(ValueError):
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
 @dataclass
 class RateResponse:
     currency_code: str
@@ -41,6 +65,116 @@ class Money:
     day: dt.date
 
 
+class RateTable:
+    """Dollar exchange rates indexed by (currency_id, date).
+
+    Built once per bulk conversion so that every lookup is a dictionary access
+    instead of a scan over all the fetched rates.
+    """
+
+    def __init__(self, rates: Iterable[tuple[int, dt.date, Decimal]] = ()):
+        self._rates: dict[tuple[int, dt.date], Decimal] = {
+            (currency_id, day): rate for currency_id, day, rate in rates
+        }
+
+    def __len__(self) -> int:
+        return len(self._rates)
+
+    def __contains__(self, key: tuple[int, dt.date]) -> bool:
+        return key in self._rates
+
+    @classmethod
+    def from_db(cls, keys: Iterable[tuple[int, dt.date]]) -> "RateTable":
+        """Loads the requested (currency_id, date) rates, going through the
+        process-wide rate cache and querying only the keys it misses."""
+        keys = set(keys)
+        rows = list(rate_cache.get_many(keys).values())
+        missing = keys - {(row.currency_id, row.date) for row in rows}
+        if missing:
+            fetched = [
+                row
+                for row in DollarExchangeRate.objects.filter(
+                    currency_id__in={currency_id for currency_id, _ in missing},
+                    date__in={day for _, day in missing},
+                )
+                if (row.currency_id, row.date) in missing
+            ]
+            rate_cache.set_many(fetched)
+            rows += fetched
+        return cls((row.currency_id, row.date, row.rate) for row in rows)
+
+    def add(self, currency_id: int, day: dt.date, rate: Decimal) -> None:
+        self._rates[(currency_id, day)] = rate
+
+    def get(self, currency_id: int, day: dt.date) -> Decimal | None:
+        return self._rates.get((currency_id, day))
+
+
+class PreviousRateIndex:
+    """Resolves (currency_id, day) to the most recent rate on or before day.
+
+    Dates are kept sorted per currency, so gaps (weekends, API outages) are
+    resolved with a bisect in O(log n) instead of a request to the API.
+    """
+
+    def __init__(self, rates: Iterable[tuple[int, dt.date, Decimal]] = ()):
+        by_currency = defaultdict(list)
+        for currency_id, day, rate in rates:
+            by_currency[currency_id].append((day, rate))
+        self._dates: dict[int, list[dt.date]] = {}
+        self._rates: dict[int, list[Decimal]] = {}
+        for currency_id, entries in by_currency.items():
+            entries.sort()
+            self._dates[currency_id] = [day for day, _ in entries]
+            self._rates[currency_id] = [rate for _, rate in entries]
+
+    @classmethod
+    def from_db(cls, keys: Iterable[tuple[int, dt.date]]) -> "PreviousRateIndex":
+        """Loads, for the currencies of the keys, every rate between the first
+        and the last requested day plus the latest one before the first day."""
+        keys = set(keys)
+        if not keys:
+            return cls()
+        currency_ids = {currency_id for currency_id, _ in keys}
+        first_day = min(day for _, day in keys)
+        last_day = max(day for _, day in keys)
+        in_range = DollarExchangeRate.objects.filter(
+            currency_id__in=currency_ids, date__gte=first_day, date__lte=last_day
+        ).values_list("currency_id", "date", "rate")
+        return cls([*in_range, *latest_rates_before(currency_ids, first_day)])
+
+    def get(self, currency_id: int, day: dt.date) -> Decimal | None:
+        dates = self._dates.get(currency_id)
+        if not dates:
+            return None
+        position = bisect_right(dates, day)
+        if position == 0:
+            return None
+        return self._rates[currency_id][position - 1]
+
+
+def latest_rates_before(
+    currency_ids: Iterable[int], day: dt.date
+) -> Iterable[tuple[int, dt.date, Decimal]]:
+    """(currency_id, date, rate) of the most recent rate before day, per currency."""
+    return (
+        DollarExchangeRate.objects.filter(currency_id__in=currency_ids, date__lt=day)
+        .order_by("currency_id", "-date")
+        .distinct("currency_id")
+        .values_list("currency_id", "date", "rate")
+    )
+
+
+def load_rates(
+    keys: Iterable[tuple[int, dt.date]],
+) -> RateTable | PreviousRateIndex:
+    """Loads the rates needed to convert the given (currency_id, date) keys,
+    resolved as configured by EXCHANGE_RATE_RESOLUTION."""
+    if settings.EXCHANGE_RATE_RESOLUTION == "previous":
+        return PreviousRateIndex.from_db(keys)
+    return RateTable.from_db(keys)
+
+
 class MoneyWithIndex(Money):
     index: int
 
@@ -183,25 +317,21 @@ def bulk_convert_to_dollars_from_db(
     entries_in_usd = [entry for entry in money if entry.currency.code == "USD"]
     other_entries = [entry for entry in money if entry.currency.code != "USD"]
     today = dt.date.today()
-    all_days = set(money.day if money.day <= today else today for money in money)
-    all_currencies = set(money.currency for money in money)
-    rates = DollarExchangeRate.objects.filter(
-        currency__in=all_currencies, date__in=all_days
-    ).all()
+    rates = load_rates(
+        (entry.currency.id, min(entry.day, today)) for entry in other_entries
+    )
 
     converted = []
     not_converted = []
     for entry in other_entries:
-        day = entry.day if entry.day <= today else today
+        day = min(entry.day, today)
         currency = entry.currency
 
-        exchange_rate = utils.find_first(
-            rates, lambda rate: rate.currency == currency and rate.date == day
-        )
+        exchange_rate = rates.get(currency.id, day)
         if exchange_rate:
             converted.append(
                 MoneyWithIndex(
-                    amount=entry.amount / exchange_rate.rate,
+                    amount=entry.amount / exchange_rate,
                     currency=currency,
                     day=entry.day,
                     index=entry.index,
@@ -217,23 +347,18 @@ def bulk_convert_from_dollars_from_db(
     money: list[MoneyWithIndex], target_currency: Currency
 ) -> tuple[list[MoneyWithIndex], list[MoneyWithIndex]]:
     today = dt.date.today()
-    all_days = set(money.day if money.day <= today else today for money in money)
-    rates = DollarExchangeRate.objects.filter(
-        currency=target_currency, date__in=all_days
-    ).all()
+    rates = load_rates((target_currency.id, min(entry.day, today)) for entry in money)
 
     converted = []
     not_converted = []
     for entry in money:
         day = min(entry.day, today)
 
-        exchange_rate = utils.find_first(
-            rates, lambda rate: rate.currency == target_currency and rate.date == day
-        )
+        exchange_rate = rates.get(target_currency.id, day)
         if exchange_rate:
             converted.append(
                 MoneyWithIndex(
-                    amount=entry.amount * exchange_rate.rate,
+                    amount=entry.amount * exchange_rate,
                     currency=target_currency,
                     day=entry.day,
                     index=entry.index,
@@ -262,34 +387,117 @@ def _convert_dollars(
 
 
 def get_exchange_rate_for_day(day: dt.date, currency: Currency) -> DollarExchangeRate:
-    exchange_rate = DollarExchangeRate.objects.filter(
-        currency=currency, date=day
-    ).first()
+    """Returns the rate of the day. With EXCHANGE_RATE_RESOLUTION set to
+    "previous" the most recent rate on or before the day is returned instead,
+    and the API is only called if there is none."""
+    exchange_rate = rate_cache.resolve(currency.id, day)
+    if exchange_rate:
+        return exchange_rate
+    exchange_rate = _get_exchange_rate_for_day_from_db(day, currency)
     if not exchange_rate:
         try:
             get_exchange_rates_from_api_and_save_to_database(day)
         except Exception as e:
             raise ExchangeRateError(f"Failed to get exchange rate from API: {e}")
-        exchange_rate = DollarExchangeRate.objects.filter(
-            currency=currency, date=day
-        ).first()
+        exchange_rate = _get_exchange_rate_for_day_from_db(day, currency)
     if not exchange_rate:
         raise ExchangeRateError(f"No exchange rate found for {currency} on {day}")
+    rate_cache.set_resolved(currency.id, day, exchange_rate)
     return exchange_rate
 
 
-def get_exchange_rate_from_api(day: dt.date) -> list[RateResponse]:
-    """Get the exchange rate from the Open Exchange Rates API for all currencies"""
-    day_str = day.isoformat()
+def _get_exchange_rate_for_day_from_db(
+    day: dt.date, currency: Currency
+) -> DollarExchangeRate | None:
+    if settings.EXCHANGE_RATE_RESOLUTION == "previous":
+        return (
+            DollarExchangeRate.objects.filter(currency=currency, date__lte=day)
+            .order_by("-date")
+            .first()
+        )
+    return DollarExchangeRate.objects.filter(currency=currency, date=day).first()
+
+
+class RateLimiter:
+    """Spaces out requests so that at most `per_second` of them start each second.
+
+    Shared by the worker threads of a single backfill run.
+    """
+
+    def __init__(self, per_second: float):
+        self.interval = 1 / per_second
+        self._next_start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+_http_session: requests.Session | None = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Returns the process-wide session, so connections to the API are pooled."""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=MAX_CONCURRENT_REQUESTS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_session = session
+        return _http_session
+
+
+def _get_from_api(
+    path: str, params: dict, rate_limiter: RateLimiter | None = None
+) -> requests.Response:
+    """GETs an Open Exchange Rates endpoint, retrying up to MAX_RETRIES times
+    with exponential backoff on connection errors and transient statuses."""
     app_id = settings.OPENEXCHANGERATES_APP_ID
     if not app_id:
-        raise ValueError("OPENEXCHANGERATES_APP_ID is not set")
-    url = f"https://openexchangerates.org/api/historical/{day_str}.json?app_id={app_id}"
-    response = requests.get(url)
-    if response.status_code != 200:
-        raise ValueError(
-            f"Failed to get exchange rate from API: {response.status_code} {response.text}"
+        raise ExchangeRateApiError("OPENEXCHANGERATES_APP_ID is not set")
+    url = f"{settings.OPENEXCHANGERATES_BASE_URL}/{path}"
+    error = None
+    for attempt in range(MAX_RETRIES + 1):
+        if attempt:
+            time.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+        if rate_limiter:
+            rate_limiter.wait()
+        try:
+            response = get_http_session().get(
+                url,
+                params={**params, "app_id": app_id},
+                timeout=REQUEST_TIMEOUT_SECONDS,
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+            continue
+        if response.status_code == 200:
+            return response
+        error = ExchangeRateApiError(
+            f"Failed to get exchange rate from API: {response.status_code} {response.text}",
+            status_code=response.status_code,
         )
+        if response.status_code not in RETRYABLE_STATUS_CODES:
+            raise error
+    raise ExchangeRateApiError(
+        f"Giving up after {MAX_RETRIES} retries: {error}",
+        status_code=getattr(error, "status_code", None),
+    )
+
+
+def get_exchange_rate_from_api(
+    day: dt.date, rate_limiter: RateLimiter | None = None
+) -> list[RateResponse]:
+    """Get the exchange rate from the Open Exchange Rates API for all currencies"""
+    response = _get_from_api(f"historical/{day.isoformat()}.json", {}, rate_limiter)
     data = response.json()
     return [
         RateResponse(currency_code=currency_code, rate=Decimal(rate), day=day)
@@ -297,25 +505,106 @@ def get_exchange_rate_from_api(day: dt.date) -> list[RateResponse]:
     ]
 
 
-def bulk_get_exchange_rate_from_api(days: list[dt.date]) -> list[RateResponse]:
-    rates = []
-    for day in days:
-        rates.extend(get_exchange_rate_from_api(day))
+def get_exchange_rate_time_series_from_api(
+    start_date: dt.date, end_date: dt.date, rate_limiter: RateLimiter | None = None
+) -> list[RateResponse]:
+    """Get the exchange rates of every day in [start_date, end_date] with a
+    single request. Not every Open Exchange Rates plan allows it: the API
+    answers 403 in that case."""
+    response = _get_from_api(
+        "time-series.json",
+        {"start": start_date.isoformat(), "end": end_date.isoformat()},
+        rate_limiter,
+    )
+    data = response.json()
+    return [
+        RateResponse(
+            currency_code=currency_code,
+            rate=Decimal(rate),
+            day=dt.date.fromisoformat(day_str),
+        )
+        for day_str, day_rates in data["rates"].items()
+        for currency_code, rate in day_rates.items()
+    ]
+
+
+def coalesce_days_into_ranges(
+    days: Iterable[dt.date], max_days: int = TIME_SERIES_MAX_DAYS
+) -> list[tuple[dt.date, dt.date]]:
+    """Groups days into contiguous (start, end) ranges of at most max_days."""
+    ranges = []
+    for day in sorted(set(days)):
+        if ranges:
+            start, end = ranges[-1]
+            if day == end + dt.timedelta(days=1) and (day - start).days < max_days:
+                ranges[-1] = (start, day)
+                continue
+        ranges.append((day, day))
+    return ranges
+
+
+def bulk_get_exchange_rate_from_api(days: Iterable[dt.date]) -> list[RateResponse]:
+    """Fetches the given days with one time-series request per contiguous range
+    and one historical request per isolated day. Ranges are fetched day by day
+    if the plan does not allow time-series requests.
+
+    Requests run concurrently, with at most MAX_CONCURRENT_REQUESTS in flight and
+    MAX_REQUESTS_PER_SECOND started per second.
+    """
+    ranges = coalesce_days_into_ranges(days)
+    if not ranges:
+        return []
+    rate_limiter = RateLimiter(MAX_REQUESTS_PER_SECOND)
+    time_series_not_allowed = threading.Event()
+
+    def fetch_range(day_range: tuple[dt.date, dt.date]) -> list[RateResponse] | None:
+        if time_series_not_allowed.is_set():
+            return None
+        try:
+            return get_exchange_rate_time_series_from_api(*day_range, rate_limiter)
+        except ExchangeRateApiError as e:
+            if e.status_code != 403:
+                raise
+            time_series_not_allowed.set()
+            return None
+
+    def fetch_day(day: dt.date) -> list[RateResponse]:
+        return get_exchange_rate_from_api(day, rate_limiter)
+
+    multi_day_ranges = [(start, end) for start, end in ranges if start != end]
+    single_days = [start for start, end in ranges if start == end]
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        rates = []
+        for day_range, range_rates in zip(
+            multi_day_ranges, executor.map(fetch_range, multi_day_ranges)
+        ):
+            if range_rates is None:
+                single_days += all_dates_in_range(*day_range)
+            else:
+                rates += range_rates
+        for day_rates in executor.map(fetch_day, sorted(single_days)):
+            rates += day_rates
     return rates
 
 
 def save_exchange_rates_to_database(rates: list[RateResponse]):
-    available_currencies = Currency.objects.exclude(code="USD").order_by("code")
-    rates_to_save = []
-    for currency in available_currencies:
-        rate = next(
-            (rate for rate in rates if rate.currency_code == currency.code), None
-        )
-        if rate:
-            rates_to_save.append(
-                DollarExchangeRate(currency=currency, date=rate.day, rate=rate.rate)
+    """Saves one row per (currency, day) of the rates, skipping the currencies
+    that are not in the database and the rows that already exist."""
+    currencies = {
+        currency.code: currency
+        for currency in Currency.objects.exclude(code="USD").order_by("code")
+    }
+    rates_to_save = {}
+    for rate in rates:
+        currency = currencies.get(rate.currency_code)
+        if currency:
+            rates_to_save[(currency.id, rate.day)] = DollarExchangeRate(
+                currency=currency, date=rate.day, rate=rate.rate
             )
-    DollarExchangeRate.objects.bulk_create(rates_to_save)
+    DollarExchangeRate.objects.bulk_create(
+        rates_to_save.values(), ignore_conflicts=True
+    )
+    rate_cache.invalidate(rates_to_save)
 
 
 def get_exchange_rates_from_api_and_save_to_database(day: dt.date):
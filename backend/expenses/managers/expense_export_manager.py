@@ -0,0 +1,141 @@
+import csv
+import json
+from decimal import Decimal
+from typing import Iterable, Iterator
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+from django.db.models.functions import Coalesce
+from expenses.managers import exchange_rate_manager
+from expenses.models import Currency, Expense
+from expenses.statistics_utils import ZERO, bulk_convert
+
+__all__ = ["EXPORT_FORMATS", "export_rows", "fetch_missing_rates"]
+
+CHUNK_SIZE = 2_000
+# Same columns as the CSV import, plus the currency
+COLUMNS = [
+    "typology",
+    "category",
+    "trip",
+    "expense_date",
+    "description",
+    "amount",
+    "amortization_start_date",
+    "amortization_end_date",
+    "currency",
+]
+
+
+def _chunks(expenses: Iterable[Expense]) -> Iterator[list[Expense]]:
+    chunk = []
+    for expense in expenses:
+        chunk.append(expense)
+        if len(chunk) == CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _convert_amounts(expenses: list[Expense], currency: Currency) -> list:
+    """Amounts in the given currency at the rate of the expense date, or of the
+    amortization start for expenses without a date. Expenses without amount are
+    kept as is."""
+    convertible = [
+        expense
+        for expense in expenses
+        if expense.amount is not None and expense.currency is not None
+    ]
+    converted = bulk_convert(
+        [
+            exchange_rate_manager.Money(
+                amount=expense.amount,
+                currency=expense.currency,
+                day=expense.expense_date or expense.amortization_start_date,
+            )
+            for expense in convertible
+        ],
+        currency,
+    )
+    amounts = {
+        expense.id: money.amount for expense, money in zip(convertible, converted)
+    }
+    return [amounts.get(expense.id, expense.amount) for expense in expenses]
+
+
+def fetch_missing_rates(queryset: QuerySet[Expense], currency: Currency) -> None:
+    """Converts one amount per (currency, day) of the queryset, so that missing
+    rates are fetched, or fail with ExchangeRateError, before a response
+    starts streaming."""
+    pairs = list(
+        queryset.filter(amount__isnull=False, currency__isnull=False)
+        .annotate(rate_day=Coalesce("expense_date", "amortization_start_date"))
+        .order_by()
+        .values_list("currency", "rate_day")
+        .distinct()
+    )
+    currencies = Currency.objects.in_bulk({currency_id for currency_id, _ in pairs})
+    bulk_convert(
+        [
+            exchange_rate_manager.Money(
+                amount=Decimal("1"), currency=currencies[currency_id], day=day
+            )
+            for currency_id, day in pairs
+        ],
+        currency,
+    )
+
+
+def export_rows(
+    queryset: QuerySet[Expense], currency: Currency | None = None
+) -> Iterator[dict]:
+    """Yields one dict of COLUMNS per expense, reading the queryset with a
+    server-side cursor and converting amounts one chunk at a time."""
+    queryset = queryset.select_related("category", "trip", "currency")
+    for chunk in _chunks(queryset.iterator(chunk_size=CHUNK_SIZE)):
+        if currency is None:
+            amounts = [expense.amount for expense in chunk]
+        else:
+            amounts = _convert_amounts(chunk, currency)
+        for expense, amount in zip(chunk, amounts):
+            if currency is not None and amount is not None:
+                amount = amount.quantize(ZERO)
+            amount_currency = currency or expense.currency
+            yield {
+                "typology": "expense" if expense.is_expense else "income",
+                "category": expense.category.code,
+                "trip": expense.trip.code if expense.trip else "",
+                "expense_date": expense.expense_date,
+                "description": expense.description,
+                "amount": amount,
+                "amortization_start_date": expense.amortization_start_date,
+                "amortization_end_date": expense.amortization_end_date,
+                "currency": amount_currency.code if amount_currency else "",
+            }
+
+
+class _Echo:
+    """File-like object handing back what csv.writer writes to it."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def stream_csv(rows: Iterable[dict]) -> Iterator[str]:
+    writer = csv.DictWriter(_Echo(), fieldnames=COLUMNS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(rows: Iterable[dict]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+
+# Format: (stream, content type, file extension)
+EXPORT_FORMATS = {
+    "csv": (stream_csv, "text/csv", "csv"),
+    "ndjson": (stream_ndjson, "application/x-ndjson", "ndjson"),
+}
@@ -0,0 +1,370 @@
+import csv
+import re
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Iterable, Iterator
+
+from django.db import connection, transaction
+from django.db.models import Model
+from django.db.models.expressions import RawSQL
+from expenses import user_cache
+from expenses.date_utils import from_italian_date, is_italian_date
+from expenses.models import Currency, Expense, ExpenseCategory, Trip, User
+from expenses.statistics_rollup import (
+    is_rollup_enabled,
+    refresh_daily_amortizations,
+)
+
+__all__ = [
+    "IMPORTERS",
+    "ImportResult",
+    "ParsedExpense",
+    "import_expenses_from_csv",
+    "import_expenses_from_csv_with_copy",
+    "parse_csv",
+]
+
+BATCH_SIZE = 1_000
+# Rows parsed between two calls of the on_progress callback
+PROGRESS_INTERVAL = 500
+DATE_FIELDS = ["expense_date", "amortization_start_date", "amortization_end_date"]
+# Columns validated on the row itself, before categories and trips are resolved
+ROW_FIELDS = ["description", "amount", "is_expense", *DATE_FIELDS]
+# Amounts written with a decimal point, as in the exports, e.g. "1234.56"
+DOT_DECIMAL_AMOUNT = re.compile(r"-?\d+\.\d{1,2}")
+
+
+@dataclass
+class ParsedExpense:
+    row: int
+    category_code: str
+    trip_code: str
+    expense: Expense
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    errors: list[dict] = field(default_factory=list)
+
+    def add_error(self, row: int, error: Exception) -> None:
+        self.errors.append({"row": row, "error": str(error)})
+
+
+def parse_amount(value: str) -> Decimal:
+    """Parses amounts written in the Italian format, e.g. "1.234,56 €", or with
+    a decimal point and at most two decimals, e.g. "1234.56"."""
+    stripped = value.replace("€", "").strip()
+    if DOT_DECIMAL_AMOUNT.fullmatch(stripped):
+        normalized = stripped
+    else:
+        normalized = stripped.replace(".", "").replace(",", ".")
+    try:
+        return Decimal(normalized)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value}")
+
+
+def parse_date(value: str):
+    return from_italian_date(value) if is_italian_date(value) else value
+
+
+def parse_currency(value: str, currencies: dict[str, Currency]) -> Currency | None:
+    code = value.strip().upper()
+    if not code:
+        return None
+    if code not in currencies:
+        raise ValueError(f"Invalid currency: {value}")
+    return currencies[code]
+
+
+def parse_code(column: str, value: str, model: type[Model]) -> str:
+    """Code of a category or trip, checked here so that an overlong one is an
+    error of its row instead of failing the insert of the whole file."""
+    code = value.strip()
+    max_length = model._meta.get_field("code").max_length
+    if len(code) > max_length:
+        raise ValueError(f"Invalid {column}: longer than {max_length} characters")
+    return code
+
+
+def parse_row(
+    i: int, row: dict[str, str], currencies: dict[str, Currency]
+) -> ParsedExpense:
+    """Validates a CSV row, raises if the expense cannot be created."""
+    # Typology: income or expense (default)
+    is_expense = row.get("typology", "expense").strip().lower() != "income"
+    expense = Expense(
+        expense_date=parse_date(row["expense_date"]),
+        description=row["description"],
+        amount=parse_amount(row["amount"]) if row.get("amount") else None,
+        amortization_start_date=parse_date(row["amortization_start_date"]),
+        amortization_end_date=parse_date(row["amortization_end_date"]),
+        is_expense=is_expense,
+        # Optional, written by the exports
+        currency=parse_currency(row.get("currency") or "", currencies),
+    )
+    expense.clean_fields(
+        exclude=[f.name for f in Expense._meta.fields if f.name not in ROW_FIELDS]
+    )
+    if expense.amortization_start_date > expense.amortization_end_date:
+        raise ValueError("Amortization start date must be before amortization end date")
+    return ParsedExpense(
+        row=i,
+        category_code=parse_code("category", row["category"], ExpenseCategory),
+        trip_code=parse_code("trip", row["trip"], Trip),
+        expense=expense,
+    )
+
+
+ProgressCallback = Callable[[int], None]
+
+
+def parse_csv(
+    lines: Iterable[str],
+    result: ImportResult,
+    on_progress: ProgressCallback | None = None,
+) -> Iterator[ParsedExpense]:
+    """Yields the valid rows of a CSV file, adding the others to result.errors.
+    on_progress is called with the number of rows parsed so far."""
+    # Loaded before any row is read: the COPY import reads the rows while the
+    # connection is busy
+    currencies = {currency.code: currency for currency in Currency.objects.all()}
+    return _parse_rows(lines, result, currencies, on_progress)
+
+
+def _parse_rows(
+    lines: Iterable[str],
+    result: ImportResult,
+    currencies: dict[str, Currency],
+    on_progress: ProgressCallback | None,
+) -> Iterator[ParsedExpense]:
+    i = 0
+    for i, row in enumerate(csv.DictReader(lines), 1):
+        try:
+            yield parse_row(i, row, currencies)
+        except Exception as e:
+            result.add_error(i, e)
+        if on_progress and i % PROGRESS_INTERVAL == 0:
+            on_progress(i)
+    if on_progress:
+        on_progress(i)
+
+
+def get_or_create_categories(
+    user: User, parsed: list[ParsedExpense]
+) -> dict[str, ExpenseCategory]:
+    """Categories by code, the missing ones are created from their first row."""
+    first_rows = {}
+    for entry in parsed:
+        first_rows.setdefault(entry.category_code, entry)
+    categories = {
+        category.code: category
+        for category in ExpenseCategory.objects.filter(user=user, code__in=first_rows)
+    }
+    ExpenseCategory.objects.bulk_create(
+        ExpenseCategory(
+            user=user,
+            code=code,
+            name=code,
+            for_expense=entry.expense.is_expense,
+        )
+        for code, entry in first_rows.items()
+        if code not in categories
+    )
+    return {
+        category.code: category
+        for category in ExpenseCategory.objects.filter(user=user, code__in=first_rows)
+    }
+
+
+def get_or_create_trips(user: User, parsed: list[ParsedExpense]) -> dict[str, Trip]:
+    codes = {entry.trip_code for entry in parsed if entry.trip_code}
+    existing = set(
+        Trip.objects.filter(user=user, code__in=codes).values_list("code", flat=True)
+    )
+    Trip.objects.bulk_create(
+        Trip(user=user, code=code, name=code) for code in codes - existing
+    )
+    return {trip.code: trip for trip in Trip.objects.filter(user=user, code__in=codes)}
+
+
+def import_expenses_from_csv(
+    user: User, lines: Iterable[str], on_progress: ProgressCallback | None = None
+) -> ImportResult:
+    """Imports the expenses of a CSV export in a few queries.
+
+    Every row is parsed and validated first, then categories and trips are
+    resolved (and created) with one query each and the expenses are inserted
+    in batches. Invalid rows are reported in the result and skipped.
+    """
+    result = ImportResult()
+    parsed = list(parse_csv(lines, result, on_progress))
+    with transaction.atomic():
+        categories = get_or_create_categories(user, parsed)
+        trips = get_or_create_trips(user, parsed)
+        expenses = []
+        for entry in parsed:
+            expense = entry.expense
+            expense.user = user
+            expense.category = categories[entry.category_code]
+            expense.trip = trips.get(entry.trip_code)
+            expenses.append(expense)
+        Expense.objects.bulk_create(expenses, batch_size=BATCH_SIZE)
+        # bulk_create does not send post_save
+        refresh_daily_amortizations(expenses)
+        user_cache.invalidate(user_cache.STATISTICS, [user.id])
+    result.created = len(expenses)
+    return result
+
+
+STAGING_TABLE = "expense_import_staging"
+IMPORTED_IDS_TABLE = "expense_import_ids"
+
+
+def _copy_to_staging(cursor, parsed: Iterable[ParsedExpense]) -> None:
+    """Streams the parsed rows into the staging table. Codes are sized as in the
+    expense tables: the rows are validated by parse_row before they are written,
+    so the merge cannot fail on one of them."""
+    category_code_length = ExpenseCategory._meta.get_field("code").max_length
+    trip_code_length = Trip._meta.get_field("code").max_length
+    cursor.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+    cursor.execute(
+        f"""
+        CREATE TEMPORARY TABLE {STAGING_TABLE} (
+            row integer NOT NULL,
+            category_code varchar({category_code_length}) NOT NULL,
+            trip_code varchar({trip_code_length}),
+            expense_date date,
+            description varchar(255) NOT NULL,
+            amount numeric(10, 2),
+            amortization_start_date date,
+            amortization_end_date date,
+            is_expense boolean NOT NULL,
+            currency_id bigint
+        ) ON COMMIT DROP
+        """
+    )
+    with cursor.copy(
+        f"COPY {STAGING_TABLE} (row, category_code, trip_code, expense_date, "
+        "description, amount, amortization_start_date, amortization_end_date, "
+        "is_expense, currency_id) FROM STDIN"
+    ) as copy:
+        for entry in parsed:
+            expense = entry.expense
+            copy.write_row(
+                (
+                    entry.row,
+                    entry.category_code,
+                    entry.trip_code or None,
+                    expense.expense_date,
+                    expense.description,
+                    expense.amount,
+                    expense.amortization_start_date,
+                    expense.amortization_end_date,
+                    expense.is_expense,
+                    expense.currency_id,
+                )
+            )
+
+
+def _merge_staging(cursor, user: User) -> int:
+    """Creates the missing categories and trips, then the expenses. Returns the
+    number of expenses created, their ids are left in IMPORTED_IDS_TABLE."""
+    category_table = ExpenseCategory._meta.db_table
+    trip_table = Trip._meta.db_table
+    # A new category takes the typology of its first row
+    cursor.execute(
+        f"""
+        INSERT INTO {category_table} (user_id, code, name, for_expense, is_active)
+        SELECT DISTINCT ON (s.category_code)
+            %(user_id)s, s.category_code, s.category_code, s.is_expense, true
+        FROM {STAGING_TABLE} s
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {category_table} c
+            WHERE c.user_id = %(user_id)s AND c.code = s.category_code
+        )
+        ORDER BY s.category_code, s.row
+        """,
+        {"user_id": user.id},
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO {trip_table} (user_id, code, name, is_active)
+        SELECT DISTINCT %(user_id)s, s.trip_code, s.trip_code, true
+        FROM {STAGING_TABLE} s
+        WHERE s.trip_code IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM {trip_table} t
+            WHERE t.user_id = %(user_id)s AND t.code = s.trip_code
+        )
+        """,
+        {"user_id": user.id},
+    )
+    cursor.execute(f"DROP TABLE IF EXISTS {IMPORTED_IDS_TABLE}")
+    cursor.execute(
+        f"CREATE TEMPORARY TABLE {IMPORTED_IDS_TABLE} (id bigint) ON COMMIT DROP"
+    )
+    cursor.execute(
+        f"""
+        WITH inserted AS (
+            INSERT INTO {Expense._meta.db_table} (
+                user_id, expense_date, description, amount,
+                amortization_start_date, amortization_end_date,
+                category_id, trip_id, is_expense, currency_id
+            )
+            SELECT
+                %(user_id)s, s.expense_date, s.description, s.amount,
+                s.amortization_start_date, s.amortization_end_date,
+                c.id, t.id, s.is_expense, s.currency_id
+            FROM {STAGING_TABLE} s
+            JOIN {category_table} c
+                ON c.user_id = %(user_id)s AND c.code = s.category_code
+            LEFT JOIN {trip_table} t
+                ON t.user_id = %(user_id)s AND t.code = s.trip_code
+            ORDER BY s.row
+            RETURNING id
+        )
+        INSERT INTO {IMPORTED_IDS_TABLE} SELECT id FROM inserted
+        """,
+        {"user_id": user.id},
+    )
+    return cursor.rowcount
+
+
+def import_expenses_from_csv_with_copy(
+    user: User, lines: Iterable[str], on_progress: ProgressCallback | None = None
+) -> ImportResult:
+    """Same contract as import_expenses_from_csv, for files too large to hold in
+    memory.
+
+    Rows are parsed and validated one at a time and streamed with COPY into a
+    temporary staging table, then merged into the expense tables with a few
+    INSERT ... SELECT. Daily amortizations are refreshed in batches.
+    """
+    result = ImportResult()
+    with transaction.atomic(), connection.cursor() as cursor:
+        # The connection is busy with COPY while the rows are parsed, progress
+        # can only be reported once they are all staged
+        _copy_to_staging(cursor, parse_csv(lines, result))
+        result.created = _merge_staging(cursor, user)
+        if on_progress:
+            on_progress(result.created + len(result.errors))
+        if is_rollup_enabled():
+            imported = Expense.objects.filter(
+                id__in=RawSQL(f"SELECT id FROM {IMPORTED_IDS_TABLE}", [])
+            )
+            batch = []
+            for expense in imported.iterator(chunk_size=BATCH_SIZE):
+                batch.append(expense)
+                if len(batch) == BATCH_SIZE:
+                    refresh_daily_amortizations(batch)
+                    batch = []
+            refresh_daily_amortizations(batch)
+        user_cache.invalidate(user_cache.STATISTICS, [user.id])
+    return result
+
+
+IMPORTERS = {
+    "batch": import_expenses_from_csv,
+    "copy": import_expenses_from_csv_with_copy,
+}
@@ -0,0 +1,111 @@
+import io
+import logging
+import threading
+from contextlib import contextmanager
+
+from django.db import connections, transaction
+from django.db.models import Q
+from expenses import date_utils
+from expenses.constants import IMPORT_JOB_HEARTBEAT_INTERVAL, IMPORT_JOB_TIMEOUT
+from expenses.managers.expense_import_manager import IMPORTERS
+from expenses.models import ImportJob
+
+__all__ = ["claim_next_job", "process_pending_jobs", "run_job"]
+
+logger = logging.getLogger(__name__)
+
+
+def claim_next_job() -> ImportJob | None:
+    """Marks the oldest pending job as running and returns it. Jobs locked by
+    another worker are skipped, running jobs without a heartbeat for more than
+    IMPORT_JOB_TIMEOUT are claimed again."""
+    stale = date_utils.now() - IMPORT_JOB_TIMEOUT
+    with transaction.atomic():
+        job = (
+            ImportJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=ImportJob.PENDING)
+                | Q(status=ImportJob.RUNNING, heartbeat_at__lt=stale)
+            )
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = ImportJob.RUNNING
+        job.started_at = job.heartbeat_at = date_utils.now()
+        job.processed_rows = 0
+        job.save(
+            update_fields=["status", "started_at", "heartbeat_at", "processed_rows"]
+        )
+    return job
+
+
+@contextmanager
+def heartbeat(job: ImportJob):
+    """Refreshes the heartbeat of the job every IMPORT_JOB_HEARTBEAT_INTERVAL
+    while the block runs. The imports hold the connection of the worker in a
+    transaction, so the heartbeat is written by a thread with its own."""
+    stopped = threading.Event()
+
+    def beat() -> None:
+        try:
+            while not stopped.wait(IMPORT_JOB_HEARTBEAT_INTERVAL.total_seconds()):
+                ImportJob.objects.filter(pk=job.pk, status=ImportJob.RUNNING).update(
+                    heartbeat_at=date_utils.now()
+                )
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def run_job(job: ImportJob) -> None:
+    def on_progress(processed_rows: int) -> None:
+        ImportJob.objects.filter(pk=job.pk).update(processed_rows=processed_rows)
+
+    lines = io.TextIOWrapper(io.BytesIO(bytes(job.content)), encoding="utf-8")
+    try:
+        with heartbeat(job):
+            result = IMPORTERS[job.mode](job.user, lines, on_progress)
+    except Exception as e:
+        job.status = ImportJob.FAILED
+        job.errors = [{"row": None, "error": str(e)}]
+    else:
+        job.status = ImportJob.COMPLETED
+        job.created_rows = result.created
+        job.failed_rows = len(result.errors)
+        job.processed_rows = job.created_rows + job.failed_rows
+        job.errors = result.errors
+    job.content = b""
+    job.finished_at = date_utils.now()
+    job.save()
+
+
+def fail_job(job: ImportJob, error: Exception) -> None:
+    ImportJob.objects.filter(pk=job.pk).update(
+        status=ImportJob.FAILED,
+        errors=[{"row": None, "error": str(error)}],
+        content=b"",
+        finished_at=date_utils.now(),
+    )
+
+
+def process_pending_jobs() -> int:
+    """Runs pending jobs until none is left, returns how many were run. A job
+    failing outside of its import is marked as failed, the next ones still run."""
+    count = 0
+    while job := claim_next_job():
+        try:
+            run_job(job)
+        except Exception as e:
+            logger.exception("Import job %s failed", job.pk)
+            fail_job(job, e)
+        count += 1
+    return count
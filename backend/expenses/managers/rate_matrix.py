@@ -0,0 +1,152 @@
+import datetime as dt
+from decimal import Decimal
+from typing import Iterable
+
+import numpy as np
+from django.conf import settings
+from expenses.managers import exchange_rate_manager
+from expenses.managers.exchange_rate_manager import Money
+from expenses.models import Currency, DollarExchangeRate
+
+__all__ = ["EPOCH", "RateMatrix", "bulk_convert_to_currency"]
+
+# Day zero of the matrix columns, the earliest date the API accepts for expenses
+EPOCH = dt.date(2000, 1, 1)
+CENT = Decimal("0.01")
+RATE_PLACES = Decimal("0.0001")  # DollarExchangeRate.rate decimal places
+
+
+def day_offset(day: dt.date) -> int:
+    return (day - EPOCH).days
+
+
+class RateMatrix:
+    """Dense matrix of dollar rates indexed by [currency, day offset since EPOCH].
+
+    Missing rates are NaN, or the previous known rate when EXCHANGE_RATE_RESOLUTION
+    is "previous". USD rows are filled with ones, as USD has no rows in
+    DollarExchangeRate.
+    """
+
+    def __init__(
+        self, currencies: Iterable[Currency], first_day: dt.date, last_day: dt.date
+    ):
+        currencies = {currency.id: currency for currency in currencies}
+        self.rows = {currency_id: i for i, currency_id in enumerate(currencies)}
+        self.first_offset = day_offset(first_day)
+        self.values = np.full((len(self.rows), (last_day - first_day).days + 1), np.nan)
+        for currency_id, currency in currencies.items():
+            if currency.code == "USD":
+                self.values[self.rows[currency_id]] = 1.0
+
+    @classmethod
+    def from_db(
+        cls, currencies: Iterable[Currency], first_day: dt.date, last_day: dt.date
+    ) -> "RateMatrix":
+        matrix = cls(currencies, first_day, last_day)
+        rates = list(
+            DollarExchangeRate.objects.filter(
+                currency_id__in=list(matrix.rows),
+                date__gte=first_day,
+                date__lte=last_day,
+            ).values_list("currency_id", "date", "rate")
+        )
+        if rates:
+            currency_ids, days, values = zip(*rates)
+            matrix.values[
+                [matrix.rows[currency_id] for currency_id in currency_ids],
+                [day_offset(day) - matrix.first_offset for day in days],
+            ] = np.array(values, dtype=np.float64)
+        if settings.EXCHANGE_RATE_RESOLUTION == "previous":
+            matrix.fill_gaps(
+                exchange_rate_manager.latest_rates_before(list(matrix.rows), first_day)
+            )
+        return matrix
+
+    def fill_gaps(self, previous_rates: Iterable[tuple[int, dt.date, Decimal]]):
+        """Replaces each missing rate with the closest earlier one in its row,
+        seeding every row with the given rates from before the first day."""
+        seed = np.full((len(self.rows), 1), np.nan)
+        for currency_id, _, rate in previous_rates:
+            seed[self.rows[currency_id], 0] = float(rate)
+        values = np.hstack([seed, self.values])
+        columns = np.where(~np.isnan(values), np.arange(values.shape[1]), 0)
+        np.maximum.accumulate(columns, axis=1, out=columns)
+        rows = np.arange(values.shape[0])[:, np.newaxis]
+        self.values = values[rows, columns][:, 1:]
+
+    def lookup(self, currency_ids: Iterable[int], offsets: np.ndarray) -> np.ndarray:
+        rows = np.fromiter((self.rows[i] for i in currency_ids), dtype=np.intp)
+        return self.values[rows, offsets - self.first_offset]
+
+    def convert(
+        self,
+        amounts: list[Decimal],
+        currency_ids: list[int],
+        days: list[dt.date],
+        destination_currency_id: int,
+    ) -> list[Decimal | None] | None:
+        """Converts a column of amounts in one vectorized operation.
+
+        Results are rounded to the cent. Values that float arithmetic cannot
+        round with certainty (too close to half a cent) are recomputed exactly
+        with Decimal. Returns None if any rate is missing from the matrix.
+        """
+        offsets = np.fromiter((day_offset(day) for day in days), dtype=np.int64)
+        source_rates = self.lookup(currency_ids, offsets)
+        destination_rates = self.values[
+            self.rows[destination_currency_id], offsets - self.first_offset
+        ]
+        if np.isnan(source_rates).any() or np.isnan(destination_rates).any():
+            return None
+
+        values = np.fromiter(
+            (np.nan if a is None else float(a) for a in amounts), dtype=np.float64
+        )
+        cents = values / source_rates * destination_rates * 100
+        rounded = np.rint(cents)
+        tolerance = np.maximum(np.abs(cents) * 1e-12, 1e-6)
+        ambiguous = np.abs(np.abs(cents - rounded) - 0.5) < tolerance
+
+        result = [
+            None if amount is None else Decimal(int(c)).scaleb(-2)
+            for amount, c in zip(amounts, rounded)
+        ]
+        for i in np.flatnonzero(ambiguous):
+            source_rate = Decimal(float(source_rates[i])).quantize(RATE_PLACES)
+            destination_rate = Decimal(float(destination_rates[i])).quantize(
+                RATE_PLACES
+            )
+            result[i] = (amounts[i] / source_rate * destination_rate).quantize(CENT)
+        return result
+
+
+def bulk_convert_to_currency(
+    money: list[Money], destination_currency: Currency
+) -> list[Money]:
+    """Same contract as exchange_rate_manager.bulk_convert_to_currency, with
+    amounts rounded to the cent. Falls back to it (and to the API backfill) when
+    the database does not have every rate."""
+    if not money:
+        return []
+    today = dt.date.today()
+    days = [min(entry.day, today) for entry in money]
+    matrix = RateMatrix.from_db(
+        {entry.currency for entry in money} | {destination_currency},
+        min(days),
+        max(days),
+    )
+    amounts = matrix.convert(
+        [entry.amount for entry in money],
+        [entry.currency.id for entry in money],
+        days,
+        destination_currency.id,
+    )
+    if amounts is None:
+        return exchange_rate_manager.bulk_convert_to_currency(
+            money, destination_currency
+        )
+    return [
+        Money(amount=amount, currency=destination_currency, day=entry.day)
+        for amount, entry in zip(amounts, money)
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0018_settings_singleton'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAmortization',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('is_expense', models.BooleanField()),
+                ('rate_date', models.DateField(null=True)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='expenses.expensecategory')),
+                ('currency', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='expenses.currency')),
+                ('expense', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_amortizations', to='expenses.expense')),
+                ('trip', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='expenses.trip')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='expenses.user')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'day'], name='daily_amortization_user_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0019_daily_amortization'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dollarexchangerate',
+            index=models.Index(fields=['currency', '-date'], name='dollar_rate_currency_date'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'amortization_end_date', 'amortization_start_date'], name='expense_user_amortization'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', '-expense_date'], name='expense_user_expense_date'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(condition=models.Q(('recurring_expense__isnull', False)), fields=['expense_date', 'recurring_expense'], name='expense_recurring_date'),
+        ),
+    ]
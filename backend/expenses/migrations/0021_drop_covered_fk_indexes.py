@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0020_expense_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dollarexchangerate',
+            name='currency',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to='expenses.currency'),
+        ),
+        migrations.AlterField(
+            model_name='expense',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='expenses', to='expenses.user'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0022_import_job'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='token',
+            index=models.Index(condition=models.Q(('expiration_date__isnull', False)), fields=['expiration_date'], name='token_expiration_date'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:09
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def delete_duplicate_recurring_expenses(apps, schema_editor):
+    # The cron could create more than one expense of a recurring expense on the
+    # same day, the first one is kept
+    Expense = apps.get_model("expenses", "Expense")
+    Expense.objects.filter(
+        Exists(
+            Expense.objects.filter(
+                recurring_expense=OuterRef("recurring_expense"),
+                expense_date=OuterRef("expense_date"),
+                id__lt=OuterRef("id"),
+            )
+        )
+    ).delete()
+
+
+class Migration(migrations.Migration):
+    # The duplicates are deleted in their own transaction: PostgreSQL cannot
+    # create the constraint while their deferred foreign key checks are pending
+    atomic = False
+
+    dependencies = [
+        ('expenses', '0023_token_expiration_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_recurring_expenses, migrations.RunPython.noop, atomic=True),
+        migrations.RemoveIndex(
+            model_name='expense',
+            name='expense_recurring_date',
+        ),
+        migrations.AddConstraint(
+            model_name='expense',
+            constraint=models.UniqueConstraint(condition=models.Q(('recurring_expense__isnull', False)), fields=('expense_date', 'recurring_expense'), name='expense_recurring_date'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+# Table of the "shared" cache, settings.CACHES["shared"]["LOCATION"]. Created here
+# with the columns of createcachetable, so that the schema does not depend on the
+# CACHES setting at migrate time
+CACHE_TABLE = "expenses_cache"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("expenses", "0024_expense_recurring_date_unique"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            [
+                f"""
+                CREATE TABLE IF NOT EXISTS {CACHE_TABLE} (
+                    cache_key varchar(255) NOT NULL PRIMARY KEY,
+                    value text NOT NULL,
+                    expires timestamp with time zone NOT NULL
+                )
+                """,
+                f"CREATE INDEX IF NOT EXISTS {CACHE_TABLE}_expires "
+                f"ON {CACHE_TABLE} (expires)",
+            ],
+            f"DROP TABLE IF EXISTS {CACHE_TABLE}",
+        ),
+    ]
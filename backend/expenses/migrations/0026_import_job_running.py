@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0025_expenses_cache'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='importjob',
+            index=models.Index(condition=models.Q(('status', 'RUNNING')), fields=['started_at'], name='import_job_running'),
+        ),
+    ]
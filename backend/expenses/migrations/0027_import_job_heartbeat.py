@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 03:11
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def set_heartbeat_of_running_jobs(apps, schema_editor):
+    ImportJob = apps.get_model("expenses", "ImportJob")
+    ImportJob.objects.filter(status="RUNNING").update(heartbeat_at=F("started_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0026_import_job_running'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='importjob',
+            name='import_job_running',
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(set_heartbeat_of_running_jobs, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='importjob',
+            index=models.Index(condition=models.Q(('status', 'RUNNING')), fields=['heartbeat_at'], name='import_job_running'),
+        ),
+    ]
@@ -1,7 +1,9 @@
 from expenses.models.currency import Currency
+from expenses.models.daily_amortization import DailyAmortization
 from expenses.models.dollar_exchange_rate import DollarExchangeRate
 from expenses.models.expense import Expense
 from expenses.models.expense_category import ExpenseCategory
+from expenses.models.import_job import ImportJob
 from expenses.models.recurring_expense import RecurringExpense
 from expenses.models.settings import Settings
 from expenses.models.trip import Trip
@@ -18,4 +20,6 @@ __all__ = [
     "DollarExchangeRate",
     "RecurringExpense",
     "Settings",
+    "DailyAmortization",
+    "ImportJob",
 ]
@@ -0,0 +1,33 @@
+from django.db import models
+
+
+class DailyAmortization(models.Model):
+    """Share of an expense amortized on a single day, in the expense currency.
+
+    Derived from Expense and rebuilt whenever the expense is saved, see
+    expenses.statistics_rollup.
+    """
+
+    expense = models.ForeignKey(
+        "Expense", on_delete=models.CASCADE, related_name="daily_amortizations"
+    )
+    user = models.ForeignKey("User", on_delete=models.CASCADE, related_name="+")
+    day = models.DateField()
+    category = models.ForeignKey(
+        "ExpenseCategory", on_delete=models.CASCADE, related_name="+"
+    )
+    trip = models.ForeignKey(
+        "Trip", on_delete=models.CASCADE, related_name="+", null=True
+    )
+    is_expense = models.BooleanField()
+    currency = models.ForeignKey(
+        "Currency", on_delete=models.CASCADE, related_name="+", null=True
+    )
+    # Day of the exchange rate used to convert the amount, the expense date
+    rate_date = models.DateField(null=True)
+    amount = models.DecimalField(decimal_places=2, max_digits=10)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "day"], name="daily_amortization_user_day"),
+        ]
@@ -3,7 +3,8 @@ from .currency import Currency
 
 
 class DollarExchangeRate(models.Model):
-    currency = models.ForeignKey(Currency, on_delete=models.PROTECT)
+    # Indexed by dollar_rate_currency_date
+    currency = models.ForeignKey(Currency, on_delete=models.PROTECT, db_index=False)
     date = models.DateField()
     rate = models.DecimalField(max_digits=14, decimal_places=4)
 
@@ -17,3 +18,9 @@ class DollarExchangeRate(models.Model):
                 name="unique_dollar_exchange_rate_date_currency",
             )
         ]
+        indexes = [
+            # Latest rate of a currency on or before a day
+            models.Index(
+                fields=["currency", "-date"], name="dollar_rate_currency_date"
+            ),
+        ]
@@ -1,11 +1,14 @@
 from django.db import models
+from django.db.models import Q
 
 
 class Expense(models.Model):
+    # Indexed by the composite indexes starting with user
     user = models.ForeignKey(
         "User",
         on_delete=models.PROTECT,
         related_name="expenses",
+        db_index=False,
     )
     expense_date = models.DateField(verbose_name="Expense Date", null=True)
     description = models.CharField(verbose_name="Description", max_length=255)
@@ -38,3 +41,26 @@ class Expense(models.Model):
             f"{self.description} - {self.amount} "
             f"({self.amortization_start_date.isoformat()} -> {self.amortization_end_date.isoformat()})"
         )
+
+    class Meta:
+        indexes = [
+            # Amortization overlap filters of the expense list and statistics, recent
+            # ranges are the common case so the end date comes first
+            models.Index(
+                fields=["user", "amortization_end_date", "amortization_start_date"],
+                name="expense_user_amortization",
+            ),
+            # Expense list, ordered by -expense_date by default
+            models.Index(
+                fields=["user", "-expense_date"], name="expense_user_expense_date"
+            ),
+        ]
+        constraints = [
+            # One expense per recurring expense and day, create_recurring_expenses
+            # relies on it. Also serves RecurringExpenseQuerySet.annotate_has_expense_in_day
+            models.UniqueConstraint(
+                fields=["expense_date", "recurring_expense"],
+                name="expense_recurring_date",
+                condition=Q(recurring_expense__isnull=False),
+            ),
+        ]
@@ -0,0 +1,51 @@
+from django.db import models
+
+
+class ImportJob(models.Model):
+    """CSV import accepted by the API and run by the process_import_jobs worker."""
+
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+    user = models.ForeignKey(
+        "User", on_delete=models.PROTECT, related_name="import_jobs"
+    )
+    mode = models.CharField(verbose_name="Import Mode", max_length=10, default="batch")
+    status = models.CharField(
+        verbose_name="Status",
+        max_length=10,
+        default=PENDING,
+        choices=[
+            (PENDING, "Pending"),
+            (RUNNING, "Running"),
+            (COMPLETED, "Completed"),
+            (FAILED, "Failed"),
+        ],
+    )
+    # Uploaded file, emptied once the job is processed
+    content = models.BinaryField()
+    processed_rows = models.IntegerField(default=0)
+    created_rows = models.IntegerField(default=0)
+    failed_rows = models.IntegerField(default=0)
+    errors = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True)
+    # Refreshed by the worker while the job is running
+    heartbeat_at = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["created_at"],
+                name="import_job_pending",
+                condition=models.Q(status="PENDING"),
+            ),
+            models.Index(
+                fields=["heartbeat_at"],
+                name="import_job_running",
+                condition=models.Q(status="RUNNING"),
+            ),
+        ]
@@ -2,7 +2,7 @@ import uuid
 from django.db import models
 
 from expenses import date_utils
-from expenses.constants import TOKEN_DURATION
+from expenses.constants import TOKEN_DURATION, TOKEN_EXTENSION_INTERVAL
 import datetime as dt
 
 
@@ -13,7 +13,10 @@ class Token(models.Model):
 
     def extend_expiration_date(self) -> None:
         new_expiration = self.get_extended_expiration_date()
-        if new_expiration:
+        # Coalesced: one write a day at most instead of one per request
+        if new_expiration and new_expiration - self.expiration_date >= (
+            TOKEN_EXTENSION_INTERVAL
+        ):
             self.expiration_date = new_expiration
             self.save(update_fields=["expiration_date"])
         return None
@@ -22,3 +25,13 @@ class Token(models.Model):
         if not self.expiration_date:
             return None  # No need to do it
         return max(self.expiration_date, date_utils.now() + TOKEN_DURATION)
+
+    class Meta:
+        indexes = [
+            # delete_expired_tokens, tokens without expiration never expire
+            models.Index(
+                fields=["expiration_date"],
+                name="token_expiration_date",
+                condition=models.Q(expiration_date__isnull=False),
+            ),
+        ]
@@ -0,0 +1,111 @@
+import datetime as dt
+from collections import defaultdict
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+from expenses import date_utils, user_cache
+from expenses.managers import exchange_rate_manager
+from expenses.models import Currency, RecurringExpense, User
+from expenses.statistics_utils import ZERO, amortize_value, bulk_convert
+from expenses.utils.cron_parser.batch import CronBatch
+from expenses.utils.cron_parser.cron import parse_cron
+
+
+def get_firing_matrix(
+    recurring_expenses: list[RecurringExpense], days: list[dt.date]
+) -> np.ndarray:
+    """Which recurring expenses fire on each day, shape (recurring expenses, days).
+
+    A recurring expense only fires on the days between its start and end dates.
+    """
+    fires = CronBatch(
+        [
+            parse_cron(recurring_expense.schedule)
+            for recurring_expense in recurring_expenses
+        ]
+    ).fires_on_days(days)
+    ordinals = np.array([day.toordinal() for day in days])
+    starts = np.array([r.start_date.toordinal() for r in recurring_expenses])
+    ends = np.array(
+        [
+            r.end_date.toordinal() if r.end_date else dt.date.max.toordinal()
+            for r in recurring_expenses
+        ]
+    )
+    return (
+        fires & (starts[:, np.newaxis] <= ordinals) & (ordinals <= ends[:, np.newaxis])
+    )
+
+
+def get_projected_daily_amounts(
+    user: User, end_date: dt.date, currency: Currency
+) -> dict[tuple[dt.date, bool], Decimal]:
+    """Amortized amounts by (day, is_expense) of the expenses the recurring
+    expenses of a user will create from tomorrow to end_date.
+
+    Future rates are not known, amounts are converted at today's rate.
+    """
+    tomorrow = date_utils.today() + dt.timedelta(days=1)
+    daily_amounts = defaultdict(lambda: ZERO)
+    if end_date < tomorrow:
+        return daily_amounts
+    recurring_expenses = list(
+        RecurringExpense.objects.filter(user=user, start_date__lte=end_date)
+        .filter(Q(end_date__gte=tomorrow) | Q(end_date__isnull=True))
+        .select_related("currency")
+        .order_by("id")
+    )
+    days = date_utils.all_dates_in_range(tomorrow, end_date)
+    occurrences = [
+        (recurring_expense, days[i])
+        for recurring_expense, row in zip(
+            recurring_expenses, get_firing_matrix(recurring_expenses, days)
+        )
+        for i in np.flatnonzero(row)
+    ]
+    amounts = bulk_convert(
+        [
+            exchange_rate_manager.Money(
+                amount=recurring_expense.amount,
+                currency=recurring_expense.currency,
+                day=date_utils.today(),
+            )
+            for recurring_expense, _ in occurrences
+        ],
+        currency,
+    )
+    for (recurring_expense, day), money in zip(occurrences, amounts):
+        start, end = recurring_expense.calculate_amortization_dates(day)
+        num_days = (end - start).days + 1
+        daily_amount = (
+            money.amount or ZERO
+            if num_days == 1
+            else amortize_value(money.amount, num_days)
+        )
+        for amortization_day in date_utils.all_dates_in_range(
+            start, min(end, end_date)
+        ):
+            daily_amounts[(amortization_day, recurring_expense.is_expense)] += (
+                daily_amount
+            )
+    return daily_amounts
+
+
+def get_cached_projected_daily_amounts(
+    user: User, end_date: dt.date, currency: Currency
+) -> dict[tuple[dt.date, bool], Decimal]:
+    """get_projected_daily_amounts, cached for settings.FORECAST_CACHE_TIMEOUT
+    seconds or until a recurring expense of the user changes."""
+    return user_cache.get_or_compute(
+        user_cache.FORECAST,
+        user.id,
+        f"{date_utils.today()}:{end_date}:{currency.id}",
+        settings.FORECAST_CACHE_TIMEOUT,
+        lambda: dict(get_projected_daily_amounts(user, end_date, currency)),
+    )
+
+
+def invalidate_forecast(user_id: int) -> None:
+    user_cache.invalidate(user_cache.FORECAST, [user_id])
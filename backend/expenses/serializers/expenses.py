@@ -36,8 +36,29 @@ class ExpenseSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "Category is incoherent with expense type"
             )
+        self.validate_recurring_expense_date(attrs)
         return attrs
 
+    def validate_recurring_expense_date(self, attrs):
+        """An edited expense of a recurring expense cannot move to a day that
+        already has one (expense_recurring_date constraint)."""
+        if self.instance is None or self.instance.recurring_expense_id is None:
+            return
+        expense_date = attrs.get("expense_date", self.instance.expense_date)
+        if expense_date is None:
+            return
+        if (
+            Expense.objects.filter(
+                recurring_expense_id=self.instance.recurring_expense_id,
+                expense_date=expense_date,
+            )
+            .exclude(pk=self.instance.pk)
+            .exists()
+        ):
+            raise serializers.ValidationError(
+                "The recurring expense already has an expense on this date"
+            )
+
     def create(self, validated_data):
         validated_data["user"] = self.context["request"].user
         return super().create(validated_data)
@@ -0,0 +1,41 @@
+from rest_framework import serializers
+
+from expenses.managers.expense_import_manager import IMPORTERS
+from expenses.models import ImportJob
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    file = serializers.FileField(write_only=True)
+    mode = serializers.ChoiceField(choices=list(IMPORTERS), default="batch")
+
+    def create(self, validated_data):
+        file = validated_data.pop("file")
+        validated_data["user"] = self.context["request"].user
+        validated_data["content"] = file.read()
+        return super().create(validated_data)
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            "id",
+            "file",
+            "mode",
+            "status",
+            "processed_rows",
+            "created_rows",
+            "failed_rows",
+            "errors",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = [
+            "status",
+            "processed_rows",
+            "created_rows",
+            "failed_rows",
+            "errors",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
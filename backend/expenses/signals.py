@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from expenses import user_cache
+from expenses.authentication import invalidate_tokens
+from expenses.managers.exchange_rate_cache import rate_cache
+from expenses.models import (
+    DollarExchangeRate,
+    Expense,
+    ExpenseCategory,
+    RecurringExpense,
+    Trip,
+    User,
+    UserSettings,
+)
+from expenses.models.token import Token
+from expenses.recurring_forecast import invalidate_forecast
+from expenses.statistics_rollup import refresh_daily_amortizations
+
+
+@receiver(post_save, sender=DollarExchangeRate)
+def invalidate_saved_exchange_rate(sender, instance, created, **kwargs):
+    if created:
+        rate_cache.invalidate([(instance.currency_id, instance.date)])
+    else:
+        # The previous (currency, date) of an edited row is not known anymore
+        rate_cache.clear()
+
+
+@receiver(post_delete, sender=DollarExchangeRate)
+def invalidate_deleted_exchange_rate(sender, instance, **kwargs):
+    rate_cache.invalidate([(instance.currency_id, instance.date)])
+
+
+@receiver(post_save, sender=Expense)
+def refresh_expense_daily_amortizations(sender, instance, raw, **kwargs):
+    # Deleted expenses cascade to their DailyAmortization rows
+    if not raw:
+        refresh_daily_amortizations([instance])
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    invalidate_tokens([instance.token])
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user_tokens(sender, instance, created, raw, **kwargs):
+    # Cached tokens hold a copy of the user
+    if not created and not raw and settings.TOKEN_CACHE_TIMEOUT:
+        invalidate_tokens(
+            Token.objects.filter(user=instance).values_list("token", flat=True)
+        )
+
+
+@receiver(post_save, sender=RecurringExpense)
+@receiver(post_delete, sender=RecurringExpense)
+def invalidate_recurring_forecast(sender, instance, **kwargs):
+    invalidate_forecast(instance.user_id)
+
+
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+@receiver(post_save, sender=ExpenseCategory)
+@receiver(post_delete, sender=ExpenseCategory)
+@receiver(post_save, sender=Trip)
+@receiver(post_delete, sender=Trip)
+@receiver(post_save, sender=UserSettings)
+@receiver(post_delete, sender=UserSettings)
+def invalidate_user_statistics(sender, instance, **kwargs):
+    user_cache.invalidate(user_cache.STATISTICS, [instance.user_id])
@@ -0,0 +1,166 @@
+import datetime as dt
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.conf import settings
+from expenses.date_utils import all_dates_in_range
+from expenses.managers import exchange_rate_manager
+from expenses.models import Currency, Expense, User
+from expenses.statistics_rollup import (
+    get_daily_amortizations_in_range,
+    get_trip_totals_in_currency,
+    sum_in_currency,
+)
+from expenses.statistics_utils import ZERO, amortize_value, bulk_convert
+from expenses.views.expenses import ExpenseFilterSet
+
+__all__ = ["StatisticsBuckets", "TripBucket", "compute_statistics"]
+
+EXPENSE_FIELDS = [
+    "amount",
+    "currency",
+    "expense_date",
+    "amortization_start_date",
+    "amortization_end_date",
+    "category",
+    "trip",
+    "is_expense",
+]
+
+
+@dataclass
+class TripBucket:
+    total_amount: Decimal = ZERO
+    amount_in_dates: Decimal = ZERO
+    start_date: dt.date | None = None
+    end_date: dt.date | None = None
+
+
+@dataclass
+class StatisticsBuckets:
+    """Amounts of the expenses of a user in one currency.
+
+    categories: amortized in the range, by category id (expenses only).
+    trips: by trip id, None for the expenses without a trip (expenses only).
+    daily: amortized on each day of the range, by (day, is_expense).
+    """
+
+    categories: defaultdict[int, Decimal] = field(
+        default_factory=lambda: defaultdict(lambda: ZERO)
+    )
+    trips: defaultdict[int | None, TripBucket] = field(
+        default_factory=lambda: defaultdict(TripBucket)
+    )
+    daily: defaultdict[tuple[dt.date, bool], Decimal] = field(
+        default_factory=lambda: defaultdict(lambda: ZERO)
+    )
+
+
+def compute_statistics(
+    user: User,
+    start_date: dt.date,
+    end_date: dt.date,
+    currency: Currency,
+    with_trips: bool = True,
+) -> StatisticsBuckets:
+    """Every bucket of the statistics of a user, with the backend selected by
+    settings.STATISTICS_BACKEND.
+
+    Trip totals cover all the expenses of the user, not only the ones of the
+    range: without them (with_trips=False) only the range is read.
+    """
+    if settings.STATISTICS_BACKEND == "rollup":
+        return _compute_from_rollup(user, start_date, end_date, currency, with_trips)
+    expenses = Expense.objects.filter(user=user)
+    if not with_trips:
+        expenses = ExpenseFilterSet.filter_by_date_range(expenses, start_date, end_date)
+    return _compute_from_expenses(expenses, start_date, end_date, currency)
+
+
+def _compute_from_rollup(
+    user: User,
+    start_date: dt.date,
+    end_date: dt.date,
+    currency: Currency,
+    with_trips: bool,
+) -> StatisticsBuckets:
+    buckets = StatisticsBuckets()
+    amounts = sum_in_currency(
+        get_daily_amortizations_in_range(user, start_date, end_date),
+        ["day", "is_expense", "category", "trip"],
+        "amount",
+        currency,
+    )
+    for (day, is_expense, category_id, trip_id), amount in amounts.items():
+        buckets.daily[(day, is_expense)] += amount
+        if is_expense:
+            buckets.categories[category_id] += amount
+            if with_trips:
+                buckets.trips[trip_id].amount_in_dates += amount
+    if with_trips:
+        trip_totals = get_trip_totals_in_currency(
+            Expense.objects.filter(user=user, is_expense=True), currency
+        )
+        for trip_id, totals in trip_totals.items():
+            bucket = buckets.trips[trip_id]
+            bucket.total_amount = totals["total_amount"]
+            bucket.start_date = totals["start_date"]
+            bucket.end_date = totals["end_date"]
+    return buckets
+
+
+def _compute_from_expenses(
+    expenses, start_date: dt.date, end_date: dt.date, currency: Currency
+) -> StatisticsBuckets:
+    """One pass over the expenses, converted with a single bulk_convert at the
+    rate of their expense date. Only the days of the range are expanded."""
+    rows = list(expenses.order_by().values(*EXPENSE_FIELDS))
+    currencies = Currency.objects.in_bulk({row["currency"] for row in rows})
+    convertible = [
+        row
+        for row in rows
+        if row["amount"] is not None and row["currency"] in currencies
+    ]
+    converted = bulk_convert(
+        [
+            exchange_rate_manager.Money(
+                amount=row["amount"],
+                currency=currencies[row["currency"]],
+                day=row["expense_date"],
+            )
+            for row in convertible
+        ],
+        currency,
+    )
+    for row, money in zip(convertible, converted):
+        row["amount"] = money.amount
+
+    buckets = StatisticsBuckets()
+    for row in rows:
+        amount = row["amount"] if row["currency"] in currencies else None
+        amortization_start = row["amortization_start_date"]
+        amortization_end = row["amortization_end_date"]
+        if amortization_start is None or amortization_end is None:
+            continue
+        if row["is_expense"]:
+            trip = buckets.trips[row["trip"]]
+            if amount is not None:
+                trip.total_amount += amount
+            if trip.start_date is None or amortization_start < trip.start_date:
+                trip.start_date = amortization_start
+            if trip.end_date is None or trip.end_date < amortization_end:
+                trip.end_date = amortization_end
+        overlap_start = max(amortization_start, start_date)
+        overlap_end = min(amortization_end, end_date)
+        if not amount or overlap_end < overlap_start:
+            continue
+        num_days = (amortization_end - amortization_start).days + 1
+        daily_amount = amount if num_days == 1 else amortize_value(amount, num_days)
+        if row["is_expense"]:
+            amount_in_range = daily_amount * ((overlap_end - overlap_start).days + 1)
+            buckets.categories[row["category"]] += amount_in_range
+            buckets.trips[row["trip"]].amount_in_dates += amount_in_range
+        for day in all_dates_in_range(overlap_start, overlap_end):
+            buckets.daily[(day, row["is_expense"])] += daily_amount
+    return buckets
@@ -0,0 +1,140 @@
+import datetime as dt
+from collections import defaultdict
+from decimal import Decimal
+from typing import Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min, QuerySet, Sum
+from expenses.date_utils import all_dates_in_range
+from expenses.managers import exchange_rate_manager
+from expenses.models import Currency, DailyAmortization, Expense, User
+from expenses.statistics_utils import ZERO, amortize_value, bulk_convert
+
+BATCH_SIZE = 5_000
+
+
+def _field_value(expense: Expense, field_name: str):
+    # Values assigned before save (e.g. by the CSV import) are not normalized yet
+    return Expense._meta.get_field(field_name).to_python(getattr(expense, field_name))
+
+
+def get_daily_amortizations(expense: Expense) -> list[DailyAmortization]:
+    """Splits an expense into one row per amortized day, with the same rounding
+    as the statistics computed from the expenses."""
+    amount = _field_value(expense, "amount")
+    start_date = _field_value(expense, "amortization_start_date")
+    end_date = _field_value(expense, "amortization_end_date")
+    if amount is None or start_date is None or end_date is None:
+        return []
+    daily_amount = amortize_value(amount, (end_date - start_date).days + 1)
+    return [
+        DailyAmortization(
+            expense_id=expense.id,
+            user_id=expense.user_id,
+            day=day,
+            category_id=expense.category_id,
+            trip_id=expense.trip_id,
+            is_expense=expense.is_expense,
+            currency_id=expense.currency_id,
+            rate_date=_field_value(expense, "expense_date"),
+            amount=daily_amount,
+        )
+        for day in all_dates_in_range(start_date, end_date)
+    ]
+
+
+def is_rollup_enabled() -> bool:
+    """The rows are only maintained when the statistics read them."""
+    return settings.STATISTICS_BACKEND == "rollup"
+
+
+def refresh_daily_amortizations(expenses: Iterable[Expense]) -> None:
+    """Replaces the rows of the given (saved) expenses, when the rollup backend
+    is enabled."""
+    if not is_rollup_enabled():
+        return
+    expenses = list(expenses)
+    with transaction.atomic():
+        DailyAmortization.objects.filter(
+            expense_id__in=[expense.id for expense in expenses]
+        ).delete()
+        DailyAmortization.objects.bulk_create(
+            (row for expense in expenses for row in get_daily_amortizations(expense)),
+            batch_size=BATCH_SIZE,
+        )
+
+
+def rebuild_daily_amortizations(user: User | None = None) -> int:
+    """Rebuilds the rows of every expense (of a user), returns the rows count."""
+    expenses = Expense.objects.all() if user is None else user.expenses.all()
+    with transaction.atomic():
+        rows = DailyAmortization.objects.all()
+        if user is not None:
+            rows = rows.filter(user=user)
+        rows.delete()
+        batch = []
+        count = 0
+        for expense in expenses.iterator(chunk_size=BATCH_SIZE):
+            batch.extend(get_daily_amortizations(expense))
+            if len(batch) >= BATCH_SIZE:
+                count += len(DailyAmortization.objects.bulk_create(batch))
+                batch = []
+        count += len(DailyAmortization.objects.bulk_create(batch))
+    return count
+
+
+def get_daily_amortizations_in_range(
+    user: User, start_date: dt.date, end_date: dt.date
+) -> QuerySet[DailyAmortization]:
+    return DailyAmortization.objects.filter(
+        user=user, day__gte=start_date, day__lte=end_date
+    )
+
+
+def sum_in_currency(
+    queryset: QuerySet, group_by: list[str], amount_field: str, currency: Currency
+) -> dict[tuple, Decimal]:
+    """Sums `amount_field` grouped by `group_by` in one query, then converts each
+    group at the rate of its expense date. Keys are tuples of the group_by values."""
+    date_field = "rate_date" if queryset.model is DailyAmortization else "expense_date"
+    groups = list(
+        queryset.filter(**{f"{amount_field}__isnull": False})
+        .order_by()
+        .values_list(*group_by, "currency", date_field)
+        .annotate(total=Sum(amount_field))
+    )
+    currencies = Currency.objects.in_bulk({group[-3] for group in groups})
+    money = [
+        exchange_rate_manager.Money(
+            amount=group[-1], currency=currencies.get(group[-3]), day=group[-2]
+        )
+        for group in groups
+    ]
+    result = defaultdict(lambda: ZERO)
+    for group, converted in zip(groups, bulk_convert(money, currency)):
+        result[group[: len(group_by)]] += converted.amount.quantize(ZERO)
+    return result
+
+
+def get_trip_totals_in_currency(
+    expenses: QuerySet[Expense], currency: Currency
+) -> dict[int | None, dict]:
+    """Total amount and amortization bounds of the expenses of each trip."""
+    totals = sum_in_currency(expenses, ["trip"], "amount", currency)
+    bounds = (
+        expenses.order_by()
+        .values("trip")
+        .annotate(
+            start_date=Min("amortization_start_date"),
+            end_date=Max("amortization_end_date"),
+        )
+    )
+    return {
+        row["trip"]: {
+            "total_amount": totals[(row["trip"],)],
+            "start_date": row["start_date"],
+            "end_date": row["end_date"],
+        }
+        for row in bounds
+    }
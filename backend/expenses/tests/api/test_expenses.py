@@ -1,14 +1,30 @@
+import csv
 import datetime as dt
+import io
+import json
 from decimal import Decimal
+from unittest.mock import patch
 
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from expenses import date_utils
-from expenses.models import Expense
+from expenses.managers.exchange_rate_manager import ExchangeRateApiError
+from expenses.models import Expense, ExpenseCategory
 from expenses.tests.api.api_test_case import ApiTestCase
 from expenses.tests.factories.category_factories import (
     ExpenseCategoryFactory,
     IncomeCategoryFactory,
 )
+from expenses.tests.factories.currency_factories import CurrencyFactory
+from expenses.tests.factories.dollar_exchange_rate_factories import (
+    DollarExchangeRateFactory,
+)
 from expenses.tests.factories.expense_factories import ExpenseFactory
+from expenses.tests.factories.recurring_expense_factories import (
+    RecurringExpenseFactory,
+)
 from expenses.tests.factories.trip_factories import TripFactory
 from expenses.tests.factories.user_factories import UserFactory
 from rest_framework import status
@@ -78,6 +94,41 @@ class TestExpense(ApiTestCase):
                     getattr(expense, key), body[key], msg=f"{key} != {body[key]}"
                 )
 
+    def test_update_expense_to_a_taken_recurring_expense_date(self):
+        recurring_expense = RecurringExpenseFactory(
+            user=self.user, category=self.category
+        )
+        yesterday = self.today - dt.timedelta(days=1)
+        expenses = [
+            ExpenseFactory(
+                user=self.user,
+                category=self.category,
+                recurring_expense=recurring_expense,
+                expense_date=day,
+            )
+            for day in [yesterday, self.today]
+        ]
+        body = {
+            "expense_date": self.today,
+            "description": "test description",
+            "amount": Decimal("200"),
+            "amortization_start_date": self.today,
+            "amortization_end_date": self.today,
+            "category": self.category.id,
+            "trip": None,
+            "is_expense": True,
+        }
+
+        res = self.client.put(self.details_url(expenses[0].id), body, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        expenses[0].refresh_from_db()
+        self.assertEqual(expenses[0].expense_date, yesterday)
+
+        # Its own date is not a conflict
+        res = self.client.put(self.details_url(expenses[1].id), body, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
     def test_delete_expense(self):
         expense = ExpenseFactory(user=self.user, category=self.category)
         res = self.client.delete(self.details_url(expense.id))
@@ -1013,3 +1064,389 @@ class TestExpense(ApiTestCase):
 
         # Verify all matching expenses are accounted for
         self.assertEqual(first_page_ids | second_page_ids, matching_ids)
+
+    def _get_all_cursor_pages(self, params):
+        """Follows the next links of the cursor pagination, returns the ids"""
+        res = self.client.get(self.list_url, {"pagination": "cursor", **params})
+        pages = []
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            res_data = res.json()
+            self.assertNotIn("count", res_data)
+            pages.append([r["id"] for r in res_data["results"]])
+            if not res_data["next"]:
+                return pages
+            res = self.client.get(res_data["next"])
+
+    def test_list_expenses_cursor_pagination(self):
+        # Several expenses on the same day, so pages break ties by id
+        expenses = [
+            ExpenseFactory(
+                user=self.user,
+                category=self.category,
+                expense_date=self.today - dt.timedelta(days=i // 3),
+            )
+            for i in range(12)
+        ]
+        expected = [
+            e.id for e in sorted(expenses, key=lambda e: (e.expense_date, e.id))
+        ][::-1]
+
+        pages = self._get_all_cursor_pages({})
+
+        self.assertEqual([len(page) for page in pages], [5, 5, 2])
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_list_expenses_cursor_pagination_ordering(self):
+        expenses = [
+            ExpenseFactory(
+                user=self.user,
+                category=self.category,
+                amortization_start_date=self.today - dt.timedelta(days=i % 4),
+            )
+            for i in range(7)
+        ]
+        # Nulls come last in ascending order
+        expenses.append(
+            ExpenseFactory(
+                user=self.user, category=self.category, amortization_start_date=None
+            )
+        )
+        expected = [
+            e.id
+            for e in sorted(
+                expenses,
+                key=lambda e: (
+                    e.amortization_start_date is None,
+                    e.amortization_start_date or self.today,
+                    e.id,
+                ),
+            )
+        ]
+
+        pages = self._get_all_cursor_pages({"ordering": "amortization_start_date"})
+        self.assertEqual(sum(pages, []), expected)
+
+        pages = self._get_all_cursor_pages({"ordering": "-amortization_start_date"})
+        self.assertEqual(sum(pages, []), expected[::-1])
+
+    def test_list_expenses_cursor_pagination_with_filters(self):
+        other_category = ExpenseCategoryFactory(user=self.user)
+        expenses = [
+            ExpenseFactory(user=self.user, category=self.category) for _ in range(6)
+        ]
+        [ExpenseFactory(user=self.user, category=other_category) for _ in range(3)]
+
+        pages = self._get_all_cursor_pages({"category": self.category.id})
+
+        self.assertEqual(set(sum(pages, [])), {e.id for e in expenses})
+
+    def test_list_expenses_cursor_pagination_query_count(self):
+        [ExpenseFactory(user=self.user, category=self.category) for _ in range(12)]
+        res = self.client.get(self.list_url, {"pagination": "cursor"})
+        next_url = self.client.get(res.json()["next"]).json()["next"]
+
+        # Authentication and the page itself, without any count
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(next_url)
+        self.assertEqual(len(res.json()["results"]), 2)
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in queries.captured_queries)
+        )
+        self.assertNotIn("OFFSET", queries.captured_queries[-1]["sql"])
+
+    def test_list_expenses_cursor_pagination_invalid_cursor(self):
+        res = self.client.get(
+            self.list_url, {"pagination": "cursor", "cursor": "invalid"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        ExpenseFactory.create_batch(6, user=self.user, category=self.category)
+        next_url = self.client.get(self.list_url, {"pagination": "cursor"}).json()[
+            "next"
+        ]
+        # A cursor of another ordering
+        res = self.client.get(next_url + "&ordering=amortization_end_date")
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestExpenseCsvImport(ApiTestCase):
+    mode = "batch"
+    header = (
+        "typology,category,trip,expense_date,description,amount,"
+        "amortization_start_date,amortization_end_date\n"
+    )
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.url = reverse("expenses:expenses-load-from-csv")
+        self.login(self.user.email)
+
+    def upload(self, rows: list[str]):
+        file = SimpleUploadedFile(
+            "expenses.csv", (self.header + "\n".join(rows)).encode("utf-8")
+        )
+        return self.client.post(
+            self.url, {"file": file, "mode": self.mode}, format="multipart"
+        )
+
+    @override_settings(STATISTICS_BACKEND="rollup")
+    def test_import_creates_expenses_categories_and_trips(self):
+        category = ExpenseCategoryFactory(user=self.user, code="food")
+        trip = TripFactory(user=self.user, code="paris")
+        res = self.upload(
+            [
+                'expense,food,paris,01/02/2024,Dinner,"1.234,50 €",01/02/2024,02/02/2024',
+                "expense,food,,2024-02-03,Lunch,12,2024-02-03,2024-02-03",
+                "income,salary,rome,2024-02-01,Salary,2000,2024-02-01,2024-02-29",
+            ]
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, {"created": 3, "errors": []})
+        dinner, lunch, salary = Expense.objects.filter(user=self.user).order_by("id")
+        self.assertEqual(dinner.category, category)
+        self.assertEqual(dinner.trip, trip)
+        self.assertEqual(dinner.amount, Decimal("1234.50"))
+        self.assertEqual(dinner.expense_date, dt.date(2024, 2, 1))
+        self.assertEqual(dinner.amortization_end_date, dt.date(2024, 2, 2))
+        self.assertIsNone(lunch.trip)
+        self.assertFalse(salary.is_expense)
+        self.assertEqual(salary.category.code, "salary")
+        self.assertFalse(salary.category.for_expense)
+        self.assertEqual(salary.trip.code, "rome")
+        self.assertEqual(salary.daily_amortizations.count(), 29)
+
+    def test_import_reports_invalid_rows(self):
+        res = self.upload(
+            [
+                "expense,food,,2024-02-03,Lunch,12,2024-02-03,2024-02-03",
+                "expense,food,,2024-02-30,Lunch,12,2024-02-03,2024-02-03",
+                "expense,food,,2024-02-03,Lunch,abc,2024-02-03,2024-02-03",
+                "expense,food,,2024-02-03,Lunch,12,2024-02-05,2024-02-03",
+            ]
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["created"], 1)
+        self.assertEqual([error["row"] for error in res.data["errors"]], [2, 3, 4])
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 1)
+
+    def test_import_reports_overlong_category(self):
+        category = "c" * 129
+        res = self.upload(
+            [
+                "expense,food,,2024-02-03,Lunch,12,2024-02-03,2024-02-03",
+                f"expense,{category},,2024-02-03,Lunch,12,2024-02-03,2024-02-03",
+                "expense,food,,2024-02-04,Dinner,20,2024-02-04,2024-02-04",
+            ]
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["created"], 2)
+        self.assertEqual([error["row"] for error in res.data["errors"]], [2])
+        self.assertFalse(ExpenseCategory.objects.filter(code=category).exists())
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 2)
+
+    def test_import_reports_overlong_trip(self):
+        trip = "t" * 129
+        res = self.upload(
+            [
+                f"expense,food,{trip},2024-02-03,Lunch,12,2024-02-03,2024-02-03",
+                "expense,food,paris,2024-02-04,Dinner,20,2024-02-04,2024-02-04",
+            ]
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["created"], 1)
+        self.assertEqual([error["row"] for error in res.data["errors"]], [1])
+        self.assertEqual(
+            list(Expense.objects.filter(user=self.user).values_list("trip__code")),
+            [("paris",)],
+        )
+
+    def test_import_amounts_and_currencies_of_exports(self):
+        CurrencyFactory(code="EUR")
+        self.header = self.header.replace("\n", ",currency\n")
+        res = self.upload(
+            [
+                "expense,food,,2024-02-03,Lunch,1234.50,2024-02-03,2024-02-03,EUR",
+                'expense,food,,2024-02-03,Dinner,"1.234",2024-02-03,2024-02-03,',
+                "expense,food,,2024-02-03,Snack,3.00,2024-02-03,2024-02-03,XYZ",
+            ]
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([error["row"] for error in res.data["errors"]], [3])
+        self.assertEqual(
+            set(
+                Expense.objects.filter(user=self.user).values_list(
+                    "description", "amount", "currency__code"
+                )
+            ),
+            {("Lunch", Decimal("1234.50"), "EUR"), ("Dinner", Decimal("1234"), None)},
+        )
+
+    def test_import_without_valid_rows(self):
+        res = self.upload(["expense,food,,2024-02-03,Lunch,abc,2024-02-03,2024-02-03"])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["created"], 0)
+
+    @override_settings(STATISTICS_BACKEND="rollup")
+    def test_import_query_count_does_not_depend_on_rows(self):
+        rows = [
+            f"expense,cat{i % 5},trip{i % 3},2024-02-03,Row {i},12,2024-02-03,2024-02-04"
+            for i in range(200)
+        ]
+        # Authentication (1), currencies (1), categories (3), trips (3), expenses
+        # (1), daily amortizations (2), statistics cache (1) and savepoints (4)
+        with self.assertNumQueries(16):
+            res = self.upload(rows)
+
+        self.assertEqual(res.data["created"], 200)
+
+    def test_import_with_unknown_mode(self):
+        self.mode = "unknown"
+        res = self.upload(["expense,food,,2024-02-03,Lunch,12,2024-02-03,2024-02-03"])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Expense.objects.exists())
+
+
+class TestExpenseCsvImportWithCopy(TestExpenseCsvImport):
+    mode = "copy"
+
+    def test_import_query_count_does_not_depend_on_rows(self):
+        rows = [
+            f"expense,cat{i % 5},trip{i % 3},2024-02-03,Row {i},12,2024-02-03,2024-02-04"
+            for i in range(200)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            res = self.upload(rows)
+
+        self.assertEqual(res.data["created"], 200)
+        self.assertLess(len(queries), 25)
+
+
+class TestExpenseExport(ApiTestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.url = reverse("expenses:expenses-export")
+        self.eur = CurrencyFactory(code="EUR")
+        self.usd = CurrencyFactory(code="USD")
+        self.category = ExpenseCategoryFactory(user=self.user, code="food")
+        self.trip = TripFactory(user=self.user, code="paris")
+        self.day = dt.date(2024, 2, 1)
+        self.dinner = ExpenseFactory(
+            user=self.user,
+            category=self.category,
+            trip=self.trip,
+            currency=self.eur,
+            expense_date=self.day,
+            description="Dinner",
+            amount=Decimal("10.00"),
+            amortization_start_date=self.day,
+            amortization_end_date=self.day,
+        )
+        self.lunch = ExpenseFactory(
+            user=self.user,
+            category=self.category,
+            currency=self.usd,
+            expense_date=self.day + dt.timedelta(days=10),
+            description="Lunch",
+            amount=Decimal("5.00"),
+            amortization_start_date=self.day + dt.timedelta(days=10),
+            amortization_end_date=self.day + dt.timedelta(days=10),
+        )
+        ExpenseFactory(user=UserFactory(), category=self.category)
+        self.login(self.user.email)
+
+    def export(self, **params):
+        res = self.client.get(self.url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, b"".join(res.streaming_content).decode("utf-8")
+
+    def test_export_csv(self):
+        res, content = self.export()
+
+        self.assertEqual(res["Content-Type"], "text/csv")
+        self.assertIn('filename="expenses.csv"', res["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(
+            [(r["description"], r["amount"], r["currency"]) for r in rows],
+            [("Lunch", "5.00", "USD"), ("Dinner", "10.00", "EUR")],
+        )
+        self.assertEqual(rows[1]["trip"], "paris")
+        self.assertEqual(rows[1]["expense_date"], "2024-02-01")
+
+    def test_exported_csv_can_be_imported(self):
+        _, content = self.export()
+
+        for mode in ["batch", "copy"]:
+            with self.subTest(mode=mode):
+                other_user = UserFactory()
+                self.login(other_user.email)
+                file = SimpleUploadedFile("expenses.csv", content.encode("utf-8"))
+                res = self.client.post(
+                    reverse("expenses:expenses-load-from-csv"),
+                    {"file": file, "mode": mode},
+                    format="multipart",
+                )
+
+                self.assertEqual(res.data, {"created": 2, "errors": []})
+                self.assertEqual(
+                    set(
+                        Expense.objects.filter(user=other_user).values_list(
+                            "description", "amount", "currency__code", "trip__code"
+                        )
+                    ),
+                    {
+                        ("Lunch", Decimal("5.00"), "USD", None),
+                        ("Dinner", Decimal("10.00"), "EUR", "paris"),
+                    },
+                )
+
+    def test_export_ndjson(self):
+        res, content = self.export(export_format="ndjson")
+
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([r["description"] for r in rows], ["Lunch", "Dinner"])
+        self.assertEqual(rows[1]["amount"], "10.00")
+
+    def test_export_honors_filters(self):
+        _, content = self.export(
+            export_format="ndjson", trip=self.trip.id, end_date=self.day
+        )
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([r["description"] for r in rows], ["Dinner"])
+
+    def test_export_in_currency(self):
+        DollarExchangeRateFactory(currency=self.eur, date=self.day, rate=Decimal("0.8"))
+        DollarExchangeRateFactory(currency=self.usd, date=self.day, rate=Decimal("1"))
+
+        _, content = self.export(export_format="ndjson", currency=self.usd.id)
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            [(r["amount"], r["currency"]) for r in rows],
+            [("5.00", "USD"), ("12.50", "USD")],
+        )
+
+    def test_export_with_invalid_parameters(self):
+        for params in [{"export_format": "xml"}, {"currency": 0}]:
+            with self.subTest(params=params):
+                res = self.client.get(self.url, params)
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch(
+        "expenses.managers.exchange_rate_manager.get_exchange_rate_from_api",
+        side_effect=ExchangeRateApiError("API down"),
+    )
+    def test_export_without_exchange_rates(self, get_exchange_rate_from_api):
+        res = self.client.get(self.url, {"currency": self.usd.id})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data, {"error": "Tasso di cambio non disponibile"})
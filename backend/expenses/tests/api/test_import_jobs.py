@@ -0,0 +1,191 @@
+import datetime as dt
+import io
+import threading
+from unittest.mock import Mock, patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError
+from expenses import date_utils
+from expenses.constants import IMPORT_JOB_TIMEOUT
+from expenses.management.commands import process_import_jobs
+from expenses.managers import expense_import_manager, import_job_manager
+from expenses.models import Expense, ImportJob
+from expenses.tests.api.api_test_case import ApiTestCase
+from expenses.tests.factories.user_factories import UserFactory
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+CSV = (
+    "typology,category,trip,expense_date,description,amount,"
+    "amortization_start_date,amortization_end_date\n"
+    "expense,food,,2024-02-03,Lunch,12,2024-02-03,2024-02-03\n"
+    "expense,food,,2024-02-03,Dinner,abc,2024-02-03,2024-02-03\n"
+    "expense,food,paris,2024-02-04,Museum,20,2024-02-04,2024-02-04\n"
+)
+
+
+class TestImportJobs(ApiTestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.list_url = reverse("expenses:import-jobs-list")
+        self.login(self.user.email)
+        # It closes connections outside of autocommit, like the one of the test
+        # transaction. The test client skips it the same way for requests
+        patcher = patch.object(process_import_jobs, "close_old_connections")
+        self.close_old_connections = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def details_url(self, id: int) -> str:
+        return reverse("expenses:import-jobs-detail", args=[id])
+
+    def upload(self, content: str = CSV, mode: str = "batch"):
+        file = SimpleUploadedFile("expenses.csv", content.encode("utf-8"))
+        return self.client.post(
+            self.list_url, {"file": file, "mode": mode}, format="multipart"
+        )
+
+    def test_upload_queues_the_import(self):
+        res = self.upload()
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["status"], ImportJob.PENDING)
+        self.assertNotIn("file", res.data)
+        self.assertFalse(Expense.objects.exists())
+
+    def test_worker_runs_the_import(self):
+        for mode in ["batch", "copy"]:
+            with self.subTest(mode=mode):
+                job_id = self.upload(mode=mode).data["id"]
+
+                call_command("process_import_jobs", "--once")
+
+                res = self.client.get(self.details_url(job_id))
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(
+                    res.data["status"], ImportJob.COMPLETED, res.data["errors"]
+                )
+                self.assertEqual(res.data["processed_rows"], 3)
+                self.assertEqual(res.data["created_rows"], 2)
+                self.assertEqual(res.data["failed_rows"], 1)
+                self.assertEqual([e["row"] for e in res.data["errors"]], [2])
+                self.assertIsNotNone(res.data["finished_at"])
+                self.assertEqual(bytes(ImportJob.objects.get(pk=job_id).content), b"")
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 4)
+
+    def test_progress_is_reported_while_parsing(self):
+        progress = []
+        result = expense_import_manager.ImportResult()
+
+        with patch.object(expense_import_manager, "PROGRESS_INTERVAL", 2):
+            parsed = list(
+                expense_import_manager.parse_csv(
+                    CSV.splitlines(keepends=True), result, progress.append
+                )
+            )
+
+        self.assertEqual(len(parsed), 2)
+        self.assertEqual(progress, [2, 3])
+
+    def test_failed_import(self):
+        job_id = self.upload().data["id"]
+
+        importer = Mock(side_effect=RuntimeError("boom"))
+        with patch.dict(expense_import_manager.IMPORTERS, {"batch": importer}):
+            call_command("process_import_jobs", "--once")
+
+        job = ImportJob.objects.get(pk=job_id)
+        self.assertEqual(job.status, ImportJob.FAILED)
+        self.assertEqual(job.errors, [{"row": None, "error": "boom"}])
+
+    def test_job_failing_outside_of_the_import(self):
+        failing_id = self.upload().data["id"]
+        next_id = self.upload().data["id"]
+        run_job = import_job_manager.run_job
+
+        def fail_first_job(job):
+            if job.pk == failing_id:
+                raise RuntimeError("boom")
+            run_job(job)
+
+        with (
+            patch.object(import_job_manager, "run_job", side_effect=fail_first_job),
+            self.assertLogs(import_job_manager.logger, "ERROR"),
+        ):
+            call_command("process_import_jobs", "--once")
+
+        failing, next_job = ImportJob.objects.filter(
+            pk__in=[failing_id, next_id]
+        ).order_by("id")
+        self.assertEqual(failing.status, ImportJob.FAILED)
+        self.assertEqual(failing.errors, [{"row": None, "error": "boom"}])
+        self.assertIsNotNone(failing.finished_at)
+        self.assertEqual(next_job.status, ImportJob.COMPLETED)
+
+    def test_worker_survives_database_errors(self):
+        stderr = io.StringIO()
+        with patch.object(
+            process_import_jobs,
+            "process_pending_jobs",
+            side_effect=OperationalError("connection closed"),
+        ):
+            call_command("process_import_jobs", "--once", stderr=stderr)
+
+        self.assertIn("connection closed", stderr.getvalue())
+        self.close_old_connections.assert_called_once_with()
+
+    def test_abandoned_jobs_are_run_again(self):
+        job_id = self.upload().data["id"]
+        job = import_job_manager.claim_next_job()
+        self.assertEqual(job.id, job_id)
+        # The worker running it crashes
+        self.assertIsNone(import_job_manager.claim_next_job())
+
+        ImportJob.objects.filter(pk=job_id).update(
+            heartbeat_at=date_utils.now() - IMPORT_JOB_TIMEOUT - dt.timedelta(minutes=1)
+        )
+        call_command("process_import_jobs", "--once")
+
+        job = ImportJob.objects.get(pk=job_id)
+        self.assertEqual(job.status, ImportJob.COMPLETED)
+        self.assertEqual(job.created_rows, 2)
+
+    def test_running_jobs_with_a_heartbeat_are_not_claimed_again(self):
+        job_id = self.upload().data["id"]
+        import_job_manager.claim_next_job()
+        # Running for long, still alive
+        ImportJob.objects.filter(pk=job_id).update(
+            started_at=date_utils.now() - dt.timedelta(hours=2)
+        )
+
+        self.assertIsNone(import_job_manager.claim_next_job())
+
+    @patch.object(import_job_manager, "IMPORT_JOB_HEARTBEAT_INTERVAL", dt.timedelta(0))
+    def test_heartbeat_is_refreshed_while_the_job_runs(self):
+        job = ImportJob.objects.create(user=self.user, status=ImportJob.RUNNING)
+        beats = threading.Event()
+
+        def update(**kwargs):
+            beats.set()
+
+        with patch.object(ImportJob.objects, "filter") as filter:
+            filter.return_value.update.side_effect = update
+            with import_job_manager.heartbeat(job):
+                self.assertTrue(beats.wait(5))
+
+        filter.assert_called_with(pk=job.pk, status=ImportJob.RUNNING)
+
+    def test_unknown_mode(self):
+        res = self.upload(mode="unknown")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ImportJob.objects.exists())
+
+    def test_jobs_of_other_users_are_not_visible(self):
+        job_id = self.upload().data["id"]
+        other_user = UserFactory()
+        self.login(other_user.email)
+
+        res = self.client.get(self.details_url(job_id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
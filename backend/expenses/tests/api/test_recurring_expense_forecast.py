@@ -0,0 +1,151 @@
+import datetime as dt
+from decimal import Decimal
+from unittest.mock import patch
+
+from expenses.user_cache import cache
+from django.test import override_settings
+from expenses import date_utils, recurring_forecast
+from expenses.tests.api.api_test_case import ApiTestCase
+from expenses.tests.factories.category_factories import ExpenseCategoryFactory
+from expenses.tests.factories.currency_factories import CurrencyFactory
+from expenses.tests.factories.dollar_exchange_rate_factories import (
+    DollarExchangeRateFactory,
+)
+from expenses.tests.factories.expense_factories import ExpenseFactory
+from expenses.tests.factories.recurring_expense_factories import (
+    RecurringExpenseFactory,
+)
+from expenses.tests.factories.user_factories import UserFactory
+from expenses.tests.factories.user_settings_factories import UserSettingsFactory
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+
+class TestRecurringExpenseForecast(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        cls.usd = CurrencyFactory(code="USD")
+        cls.eur = CurrencyFactory(code="EUR")
+        UserSettingsFactory(user=cls.user, preferred_currency=cls.usd)
+        cls.category = ExpenseCategoryFactory(user=cls.user)
+        cls.today = date_utils.today()
+        cls.tomorrow = cls.today + dt.timedelta(days=1)
+
+    def setUp(self):
+        cache.clear()
+        self.login(self.user.email)
+
+    def forecast(self, start_date, end_date, **params):
+        res = self.client.get(
+            reverse("expenses:recurring-expenses-forecast"),
+            {"start_date": start_date, "end_date": end_date, **params},
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def create_recurring_expense(self, **kwargs):
+        return RecurringExpenseFactory(
+            **{
+                "user": self.user,
+                "category": self.category,
+                "currency": self.usd,
+                "start_date": self.today,
+                "schedule": "0 0 * * *",
+                "amount": Decimal("10.00"),
+                **kwargs,
+            }
+        )
+
+    def test_forecast_adds_future_occurrences_to_the_timeline(self):
+        self.create_recurring_expense()
+        self.create_recurring_expense(
+            is_expense=False, amount=Decimal("30.00"), amortization_duration=3
+        )
+        ExpenseFactory(
+            user=self.user,
+            category=self.category,
+            currency=self.usd,
+            amount=Decimal("5.00"),
+            expense_date=self.today,
+            amortization_start_date=self.today,
+            amortization_end_date=self.today,
+        )
+
+        timeline = self.forecast(self.today, self.today + dt.timedelta(days=2))
+
+        self.assertEqual(
+            [
+                (row["expense_amount"], row["non_expense_amount"], row["difference"])
+                for row in timeline
+            ],
+            [
+                # Today's occurrence is left to create_recurring_expenses
+                ("5.00", "0.00", "-5.00"),
+                ("15.00", "10.00", "-5.00"),
+                ("25.00", "30.00", "5.00"),
+            ],
+        )
+
+    def test_forecast_honors_rule_dates(self):
+        self.create_recurring_expense(start_date=self.today + dt.timedelta(days=2))
+        self.create_recurring_expense(end_date=self.tomorrow)
+        # First day of the month after next, outside of the window
+        self.create_recurring_expense(
+            schedule=f"0 0 1 {(self.today.month + 1) % 12 + 1} *"
+        )
+        RecurringExpenseFactory(start_date=self.today)
+
+        timeline = self.forecast(self.tomorrow, self.today + dt.timedelta(days=3))
+
+        self.assertEqual(
+            [row["expense_amount"] for row in timeline], ["10.00", "20.00", "30.00"]
+        )
+
+    def test_forecast_converts_at_today_rate(self):
+        DollarExchangeRateFactory(currency=self.eur, date=self.today, rate=2)
+        self.create_recurring_expense(currency=self.eur)
+
+        timeline = self.forecast(self.tomorrow, self.tomorrow)
+
+        self.assertEqual(timeline[0]["expense_amount"], "5.00")
+
+    def test_forecast_in_the_past(self):
+        self.create_recurring_expense(start_date=self.today - dt.timedelta(days=10))
+
+        timeline = self.forecast(
+            self.today - dt.timedelta(days=5), self.today - dt.timedelta(days=1)
+        )
+
+        self.assertEqual({row["expense_amount"] for row in timeline}, {"0.00"})
+
+    @override_settings(FORECAST_CACHE_TIMEOUT=60)
+    def test_forecast_is_cached_until_a_rule_changes(self):
+        recurring_expense = self.create_recurring_expense()
+        end_date = self.today + dt.timedelta(days=2)
+        projected = recurring_forecast.get_projected_daily_amounts
+
+        with patch.object(
+            recurring_forecast, "get_projected_daily_amounts", side_effect=projected
+        ) as get_projected:
+            self.assertEqual(
+                self.forecast(self.today, end_date)[-1]["expense_amount"], "20.00"
+            )
+            self.assertEqual(
+                self.forecast(self.today, end_date)[-1]["expense_amount"], "20.00"
+            )
+            self.assertEqual(get_projected.call_count, 1)
+
+            recurring_expense.amount = Decimal("20.00")
+            recurring_expense.save()
+            self.assertEqual(
+                self.forecast(self.today, end_date)[-1]["expense_amount"], "40.00"
+            )
+            self.assertEqual(get_projected.call_count, 2)
+
+    def test_forecast_with_invalid_dates(self):
+        res = self.client.get(
+            reverse("expenses:recurring-expenses-forecast"),
+            {"start_date": self.tomorrow, "end_date": self.today},
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
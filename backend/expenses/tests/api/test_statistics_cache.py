@@ -0,0 +1,139 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import override_settings
+from expenses import date_utils, user_cache
+from expenses.managers.expense_import_manager import import_expenses_from_csv
+from expenses.tests.api.api_test_case import ApiTestCase
+from expenses.tests.factories.category_factories import CategoryFactory
+from expenses.tests.factories.currency_factories import CurrencyFactory
+from expenses.tests.factories.expense_factories import ExpenseFactory
+from expenses.tests.factories.trip_factories import TripFactory
+from expenses.tests.factories.user_factories import UserFactory
+from expenses.tests.factories.user_settings_factories import UserSettingsFactory
+from expenses.views import statistics
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+
+@override_settings(STATISTICS_CACHE_TIMEOUT=60)
+class StatisticsCacheTestCase(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        cls.currency = CurrencyFactory(code="USD")
+        cls.user_settings = UserSettingsFactory(
+            user=cls.user, preferred_currency=cls.currency
+        )
+        cls.category = CategoryFactory(user=cls.user, for_expense=True, code="food")
+        cls.today = date_utils.today()
+        cls.expense = cls.create_expense(cls.user, cls.category)
+
+    @classmethod
+    def create_expense(cls, user, category):
+        return ExpenseFactory(
+            user=user,
+            expense_date=cls.today,
+            amount=100,
+            currency=cls.currency,
+            category=category,
+            amortization_start_date=cls.today,
+            amortization_end_date=cls.today,
+        )
+
+    def setUp(self):
+        user_cache.cache.clear()
+        self.login(email=self.user.email)
+        patcher = patch.object(
+            statistics,
+            "compute_statistics",
+            side_effect=statistics.compute_statistics,
+        )
+        self.compute_statistics = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, action="summary", **params):
+        res = self.client.get(
+            reverse(f"expenses:statistics-{action}"),
+            {"start_date": self.today, "end_date": self.today, **params},
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def assert_recomputed(self, change):
+        self.get()
+        self.get()
+        self.assertEqual(self.compute_statistics.call_count, 1)
+
+        change()
+
+        self.get()
+        self.assertEqual(self.compute_statistics.call_count, 2)
+
+    def test_repeated_requests_are_served_from_the_cache(self):
+        first = self.get()
+        self.assertEqual(self.get(), first)
+        self.get("trips")
+        self.get(end_date=self.today + timedelta(days=1))
+
+        # Each action and range is computed once
+        self.assertEqual(self.compute_statistics.call_count, 3)
+        self.assertEqual(first["expense_categories"][0]["amount"], "100.00")
+
+    def test_expense_changes_invalidate_the_cache(self):
+        def change():
+            self.expense.amount = 50
+            self.expense.save()
+
+        self.assert_recomputed(change)
+        summary = self.get()
+        self.assertEqual(summary["expense_categories"][0]["amount"], "50.00")
+
+    def test_deleted_expense_invalidates_the_cache(self):
+        self.assert_recomputed(
+            lambda: self.create_expense(self.user, self.category).delete()
+        )
+
+    def test_category_changes_invalidate_the_cache(self):
+        self.assert_recomputed(
+            lambda: CategoryFactory(user=self.user, for_expense=True, code="travel")
+        )
+
+    def test_trip_changes_invalidate_the_cache(self):
+        self.assert_recomputed(lambda: TripFactory(user=self.user, code="paris"))
+
+    def test_settings_changes_invalidate_the_cache(self):
+        self.assert_recomputed(self.user_settings.save)
+
+    def test_imported_expenses_invalidate_the_cache(self):
+        csv = (
+            "typology,category,trip,expense_date,description,amount,"
+            "amortization_start_date,amortization_end_date\n"
+            f"expense,food,,{self.today},Lunch,12,{self.today},{self.today}\n"
+        )
+        self.assert_recomputed(
+            lambda: import_expenses_from_csv(self.user, csv.splitlines(keepends=True))
+        )
+
+    def test_invalidations_of_other_processes_reach_the_cache(self):
+        # The import worker and the cron jobs have their own cache connection
+        other_process_cache = caches.create_connection("shared")
+        self.assertNotIsInstance(other_process_cache, LocMemCache)
+
+        def change():
+            with patch.object(user_cache, "cache", other_process_cache):
+                self.expense.save()
+
+        self.assert_recomputed(change)
+
+    def test_changes_of_other_users_keep_the_cache(self):
+        other_user = UserFactory()
+        other_category = CategoryFactory(user=other_user)
+
+        self.get()
+        self.create_expense(other_user, other_category)
+        self.get()
+
+        self.assertEqual(self.compute_statistics.call_count, 1)
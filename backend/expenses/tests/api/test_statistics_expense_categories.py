@@ -1,6 +1,8 @@
 import datetime as dt
 from datetime import timedelta
+from unittest.mock import patch
 
+from django.test import override_settings
 from expenses import date_utils
 from expenses.tests.api.api_test_case import ApiTestCase
 from expenses.tests.factories.category_factories import CategoryFactory
@@ -94,6 +96,25 @@ class StatisticsExpenseCategoriesTestCase(ApiTestCase):
         self.assertEqual(response.data[1]["category"]["code"], self.category_2.code)
         self.assertEqual(response.data[1]["amount"], "20.00")
 
+    @patch("expenses.managers.exchange_rate_manager.bulk_get_exchange_rate_from_api")
+    def test_expenses_outside_the_range_are_not_converted(self, get_from_api):
+        old_day = date_utils.today() - timedelta(days=2000)
+        ExpenseFactory(
+            user=self.user,
+            expense_date=old_day,
+            amount=10,
+            currency=CurrencyFactory(code="EUR"),
+            category=self.category_1,
+            amortization_start_date=old_day,
+            amortization_end_date=old_day,
+        )
+
+        today = date_utils.today()
+        response = self.client.get(self.url(start_date=today, end_date=today))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        get_from_api.assert_not_called()
+
 
 class StatisticsExpensesAmortizationTestCase(ApiTestCase):
     @classmethod
@@ -158,3 +179,15 @@ class StatisticsExpensesAmortizationTestCase(ApiTestCase):
         self.assertEqual(response.data[0]["expense_amount"], "0.97")
         self.assertEqual(response.data[0]["non_expense_amount"], "3.23")
         self.assertEqual(response.data[0]["difference"], "2.26")
+
+
+@override_settings(STATISTICS_BACKEND="rollup")
+class RollupStatisticsExpenseCategoriesTestCase(StatisticsExpenseCategoriesTestCase):
+    pass
+
+
+@override_settings(STATISTICS_BACKEND="rollup")
+class RollupStatisticsExpensesAmortizationTestCase(
+    StatisticsExpensesAmortizationTestCase
+):
+    pass
@@ -0,0 +1,121 @@
+import datetime as dt
+from datetime import timedelta
+
+from django.test import override_settings
+from expenses import date_utils
+from expenses.tests.api.api_test_case import ApiTestCase
+from expenses.tests.factories.category_factories import CategoryFactory
+from expenses.tests.factories.currency_factories import CurrencyFactory
+from expenses.tests.factories.dollar_exchange_rate_factories import (
+    DollarExchangeRateFactory,
+)
+from expenses.tests.factories.expense_factories import ExpenseFactory
+from expenses.tests.factories.trip_factories import TripFactory
+from expenses.tests.factories.user_factories import UserFactory
+from expenses.tests.factories.user_settings_factories import UserSettingsFactory
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+
+class StatisticsSummaryTestCase(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        cls.usd = CurrencyFactory(code="USD")
+        cls.eur = CurrencyFactory(code="EUR")
+        UserSettingsFactory(user=cls.user, preferred_currency=cls.usd)
+        cls.today = date_utils.today()
+        DollarExchangeRateFactory(currency=cls.eur, date=cls.today, rate=2)
+        cls.food = CategoryFactory(user=cls.user, for_expense=True, code="food")
+        cls.travel = CategoryFactory(user=cls.user, for_expense=True, code="travel")
+        cls.salary = CategoryFactory(user=cls.user, for_expense=False, code="salary")
+        cls.trip = TripFactory(user=cls.user, code="paris")
+
+        def expense(amount, category, start, end, **kwargs):
+            return ExpenseFactory(
+                **{
+                    "user": cls.user,
+                    "expense_date": cls.today,
+                    "amount": amount,
+                    "currency": cls.usd,
+                    "category": category,
+                    "trip": None,
+                    "amortization_start_date": cls.today + timedelta(days=start),
+                    "amortization_end_date": cls.today + timedelta(days=end),
+                    **kwargs,
+                }
+            )
+
+        # 10 a day, 40 in the range
+        expense(100, cls.travel, -5, 4, trip=cls.trip)
+        # 200 EUR, 100 USD, all in the range
+        expense(200, cls.food, 1, 1, currency=cls.eur)
+        # Outside of the range, only in the trip totals
+        expense(50, cls.travel, 20, 20, trip=cls.trip)
+        # 10 a day
+        expense(300, cls.salary, 0, 29, is_expense=False)
+
+    def setUp(self):
+        self.login(email=self.user.email)
+
+    def get(self, action: str, start_date: dt.date, end_date: dt.date):
+        res = self.client.get(
+            reverse(f"expenses:statistics-{action.replace('_', '-')}"),
+            {"start_date": start_date, "end_date": end_date},
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_summary(self):
+        summary = self.get("summary", self.today, self.today + timedelta(days=3))
+
+        self.assertEqual(
+            [
+                (row["category"]["code"], row["amount"])
+                for row in summary["expense_categories"]
+            ],
+            [("food", "100.00"), ("travel", "40.00")],
+        )
+        trips = {row["code"]: row for row in summary["trips"]}
+        self.assertEqual(trips["paris"]["total_amount"], "150.00")
+        self.assertEqual(trips["paris"]["amount_in_dates"], "40.00")
+        self.assertEqual(trips["paris"]["duration"], 26)
+        self.assertEqual(trips[""]["total_amount"], "100.00")
+        self.assertEqual(trips[""]["amount_in_dates"], "100.00")
+        self.assertEqual(
+            [
+                (row["expense_amount"], row["non_expense_amount"])
+                for row in summary["amortization_timeline"]
+            ],
+            [
+                ("10.00", "10.00"),
+                ("120.00", "20.00"),
+                ("130.00", "30.00"),
+                ("140.00", "40.00"),
+            ],
+        )
+
+    def test_summary_matches_the_single_statistics(self):
+        start_date = self.today - timedelta(days=2)
+        end_date = self.today + timedelta(days=10)
+
+        summary = self.get("summary", start_date, end_date)
+
+        for action in ["expense_categories", "trips", "amortization_timeline"]:
+            with self.subTest(action=action):
+                self.assertEqual(
+                    summary[action], self.get(action, start_date, end_date)
+                )
+
+    def test_summary_with_invalid_dates(self):
+        res = self.client.get(
+            reverse("expenses:statistics-summary"),
+            {"start_date": self.today, "end_date": self.today - timedelta(days=1)},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(STATISTICS_BACKEND="rollup")
+class RollupStatisticsSummaryTestCase(StatisticsSummaryTestCase):
+    pass
@@ -1,6 +1,7 @@
 import datetime as dt
 from datetime import timedelta
 
+from django.test import override_settings
 from expenses import date_utils
 from expenses.tests.api.api_test_case import ApiTestCase
 from expenses.tests.factories.category_factories import CategoryFactory
@@ -221,3 +222,8 @@ class StatisticsTripsTestCase(ApiTestCase):
         self.assertEqual(no_trip_data["name"], "No Trip")
         self.assertEqual(no_trip_data["code"], "")
         self.assertFalse(no_trip_data["is_active"])
+
+
+@override_settings(STATISTICS_BACKEND="rollup")
+class RollupStatisticsTripsTestCase(StatisticsTripsTestCase):
+    pass
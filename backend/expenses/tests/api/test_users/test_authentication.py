@@ -0,0 +1,74 @@
+import datetime as dt
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from expenses import date_utils
+from expenses.models.token import Token
+from expenses.tests.api.api_test_case import ApiTestCase
+from expenses.tests.factories.user_factories import UserFactory
+
+
+class TestTokenAuthentication(ApiTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserFactory()
+        self.url = reverse("expenses:users-self")
+        self.login(self.user.email)
+        self.token = Token.objects.get(user=self.user)
+
+    def get_self_queries(self) -> list[str]:
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [query["sql"] for query in queries.captured_queries]
+
+    def test_token_and_user_are_read_with_one_query(self):
+        queries = self.get_self_queries()
+
+        self.assertEqual(len(queries), 1)
+        self.assertFalse(any(query.startswith("UPDATE") for query in queries))
+
+    @override_settings(TOKEN_CACHE_TIMEOUT=60)
+    def test_cached_token(self):
+        self.get_self_queries()
+        self.assertEqual(self.get_self_queries(), [])
+
+        self.user.first_name = "Changed"
+        self.user.save()
+        self.assertEqual(len(self.get_self_queries()), 1)
+        self.assertEqual(self.client.get(self.url).json()["first_name"], "Changed")
+
+    @override_settings(TOKEN_CACHE_TIMEOUT=60)
+    def test_logout_invalidates_cached_token(self):
+        self.get_self_queries()
+
+        res = self.client.post(reverse("expenses:users-logout"))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.client.cookies["token"] = str(self.token.token)
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_expiration_is_extended_once_a_day(self):
+        expiration_date = self.token.expiration_date
+        in_a_day = date_utils.now() + dt.timedelta(days=1, minutes=1)
+
+        with patch.object(date_utils, "now", return_value=in_a_day):
+            queries = self.get_self_queries()
+
+        self.assertTrue(any(query.startswith("UPDATE") for query in queries))
+        self.token.refresh_from_db()
+        self.assertGreater(self.token.expiration_date, expiration_date)
+
+    def test_invalid_token(self):
+        for token in ["invalid", "00000000-0000-0000-0000-000000000000"]:
+            with self.subTest(token=token):
+                self.client.cookies["token"] = token
+                res = self.client.get(self.url)
+                self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -1,11 +1,14 @@
 import datetime as dt
 from decimal import Decimal
-from unittest.mock import Mock, patch
+from io import StringIO
+from unittest.mock import patch
 
-from django.core.management import call_command
-from django.test import TestCase
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError
+from django.test import TestCase, TransactionTestCase, override_settings
 from expenses import date_utils
-from expenses.models import Expense
+from expenses.management.commands import create_recurring_expenses
+from expenses.models import DailyAmortization, Expense
 from expenses.tests.factories.category_factories import ExpenseCategoryFactory
 from expenses.tests.factories.currency_factories import CurrencyFactory
 from expenses.tests.factories.expense_factories import ExpenseFactory
@@ -86,30 +89,20 @@ class TestCreateRecurringExpensesCommand(TestCase):
         # Verify no new expense was created
         self.assertEqual(Expense.objects.count(), initial_count)
 
-    @patch("expenses.management.commands.create_recurring_expenses.Cron")
-    def test_does_not_create_expense_when_schedule_does_not_fire(self, mock_cron_class):
+    def test_does_not_create_expense_when_schedule_does_not_fire(self):
         """Test that expense is not created when schedule doesn't fire today"""
 
-        # Create a recurring expense
+        # Create a recurring expense firing every day of another month
+        other_month = self.today.month % 12 + 1
         RecurringExpenseFactory(
             user=self.user,
             category=self.category,
             currency=self.currency,
             start_date=self.today - dt.timedelta(days=5),
             end_date=None,
-            schedule="0 0 * * *",
+            schedule=f"0 0 * {other_month} *",
         )
 
-        # Mock Cron to return next run as tomorrow (not today) and previous run as yesterday
-        mock_seeker = Mock()
-        tomorrow_datetime = date_utils.now() + dt.timedelta(days=1)
-        yesterday_datetime = date_utils.now() - dt.timedelta(days=1)
-        mock_seeker.next.return_value = tomorrow_datetime
-        mock_seeker.prev.return_value = yesterday_datetime
-        mock_cron_instance = Mock()
-        mock_cron_instance.schedule.return_value = mock_seeker
-        mock_cron_class.return_value = mock_cron_instance
-
         initial_count = Expense.objects.count()
         call_command("create_recurring_expenses")
 
@@ -396,3 +389,166 @@ class TestCreateRecurringExpensesCommand(TestCase):
         # End date should be December 31st of next year (duration - 1 = 1 year added)
         expected_end_date = dt.date(self.today.year + 1, 12, 31)
         self.assertEqual(created_expense.amortization_end_date, expected_end_date)
+
+    @override_settings(STATISTICS_BACKEND="rollup")
+    def test_creates_expenses_in_bulk(self):
+        """Test that many recurring expenses are created with a constant number of queries"""
+        RecurringExpenseFactory.create_batch(
+            30,
+            user=self.user,
+            category=self.category,
+            currency=self.currency,
+            start_date=self.today - dt.timedelta(days=5),
+            end_date=None,
+            schedule="0 0 * * *",
+            amortization_duration=3,
+        )
+        out = StringIO()
+
+        # Recurring expenses, expenses, daily amortizations (2), statistics cache
+        # and savepoints (4)
+        with self.assertNumQueries(9):
+            call_command("create_recurring_expenses", stdout=out)
+
+        self.assertEqual(Expense.objects.filter(expense_date=self.today).count(), 30)
+        self.assertEqual(DailyAmortization.objects.count(), 90)
+        self.assertIn("30 firing today, 30 expenses created", out.getvalue())
+
+    def test_one_expense_per_recurring_expense_and_day(self):
+        """Test that the database rejects a second expense of the same recurring expense in a day"""
+        recurring_expense = RecurringExpenseFactory(
+            user=self.user, category=self.category, currency=self.currency
+        )
+        ExpenseFactory(
+            user=self.user,
+            category=self.category,
+            recurring_expense=recurring_expense,
+            expense_date=self.today,
+        )
+
+        with self.assertRaises(IntegrityError):
+            ExpenseFactory(
+                user=self.user,
+                category=self.category,
+                recurring_expense=recurring_expense,
+                expense_date=self.today,
+            )
+
+
+class TestBackfillRecurringExpensesCommand(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        cls.category = ExpenseCategoryFactory(user=cls.user)
+        cls.currency = CurrencyFactory()
+        # 2024-03-04 is a Monday
+        cls.since = dt.date(2024, 3, 4)
+        cls.until = dt.date(2024, 3, 10)
+
+    def create_recurring_expense(self, user=None, **kwargs):
+        return RecurringExpenseFactory(
+            **{
+                "user": user or self.user,
+                "category": self.category,
+                "currency": self.currency,
+                "start_date": dt.date(2024, 1, 1),
+                "end_date": None,
+                "schedule": "0 0 * * *",
+                **kwargs,
+            }
+        )
+
+    def backfill(self, *args):
+        out = StringIO()
+        with patch.object(date_utils, "today", return_value=self.until):
+            call_command(
+                "create_recurring_expenses",
+                "--since",
+                self.since.isoformat(),
+                *args,
+                stdout=out,
+            )
+        return out.getvalue()
+
+    def expense_dates(self, recurring_expense) -> list[dt.date]:
+        return list(
+            recurring_expense.expenses.order_by("expense_date").values_list(
+                "expense_date", flat=True
+            )
+        )
+
+    @override_settings(STATISTICS_BACKEND="rollup")
+    def test_backfills_missing_days(self):
+        daily = self.create_recurring_expense(amortization_duration=2)
+        ExpenseFactory(
+            user=self.user,
+            category=self.category,
+            recurring_expense=daily,
+            expense_date=dt.date(2024, 3, 6),
+        )
+        weekly = self.create_recurring_expense(schedule="0 9 * * 1")
+        starting = self.create_recurring_expense(start_date=dt.date(2024, 3, 9))
+        ending = self.create_recurring_expense(end_date=dt.date(2024, 3, 5))
+        self.create_recurring_expense(end_date=dt.date(2024, 3, 1))
+
+        out = self.backfill()
+
+        self.assertEqual(
+            self.expense_dates(daily),
+            [self.since + dt.timedelta(days=i) for i in range(7)],
+        )
+        created = daily.expenses.get(expense_date=self.since)
+        self.assertEqual(created.amortization_start_date, self.since)
+        self.assertEqual(created.amortization_end_date, dt.date(2024, 3, 5))
+        self.assertEqual(DailyAmortization.objects.filter(expense=created).count(), 2)
+        self.assertEqual(self.expense_dates(weekly), [self.since])
+        self.assertEqual(
+            self.expense_dates(starting), [dt.date(2024, 3, 9), dt.date(2024, 3, 10)]
+        )
+        self.assertEqual(
+            self.expense_dates(ending), [dt.date(2024, 3, 4), dt.date(2024, 3, 5)]
+        )
+        self.assertIn("11 expenses created from 2024-03-04 to 2024-03-10", out)
+
+        # Nothing is left to create
+        self.assertIn("0 expenses created", self.backfill())
+
+    def test_invalid_range(self):
+        with self.assertRaises(CommandError):
+            self.backfill("--until", "2024-03-01")
+        with self.assertRaises(CommandError):
+            self.backfill("--until", "2024-03-11")
+
+
+class TestParallelBackfillRecurringExpensesCommand(TransactionTestCase):
+    def test_backfills_chunks_of_users_in_parallel(self):
+        currency = CurrencyFactory()
+        recurring_expenses = []
+        for _ in range(3):
+            user = UserFactory()
+            recurring_expenses.append(
+                RecurringExpenseFactory(
+                    user=user,
+                    category=ExpenseCategoryFactory(user=user),
+                    currency=currency,
+                    start_date=dt.date(2024, 1, 1),
+                    end_date=None,
+                    schedule="0 0 * * *",
+                )
+            )
+
+        with (
+            patch.object(date_utils, "today", return_value=dt.date(2024, 3, 10)),
+            patch.object(create_recurring_expenses, "USERS_PER_CHUNK", 1),
+        ):
+            call_command(
+                "create_recurring_expenses",
+                "--since",
+                "2024-03-08",
+                "--workers",
+                "2",
+                stdout=StringIO(),
+            )
+
+        for recurring_expense in recurring_expenses:
+            self.assertEqual(recurring_expense.expenses.count(), 3)
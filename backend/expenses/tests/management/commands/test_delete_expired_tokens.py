@@ -0,0 +1,44 @@
+import datetime as dt
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from expenses import date_utils
+from expenses.models.token import Token
+from expenses.tests.factories.user_factories import UserFactory
+
+
+class TestDeleteExpiredTokensCommand(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        now = date_utils.now()
+        cls.expired = [
+            Token.objects.create(user=cls.user, expiration_date=now - dt.timedelta(i))
+            for i in range(1, 6)
+        ]
+        cls.valid = [
+            Token.objects.create(user=cls.user, expiration_date=now + dt.timedelta(1)),
+            Token.objects.create(user=cls.user, expiration_date=None),
+        ]
+
+    def test_deletes_expired_tokens_in_batches(self):
+        out = StringIO()
+
+        call_command("delete_expired_tokens", "--batch-size", "2", stdout=out)
+
+        self.assertEqual(
+            set(Token.objects.values_list("id", flat=True)),
+            {token.id for token in self.valid},
+        )
+        self.assertIn(
+            "5 expired tokens deleted in 3 batches, 2 tokens left", out.getvalue()
+        )
+
+    def test_nothing_to_delete(self):
+        Token.objects.filter(id__in=[token.id for token in self.expired]).delete()
+        out = StringIO()
+
+        call_command("delete_expired_tokens", stdout=out)
+
+        self.assertIn("0 expired tokens deleted in 0 batches", out.getvalue())
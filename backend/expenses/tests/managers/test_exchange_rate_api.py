@@ -0,0 +1,248 @@
+import datetime as dt
+import json
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from expenses.date_utils import all_dates_in_range
+from expenses.managers import exchange_rate_manager
+from expenses.models import DollarExchangeRate
+from expenses.tests.factories.currency_factories import CurrencyFactory
+from expenses.tests.factories.dollar_exchange_rate_factories import (
+    DollarExchangeRateFactory,
+)
+
+
+class StandInOpenExchangeRates(BaseHTTPRequestHandler):
+    """Serves historical/<day>.json and time-series.json like Open Exchange
+    Rates, with the failures queued in `server.failures` returned first. The rate
+    of each currency of `server.currencies` is its factor times the day of the
+    month."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            status = server.failures.pop(0) if server.failures else 200
+        time.sleep(server.latency)
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path.endswith("time-series.json") and not server.time_series_allowed:
+            status = 403
+        if status == 200 and url.path.endswith("time-series.json"):
+            start = dt.date.fromisoformat(query["start"][0])
+            end = dt.date.fromisoformat(query["end"][0])
+            body = {
+                "rates": {
+                    day.isoformat(): server.rates(day)
+                    for day in all_dates_in_range(start, end)
+                }
+            }
+        elif status == 200:
+            day = url.path.rsplit("/", 1)[-1].removesuffix(".json")
+            body = {"rates": server.rates(dt.date.fromisoformat(day))}
+        else:
+            body = {"error": True, "status": status}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        with server.lock:
+            server.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    def rates(self, day: dt.date) -> dict[str, int]:
+        return {code: factor * day.day for code, factor in self.currencies.items()}
+
+
+class StandInServerMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = StandInServer(("127.0.0.1", 0), StandInOpenExchangeRates)
+        cls.server.lock = threading.Lock()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.addClassCleanup(cls.server.server_close)
+        cls.addClassCleanup(cls.server.shutdown)
+        settings_override = override_settings(
+            OPENEXCHANGERATES_APP_ID="app-id",
+            OPENEXCHANGERATES_BASE_URL=f"http://127.0.0.1:{cls.server.server_port}/api",
+        )
+        settings_override.enable()
+        cls.addClassCleanup(settings_override.disable)
+
+    def setUp(self):
+        super().setUp()
+        self.server.requests = []
+        self.server.failures = []
+        self.server.in_flight = 0
+        self.server.max_in_flight = 0
+        self.server.latency = 0
+        self.server.time_series_allowed = True
+        self.server.currencies = {"EUR": 1}
+
+    def requested_paths(self) -> list[str]:
+        return sorted(urlparse(path).path for path in self.server.requests)
+
+
+@patch.object(exchange_rate_manager, "RETRY_BACKOFF_SECONDS", 0)
+class ExchangeRateApiTestCase(StandInServerMixin, SimpleTestCase):
+    def test_coalesce_days_into_ranges(self):
+        days = [dt.date(2024, 1, day) for day in [5, 1, 2, 3, 10, 6, 2]]
+
+        self.assertEqual(
+            exchange_rate_manager.coalesce_days_into_ranges(days),
+            [
+                (dt.date(2024, 1, 1), dt.date(2024, 1, 3)),
+                (dt.date(2024, 1, 5), dt.date(2024, 1, 6)),
+                (dt.date(2024, 1, 10), dt.date(2024, 1, 10)),
+            ],
+        )
+        self.assertEqual(
+            exchange_rate_manager.coalesce_days_into_ranges(days, max_days=2),
+            [
+                (dt.date(2024, 1, 1), dt.date(2024, 1, 2)),
+                (dt.date(2024, 1, 3), dt.date(2024, 1, 3)),
+                (dt.date(2024, 1, 5), dt.date(2024, 1, 6)),
+                (dt.date(2024, 1, 10), dt.date(2024, 1, 10)),
+            ],
+        )
+
+    def test_bulk_fetch_uses_time_series_for_contiguous_days(self):
+        days = [dt.date(2024, 1, day) for day in [1, 2, 3, 5, 6, 10]]
+
+        rates = exchange_rate_manager.bulk_get_exchange_rate_from_api(days)
+
+        self.assertEqual(
+            sorted((rate.day, rate.rate) for rate in rates),
+            [(day, Decimal(day.day)) for day in days],
+        )
+        self.assertEqual(
+            self.requested_paths(),
+            [
+                "/api/historical/2024-01-10.json",
+                "/api/time-series.json",
+                "/api/time-series.json",
+            ],
+        )
+
+    def test_bulk_fetch_falls_back_to_single_days_if_time_series_not_allowed(self):
+        self.server.time_series_allowed = False
+        days = [dt.date(2024, 1, day) for day in [1, 2, 3, 5, 6, 10]]
+
+        rates = exchange_rate_manager.bulk_get_exchange_rate_from_api(days)
+
+        self.assertEqual(
+            sorted((rate.day, rate.rate) for rate in rates),
+            [(day, Decimal(day.day)) for day in days],
+        )
+        paths = self.requested_paths()
+        self.assertEqual(
+            [path for path in paths if "historical" in path],
+            [f"/api/historical/{day.isoformat()}.json" for day in days],
+        )
+
+    def test_bulk_fetch_runs_requests_concurrently(self):
+        self.server.latency = 0.1
+        days = [dt.date(2024, 1, day) for day in range(1, 17, 2)]
+
+        with patch.object(exchange_rate_manager, "MAX_REQUESTS_PER_SECOND", 1000):
+            rates = exchange_rate_manager.bulk_get_exchange_rate_from_api(days)
+
+        self.assertEqual(
+            [(rate.day, rate.rate) for rate in rates],
+            [(day, Decimal(day.day)) for day in days],
+        )
+        self.assertEqual(len(self.server.requests), len(days))
+        self.assertGreater(self.server.max_in_flight, 1)
+        self.assertLessEqual(
+            self.server.max_in_flight, exchange_rate_manager.MAX_CONCURRENT_REQUESTS
+        )
+
+    def test_bulk_fetch_is_rate_limited(self):
+        days = [dt.date(2024, 1, day) for day in range(1, 10, 2)]
+
+        with patch.object(exchange_rate_manager, "MAX_REQUESTS_PER_SECOND", 20):
+            start = time.monotonic()
+            exchange_rate_manager.bulk_get_exchange_rate_from_api(days)
+            elapsed = time.monotonic() - start
+
+        # 5 requests at 20 per second: the last one starts after 4 intervals
+        self.assertGreaterEqual(elapsed, 4 / 20)
+
+    def test_transient_errors_are_retried(self):
+        self.server.failures = [503, 500]
+
+        rates = exchange_rate_manager.get_exchange_rate_from_api(dt.date(2024, 1, 2))
+
+        self.assertEqual(rates[0].rate, Decimal(2))
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_gives_up_after_max_retries(self):
+        self.server.failures = [503] * 10
+
+        with self.assertRaises(ValueError):
+            exchange_rate_manager.get_exchange_rate_from_api(dt.date(2024, 1, 2))
+
+        self.assertEqual(
+            len(self.server.requests), exchange_rate_manager.MAX_RETRIES + 1
+        )
+
+    def test_client_errors_are_not_retried(self):
+        self.server.failures = [401]
+
+        with self.assertRaises(ValueError):
+            exchange_rate_manager.get_exchange_rate_from_api(dt.date(2024, 1, 2))
+
+        self.assertEqual(len(self.server.requests), 1)
+
+
+@patch.object(exchange_rate_manager, "RETRY_BACKOFF_SECONDS", 0)
+class ExchangeRateBackfillTestCase(StandInServerMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usd = CurrencyFactory(code="USD")
+        cls.eur = CurrencyFactory(code="EUR")
+        cls.gbp = CurrencyFactory(code="GBP")
+
+    def test_conversion_backfills_every_missing_day(self):
+        days = [dt.date(2024, 1, day) for day in [2, 3, 4, 8]]
+        # Other currencies already have rates on some of the fetched days
+        DollarExchangeRateFactory(currency=self.gbp, date=days[0], rate=1)
+        self.server.currencies = {"EUR": 1, "GBP": 2}
+
+        converted = exchange_rate_manager.bulk_convert_to_currency(
+            [
+                exchange_rate_manager.Money(
+                    amount=Decimal("24"), currency=self.eur, day=day
+                )
+                for day in days
+            ],
+            self.usd,
+        )
+
+        self.assertEqual(
+            [money.amount for money in converted],
+            [Decimal("24") / day.day for day in days],
+        )
+        self.assertEqual(
+            set(DollarExchangeRate.objects.values_list("currency__code", "date")),
+            {(code, day) for code in ["EUR", "GBP"] for day in days},
+        )
+        # The existing row is kept
+        self.assertEqual(
+            DollarExchangeRate.objects.get(currency=self.gbp, date=days[0]).rate, 1
+        )
@@ -0,0 +1,171 @@
+import datetime as dt
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from expenses.managers import exchange_rate_manager
+from expenses.managers.exchange_rate_cache import ExchangeRateCache, rate_cache
+from expenses.managers.exchange_rate_manager import Money, RateResponse
+from expenses.models import DollarExchangeRate
+from expenses.tests.factories.currency_factories import CurrencyFactory
+from expenses.tests.factories.dollar_exchange_rate_factories import (
+    DollarExchangeRateFactory,
+)
+
+
+@override_settings(EXCHANGE_RATE_CACHE_SIZE=100)
+class ExchangeRateCacheTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usd = CurrencyFactory(
+            code="USD", symbol="$", display_name="United States Dollar"
+        )
+        cls.eur = CurrencyFactory(code="EUR", symbol="€", display_name="Euro")
+        cls.today = dt.date.today()
+        cls.yesterday = cls.today - dt.timedelta(days=1)
+
+    def setUp(self):
+        rate_cache.clear()
+        self.addCleanup(rate_cache.clear)
+
+    def test_repeated_bulk_conversion_is_served_from_cache(self):
+        DollarExchangeRateFactory(currency=self.eur, date=self.today, rate=2)
+        money = [Money(amount=10, currency=self.eur, day=self.today)]
+
+        with self.assertNumQueries(1):
+            exchange_rate_manager.bulk_convert_to_dollars(money)
+        with self.assertNumQueries(0):
+            result = exchange_rate_manager.bulk_convert_to_dollars(money)
+
+        self.assertEqual(result, [Money(amount=5, currency=self.eur, day=self.today)])
+        info = rate_cache.info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (1, 1, 1))
+
+    def test_get_exchange_rate_for_day_is_served_from_cache(self):
+        DollarExchangeRateFactory(currency=self.eur, date=self.today, rate=2)
+
+        exchange_rate_manager.get_exchange_rate_for_day(self.today, self.eur)
+        with self.assertNumQueries(0):
+            rate = exchange_rate_manager.get_exchange_rate_for_day(self.today, self.eur)
+
+        self.assertEqual(rate.rate, Decimal(2))
+
+    def test_missing_rates_are_not_cached(self):
+        money = [Money(amount=10, currency=self.eur, day=self.today)]
+        converted, not_converted = (
+            exchange_rate_manager.bulk_convert_to_dollars_from_db(
+                exchange_rate_manager.enumerate_money(money)
+            )
+        )
+        self.assertEqual((len(converted), len(not_converted)), (0, 1))
+        self.assertEqual(rate_cache.info().currsize, 0)
+
+    def test_least_recently_used_row_is_evicted(self):
+        DollarExchangeRateFactory(currency=self.eur, date=self.today, rate=2)
+        DollarExchangeRateFactory(currency=self.eur, date=self.yesterday, rate=3)
+
+        with override_settings(EXCHANGE_RATE_CACHE_SIZE=1):
+            exchange_rate_manager.get_exchange_rate_for_day(self.today, self.eur)
+            exchange_rate_manager.get_exchange_rate_for_day(self.yesterday, self.eur)
+
+            self.assertIsNone(rate_cache.get(self.eur.id, self.today))
+            self.assertIsNotNone(rate_cache.get(self.eur.id, self.yesterday))
+
+    @override_settings(EXCHANGE_RATE_CACHE_SIZE=0)
+    def test_disabled_cache_always_queries(self):
+        DollarExchangeRateFactory(currency=self.eur, date=self.today, rate=2)
+
+        exchange_rate_manager.get_exchange_rate_for_day(self.today, self.eur)
+        with self.assertNumQueries(1):
+            exchange_rate_manager.get_exchange_rate_for_day(self.today, self.eur)
+
+        self.assertEqual(rate_cache.info().currsize, 0)
+
+    def test_saving_rates_invalidates_cache(self):
+        rate = DollarExchangeRateFactory(currency=self.eur, date=self.today, rate=2)
+        exchange_rate_manager.get_exchange_rate_for_day(self.today, self.eur)
+        rate.delete()
+        self.assertIsNone(rate_cache.get(self.eur.id, self.today))
+
+        exchange_rate_manager.save_exchange_rates_to_database(
+            [RateResponse(currency_code="EUR", rate=Decimal(4), day=self.today)]
+        )
+
+        rate = exchange_rate_manager.get_exchange_rate_for_day(self.today, self.eur)
+        self.assertEqual(rate.rate, Decimal(4))
+
+    def test_loading_timeseries_invalidates_cache(self):
+        DollarExchangeRateFactory(
+            currency=self.eur, date=dt.date(2000, 1, 3), rate=Decimal("123")
+        )
+        exchange_rate_manager.get_exchange_rate_for_day(dt.date(2000, 1, 3), self.eur)
+
+        call_command("load_currency_timeseries", "EUR")
+
+        rate = exchange_rate_manager.get_exchange_rate_for_day(
+            dt.date(2000, 1, 3), self.eur
+        )
+        self.assertNotEqual(rate.rate, Decimal("123"))
+
+    @override_settings(EXCHANGE_RATE_RESOLUTION="previous")
+    def test_day_resolved_to_previous_rate_is_served_from_cache(self):
+        DollarExchangeRateFactory(currency=self.eur, date=self.yesterday, rate=2)
+
+        exchange_rate_manager.get_exchange_rate_for_day(self.today, self.eur)
+        with self.assertNumQueries(0):
+            rate = exchange_rate_manager.get_exchange_rate_for_day(self.today, self.eur)
+
+        self.assertEqual((rate.date, rate.rate), (self.yesterday, Decimal(2)))
+        self.assertEqual(rate_cache.info().currsize, 1)
+
+    @override_settings(EXCHANGE_RATE_RESOLUTION="previous")
+    def test_changing_previous_rate_invalidates_resolved_day(self):
+        rate = DollarExchangeRateFactory(currency=self.eur, date=self.yesterday, rate=2)
+        exchange_rate_manager.get_exchange_rate_for_day(self.today, self.eur)
+
+        rate.delete()
+        exchange_rate_manager.save_exchange_rates_to_database(
+            [RateResponse(currency_code="EUR", rate=Decimal(4), day=self.yesterday)]
+        )
+
+        rate = exchange_rate_manager.get_exchange_rate_for_day(self.today, self.eur)
+        self.assertEqual((rate.date, rate.rate), (self.yesterday, Decimal(4)))
+
+    @override_settings(EXCHANGE_RATE_RESOLUTION="previous")
+    def test_rate_saved_in_the_gap_invalidates_resolved_day(self):
+        DollarExchangeRateFactory(
+            currency=self.eur, date=self.today - dt.timedelta(days=2), rate=2
+        )
+        exchange_rate_manager.get_exchange_rate_for_day(self.today, self.eur)
+
+        exchange_rate_manager.save_exchange_rates_to_database(
+            [RateResponse(currency_code="EUR", rate=Decimal(4), day=self.yesterday)]
+        )
+
+        rate = exchange_rate_manager.get_exchange_rate_for_day(self.today, self.eur)
+        self.assertEqual((rate.date, rate.rate), (self.yesterday, Decimal(4)))
+
+    def test_invalidation_only_drops_the_days_resolved_across_the_rates(self):
+        first_day = dt.date(2024, 1, 1)
+        cache = ExchangeRateCache()
+        for currency in [self.usd, self.eur]:
+            rate = DollarExchangeRate(currency=currency, date=first_day, rate=2)
+            for offset in [1, 5, 10]:
+                cache.set_resolved(
+                    currency.id, first_day + dt.timedelta(days=offset), rate
+                )
+
+        cache.invalidate(
+            [(self.eur.id, first_day + dt.timedelta(days=offset)) for offset in [3, 4]]
+        )
+
+        self.assertEqual(
+            [
+                cache.resolve(currency.id, first_day + dt.timedelta(days=offset))
+                is not None
+                for currency in [self.usd, self.eur]
+                for offset in [1, 5, 10]
+            ],
+            [True, True, True, True, False, False],
+        )
@@ -1,7 +1,7 @@
 from expenses.tests.factories.dollar_exchange_rate_factories import (
     DollarExchangeRateFactory,
 )
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from expenses.managers import exchange_rate_manager
 from expenses.managers.exchange_rate_manager import Money, RateResponse
 import datetime as dt
@@ -37,7 +37,9 @@ class ExchangeRateManagerTestCase(TestCase):
     def test_convert_to_dollars_calling_api(self):
         with patch(
             "expenses.managers.exchange_rate_manager.get_exchange_rate_from_api",
-            return_value=[RateResponse(currency_code="EUR", rate=Decimal(2.0))],
+            return_value=[
+                RateResponse(currency_code="EUR", rate=Decimal(2.0), day=self.today)
+            ],
         ) as mock_get_exchange_rate_from_api:
             result = exchange_rate_manager.convert_to_dollars(100, self.eur, self.today)
             mock_get_exchange_rate_from_api.assert_called_once_with(self.today)
@@ -95,3 +97,112 @@ class ExchangeRateManagerTestCase(TestCase):
         result = exchange_rate_manager.bulk_convert_to_currency(input, self.eur)
 
         self.assertEqual(result, expected)
+
+    def test_bulk_convert_to_currency_queries_rates_once_per_direction(self):
+        days = [self.today - dt.timedelta(days=i) for i in range(30)]
+        for day in days:
+            DollarExchangeRateFactory(currency=self.eur, date=day, rate=Decimal(2.0))
+            DollarExchangeRateFactory(currency=self.gbp, date=day, rate=Decimal(4.0))
+        input = [Money(amount=10, currency=self.eur, day=day) for day in days]
+
+        # One query to convert to dollars, one to convert to pounds
+        with self.assertNumQueries(2):
+            result = exchange_rate_manager.bulk_convert_to_currency(input, self.gbp)
+
+        self.assertEqual(
+            result, [Money(amount=20, currency=self.gbp, day=day) for day in days]
+        )
+
+
+class RateTableTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.eur = CurrencyFactory(code="EUR", symbol="€", display_name="Euro")
+        cls.gbp = CurrencyFactory(code="GBP", symbol="£", display_name="Pound Sterling")
+        cls.today = dt.date.today()
+        cls.yesterday = cls.today - dt.timedelta(days=1)
+
+    def test_get(self):
+        table = exchange_rate_manager.RateTable(
+            [(self.eur.id, self.today, Decimal("0.9"))]
+        )
+        self.assertEqual(table.get(self.eur.id, self.today), Decimal("0.9"))
+        self.assertIsNone(table.get(self.eur.id, self.yesterday))
+        self.assertIsNone(table.get(self.gbp.id, self.today))
+
+    def test_from_db_only_loads_requested_keys(self):
+        DollarExchangeRateFactory(currency=self.eur, date=self.today, rate=Decimal(1))
+        DollarExchangeRateFactory(currency=self.eur, date=self.yesterday, rate=2)
+        DollarExchangeRateFactory(currency=self.gbp, date=self.today, rate=Decimal(3))
+
+        table = exchange_rate_manager.RateTable.from_db([(self.eur.id, self.today)])
+
+        self.assertEqual(len(table), 1)
+        self.assertIn((self.eur.id, self.today), table)
+        self.assertEqual(table.get(self.eur.id, self.today), Decimal(1))
+
+
+@override_settings(EXCHANGE_RATE_RESOLUTION="previous")
+class PreviousRateResolutionTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usd = CurrencyFactory(
+            code="USD", symbol="$", display_name="United States Dollar"
+        )
+        cls.eur = CurrencyFactory(code="EUR", symbol="€", display_name="Euro")
+        cls.friday = dt.date(2024, 3, 1)
+        cls.saturday = dt.date(2024, 3, 2)
+        cls.monday = dt.date(2024, 3, 4)
+        DollarExchangeRateFactory(currency=cls.eur, date=dt.date(2024, 2, 1), rate=1)
+        DollarExchangeRateFactory(currency=cls.eur, date=cls.friday, rate=2)
+        DollarExchangeRateFactory(currency=cls.eur, date=cls.monday, rate=4)
+
+    def test_index_resolves_gaps_to_previous_rate(self):
+        index = exchange_rate_manager.PreviousRateIndex(
+            [
+                (self.eur.id, self.monday, Decimal(4)),
+                (self.eur.id, self.friday, Decimal(2)),
+            ]
+        )
+        self.assertEqual(index.get(self.eur.id, self.friday), Decimal(2))
+        self.assertEqual(index.get(self.eur.id, self.saturday), Decimal(2))
+        self.assertEqual(index.get(self.eur.id, self.monday), Decimal(4))
+        self.assertIsNone(index.get(self.eur.id, dt.date(2024, 2, 29)))
+        self.assertIsNone(index.get(self.usd.id, self.monday))
+
+    def test_index_from_db_loads_latest_rate_before_the_range(self):
+        index = exchange_rate_manager.PreviousRateIndex.from_db(
+            [(self.eur.id, dt.date(2024, 2, 15))]
+        )
+        self.assertEqual(index.get(self.eur.id, dt.date(2024, 2, 15)), Decimal(1))
+
+    @patch("expenses.managers.exchange_rate_manager.get_exchange_rate_from_api")
+    def test_bulk_conversion_does_not_call_api_for_gaps(self, get_from_api):
+        money = [
+            Money(amount=10, currency=self.eur, day=self.saturday),
+            Money(amount=10, currency=self.eur, day=self.monday),
+        ]
+
+        with self.assertNumQueries(2):
+            result = exchange_rate_manager.bulk_convert_to_currency(money, self.usd)
+
+        get_from_api.assert_not_called()
+        self.assertEqual([entry.amount for entry in result], [5, Decimal("2.5")])
+
+    @patch("expenses.managers.exchange_rate_manager.get_exchange_rate_from_api")
+    def test_single_conversion_does_not_call_api_for_gaps(self, get_from_api):
+        result = exchange_rate_manager.convert_to_dollars(10, self.eur, self.saturday)
+
+        get_from_api.assert_not_called()
+        self.assertEqual(result, 5)
+
+    def test_api_is_called_when_there_is_no_previous_rate(self):
+        day = dt.date(2024, 1, 1)
+        with patch(
+            "expenses.managers.exchange_rate_manager.get_exchange_rate_from_api",
+            return_value=[RateResponse(currency_code="EUR", rate=Decimal(8), day=day)],
+        ) as get_from_api:
+            result = exchange_rate_manager.convert_to_dollars(16, self.eur, day)
+
+        get_from_api.assert_called_once_with(day)
+        self.assertEqual(result, 2)
@@ -0,0 +1,124 @@
+import datetime as dt
+import random
+from decimal import Decimal
+from unittest.mock import patch
+
+import numpy as np
+from django.test import TestCase, override_settings
+
+from expenses.managers import exchange_rate_manager, rate_matrix
+from expenses.managers.exchange_rate_manager import Money
+from expenses.statistics_utils import bulk_convert
+from expenses.tests.factories.currency_factories import CurrencyFactory
+from expenses.tests.factories.dollar_exchange_rate_factories import (
+    DollarExchangeRateFactory,
+)
+
+CENT = Decimal("0.01")
+
+
+class RateMatrixTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usd = CurrencyFactory(
+            code="USD", symbol="$", display_name="United States Dollar"
+        )
+        cls.eur = CurrencyFactory(code="EUR", symbol="€", display_name="Euro")
+        cls.gbp = CurrencyFactory(code="GBP", symbol="£", display_name="Pound Sterling")
+        cls.today = dt.date.today()
+        cls.days = [cls.today - dt.timedelta(days=i) for i in range(60)]
+        rng = random.Random(1)
+        for day in cls.days:
+            DollarExchangeRateFactory(
+                currency=cls.eur,
+                date=day,
+                rate=Decimal(rng.randint(5_000, 15_000)) / 10_000,
+            )
+            DollarExchangeRateFactory(
+                currency=cls.gbp,
+                date=day,
+                rate=Decimal(rng.randint(5_000, 15_000)) / 10_000,
+            )
+
+    def test_matches_exact_conversion_rounded_to_the_cent(self):
+        rng = random.Random(2)
+        money = [
+            Money(
+                amount=Decimal(rng.randint(1, 10_000_000)) / 100,
+                currency=rng.choice([self.usd, self.eur, self.gbp]),
+                day=rng.choice(self.days),
+            )
+            for _ in range(500)
+        ]
+        for destination in [self.usd, self.eur, self.gbp]:
+            exact = exchange_rate_manager.bulk_convert_to_currency(money, destination)
+            dense = rate_matrix.bulk_convert_to_currency(money, destination)
+            self.assertEqual(
+                [entry.amount for entry in dense],
+                [entry.amount.quantize(CENT) for entry in exact],
+            )
+            self.assertTrue(all(entry.currency == destination for entry in dense))
+
+    def test_half_cent_results_are_rounded_with_decimal(self):
+        DollarExchangeRateFactory(
+            currency=self.eur, date=dt.date(2001, 1, 1), rate=Decimal(2)
+        )
+        money = [
+            Money(amount=Decimal("0.05"), currency=self.eur, day=dt.date(2001, 1, 1))
+        ]
+
+        result = rate_matrix.bulk_convert_to_currency(money, self.usd)
+
+        # 0.025 rounds half to even, exactly like Decimal.quantize
+        self.assertEqual(result[0].amount, Decimal("0.02"))
+
+    def test_missing_rate_falls_back_to_exact_conversion(self):
+        day = dt.date(2001, 1, 1)
+        money = [Money(amount=Decimal("10"), currency=self.eur, day=day)]
+
+        with patch(
+            "expenses.managers.exchange_rate_manager.bulk_convert_to_currency",
+            return_value=[Money(amount=Decimal("20"), currency=self.usd, day=day)],
+        ) as exact:
+            result = rate_matrix.bulk_convert_to_currency(money, self.usd)
+
+        exact.assert_called_once_with(money, self.usd)
+        self.assertEqual(result[0].amount, Decimal("20"))
+
+    def test_matrix_is_indexed_by_day_offset(self):
+        matrix = rate_matrix.RateMatrix.from_db(
+            [self.usd, self.eur], self.days[-1], self.days[0]
+        )
+        self.assertEqual(matrix.values.shape, (2, len(self.days)))
+        self.assertEqual(matrix.first_offset, (self.days[-1] - rate_matrix.EPOCH).days)
+        self.assertTrue((matrix.values[matrix.rows[self.usd.id]] == 1).all())
+
+    @override_settings(EXCHANGE_RATE_RESOLUTION="previous")
+    def test_gaps_are_filled_with_previous_rate(self):
+        DollarExchangeRateFactory(
+            currency=self.eur, date=dt.date(2001, 1, 1), rate=Decimal(2)
+        )
+        DollarExchangeRateFactory(
+            currency=self.eur, date=dt.date(2001, 1, 4), rate=Decimal(4)
+        )
+
+        matrix = rate_matrix.RateMatrix.from_db(
+            [self.eur, self.gbp], dt.date(2001, 1, 2), dt.date(2001, 1, 5)
+        )
+
+        self.assertEqual(
+            matrix.values[matrix.rows[self.eur.id]].tolist(), [2.0, 2.0, 4.0, 4.0]
+        )
+        self.assertTrue(np.isnan(matrix.values[matrix.rows[self.gbp.id]]).all())
+
+    @override_settings(EXCHANGE_RATE_ENGINE="matrix")
+    def test_statistics_use_matrix_engine_when_configured(self):
+        money = Money(amount=Decimal("10.00"), currency=self.usd, day=self.today)
+        with patch(
+            "expenses.managers.rate_matrix.bulk_convert_to_currency",
+            wraps=rate_matrix.bulk_convert_to_currency,
+        ) as dense:
+            result = bulk_convert([money], self.usd)
+
+        dense.assert_called_once()
+        self.assertEqual(result[0].amount, Decimal("10.00"))
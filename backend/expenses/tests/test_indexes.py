@@ -0,0 +1,114 @@
+import datetime as dt
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+
+from expenses.managers import exchange_rate_manager
+from expenses.models import DollarExchangeRate, Expense, RecurringExpense
+from expenses.tests.factories.category_factories import CategoryFactory
+from expenses.tests.factories.currency_factories import CurrencyFactory
+from expenses.tests.factories.recurring_expense_factories import (
+    RecurringExpenseFactory,
+)
+from expenses.tests.factories.user_factories import UserFactory
+from expenses.views.expenses import ExpenseFilterSet
+from expenses.views.pagination import KeysetPagination
+
+
+class IndexUsageTestCase(TestCase):
+    """Checks with EXPLAIN that the hot queries are planned on their indexes,
+    on tables holding a few years of data for a handful of users."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.first_day = dt.date(2022, 1, 1)
+        # A recent day, like the default dashboard range
+        cls.day = cls.first_day + dt.timedelta(days=960)
+        cls.users = [UserFactory() for _ in range(10)]
+        cls.user = cls.users[0]
+        # Rates of many currencies, statistics only convert between a few of them
+        cls.currencies = [CurrencyFactory(code=f"C{i}") for i in range(40)]
+        categories = [CategoryFactory(user=user) for user in cls.users]
+        recurring_expenses = [
+            RecurringExpenseFactory(
+                user=user, category=category, currency=cls.currencies[0]
+            )
+            for user, category in zip(cls.users, categories)
+        ]
+        # Inserted day by day, as users record their expenses over time
+        expenses = [
+            Expense(
+                user=user,
+                expense_date=cls.first_day + dt.timedelta(days=i * 2),
+                description="expense",
+                amount=Decimal("10.00"),
+                amortization_start_date=cls.first_day + dt.timedelta(days=i * 2),
+                amortization_end_date=cls.first_day + dt.timedelta(days=i * 2 + i % 30),
+                category=category,
+                currency=cls.currencies[0],
+                recurring_expense=recurring_expense if i % 5 == 0 else None,
+            )
+            for i in range(500)
+            for user, category, recurring_expense in zip(
+                cls.users, categories, recurring_expenses
+            )
+        ]
+        Expense.objects.bulk_create(expenses)
+        DollarExchangeRate.objects.bulk_create(
+            DollarExchangeRate(
+                currency=currency,
+                date=cls.first_day + dt.timedelta(days=i),
+                rate=Decimal("1.5"),
+            )
+            for currency in cls.currencies
+            for i in range(500)
+        )
+        with connection.cursor() as cursor:
+            for model in [Expense, RecurringExpense, DollarExchangeRate]:
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+    def assertUsesIndex(self, queryset, index_name):
+        self.assertIn(index_name, queryset.explain())
+
+    def test_amortization_overlap_uses_index(self):
+        queryset = ExpenseFilterSet.filter_by_date_range(
+            Expense.objects.filter(user=self.user),
+            self.day,
+            self.day + dt.timedelta(days=30),
+        )
+        self.assertUsesIndex(queryset, "expense_user_amortization")
+
+    def test_expense_list_ordering_uses_index(self):
+        queryset = Expense.objects.filter(user=self.user).order_by("-expense_date")
+        self.assertUsesIndex(queryset[:50], "expense_user_expense_date")
+
+    def test_expense_list_cursor_page_uses_index(self):
+        paginator = KeysetPagination()
+        paginator.field, paginator.descending = "expense_date", True
+        queryset = (
+            Expense.objects.filter(user=self.user)
+            .filter(paginator.after(self.day, 1))
+            .order_by("-expense_date", "-id")
+        )
+        self.assertUsesIndex(queryset[:50], "expense_user_expense_date")
+
+    def test_has_expense_in_day_uses_index(self):
+        queryset = RecurringExpense.objects.annotate_has_expense_in_day(self.day)
+        self.assertUsesIndex(queryset, "expense_recurring_date")
+
+    def test_latest_rate_before_uses_index(self):
+        queryset = (
+            DollarExchangeRate.objects.filter(
+                currency=self.currencies[0], date__lte=self.day
+            )
+            .order_by("-date")
+            .values_list("rate")[:1]
+        )
+        self.assertUsesIndex(queryset, "dollar_rate_currency_date")
+
+    def test_latest_rates_before_uses_index(self):
+        queryset = exchange_rate_manager.latest_rates_before(
+            [self.currencies[0].id, self.currencies[1].id], self.day
+        )
+        self.assertUsesIndex(queryset, "dollar_rate_currency_date")
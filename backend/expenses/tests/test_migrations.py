@@ -0,0 +1,92 @@
+import datetime as dt
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class MigrationTestCase(TransactionTestCase):
+    """Migrates to migrate_from, lets setUpBeforeMigration seed the database
+    with the models of that state, then migrates to migrate_to."""
+
+    migrate_from = None
+    migrate_to = None
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        latest = executor.loader.graph.leaf_nodes("expenses")
+        self.addCleanup(self.migrate, latest)
+        self.migrate([("expenses", self.migrate_from)])
+        self.setUpBeforeMigration(self.apps)
+        self.migrate([("expenses", self.migrate_to)])
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        self.apps = executor.loader.project_state(targets).apps
+
+    def setUpBeforeMigration(self, apps):
+        pass
+
+
+class RecurringExpenseDateUniqueMigrationTestCase(MigrationTestCase):
+    migrate_from = "0023_token_expiration_date"
+    migrate_to = "0024_expense_recurring_date_unique"
+
+    def setUpBeforeMigration(self, apps):
+        User = apps.get_model("expenses", "User")
+        Currency = apps.get_model("expenses", "Currency")
+        ExpenseCategory = apps.get_model("expenses", "ExpenseCategory")
+        RecurringExpense = apps.get_model("expenses", "RecurringExpense")
+        Expense = apps.get_model("expenses", "Expense")
+
+        user = User.objects.create(email="user@test.com", first_name="a", last_name="b")
+        currency = Currency.objects.create(code="EUR", symbol="€", display_name="Euro")
+        category = ExpenseCategory.objects.create(user=user, code="food", name="Food")
+        recurring_expense = RecurringExpense.objects.create(
+            user=user,
+            start_date=dt.date(2024, 1, 1),
+            amount=10,
+            category=category,
+            schedule="0 0 * * *",
+            description="Rent",
+            currency=currency,
+        )
+        day = dt.date(2024, 1, 1)
+        self.kept, duplicate, next_day = [
+            Expense.objects.create(
+                user=user,
+                category=category,
+                recurring_expense=recurring_expense,
+                description="Rent",
+                expense_date=expense_date,
+                amortization_start_date=expense_date,
+                amortization_end_date=expense_date,
+            )
+            for expense_date in [day, day, day + dt.timedelta(days=1)]
+        ]
+        self.remaining_ids = [self.kept.id, next_day.id]
+        # Not recurring, never duplicates
+        for _ in range(2):
+            self.remaining_ids.append(
+                Expense.objects.create(
+                    user=user, category=category, description="Lunch", expense_date=day
+                ).id
+            )
+
+    def test_duplicates_are_deleted_keeping_the_first_one(self):
+        Expense = self.apps.get_model("expenses", "Expense")
+
+        self.assertEqual(
+            sorted(Expense.objects.values_list("id", flat=True)),
+            sorted(self.remaining_ids),
+        )
+
+
+class ExpensesCacheMigrationTestCase(MigrationTestCase):
+    migrate_from = "0025_expenses_cache"
+    migrate_to = "0024_expense_recurring_date_unique"
+
+    def test_cache_table_is_dropped_when_reverted(self):
+        self.assertNotIn("expenses_cache", connection.introspection.table_names())
@@ -0,0 +1,113 @@
+import datetime as dt
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+
+from expenses.models import DailyAmortization
+from expenses.statistics_rollup import (
+    get_daily_amortizations_in_range,
+    rebuild_daily_amortizations,
+    sum_in_currency,
+)
+from expenses.tests.factories.category_factories import CategoryFactory
+from expenses.tests.factories.currency_factories import CurrencyFactory
+from expenses.tests.factories.dollar_exchange_rate_factories import (
+    DollarExchangeRateFactory,
+)
+from expenses.tests.factories.expense_factories import ExpenseFactory
+from expenses.tests.factories.user_factories import UserFactory
+
+
+@override_settings(STATISTICS_BACKEND="rollup")
+class StatisticsRollupTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        cls.usd = CurrencyFactory(code="USD")
+        cls.eur = CurrencyFactory(code="EUR")
+        cls.category = CategoryFactory(user=cls.user)
+        cls.start = dt.date(2024, 1, 1)
+
+    def create_expense(self, **kwargs):
+        return ExpenseFactory(
+            **{
+                "user": self.user,
+                "expense_date": self.start,
+                "amount": 100,
+                "currency": self.usd,
+                "category": self.category,
+                "amortization_start_date": self.start,
+                "amortization_end_date": self.start + dt.timedelta(days=2),
+                **kwargs,
+            }
+        )
+
+    def test_rows_follow_expense_writes(self):
+        expense = self.create_expense()
+        self.assertEqual(
+            list(
+                DailyAmortization.objects.order_by("day").values_list("day", "amount")
+            ),
+            [
+                (self.start, Decimal("33.33")),
+                (self.start + dt.timedelta(days=1), Decimal("33.33")),
+                (self.start + dt.timedelta(days=2), Decimal("33.33")),
+            ],
+        )
+
+        expense.amount = Decimal("10.00")
+        expense.amortization_end_date = self.start + dt.timedelta(days=1)
+        expense.save()
+        self.assertEqual(
+            list(DailyAmortization.objects.values_list("amount", flat=True)),
+            [Decimal("5.00"), Decimal("5.00")],
+        )
+
+        expense.delete()
+        self.assertFalse(DailyAmortization.objects.exists())
+
+    def test_rows_of_string_values(self):
+        self.create_expense(
+            amount=20.5,
+            amortization_start_date="2024-01-01",
+            amortization_end_date="2024-01-01",
+        )
+
+        row = DailyAmortization.objects.get()
+        self.assertEqual(row.day, self.start)
+        self.assertEqual(row.amount, Decimal("20.50"))
+
+    def test_rebuild(self):
+        self.create_expense()
+        self.create_expense(amortization_end_date=self.start)
+        DailyAmortization.objects.all().delete()
+
+        self.assertEqual(rebuild_daily_amortizations(self.user), 4)
+        self.assertEqual(DailyAmortization.objects.count(), 4)
+
+    def test_sum_in_currency_converts_at_expense_date(self):
+        DollarExchangeRateFactory(currency=self.eur, date=self.start, rate=2)
+        DollarExchangeRateFactory(
+            currency=self.eur, date=self.start + dt.timedelta(days=1), rate=4
+        )
+        self.create_expense(currency=self.eur)
+        self.create_expense(
+            currency=self.eur,
+            amount=40,
+            expense_date=self.start + dt.timedelta(days=1),
+        )
+
+        rows = get_daily_amortizations_in_range(
+            self.user, self.start, self.start + dt.timedelta(days=1)
+        )
+        with self.assertNumQueries(3):
+            amounts = sum_in_currency(rows, ["category"], "amount", self.usd)
+
+        # 33.33 * 2 / 2 + 13.33 * 2 / 4
+        self.assertEqual(amounts, {(self.category.id,): Decimal("39.99")})
+
+    @override_settings(STATISTICS_BACKEND="expenses")
+    def test_rows_are_not_maintained_without_the_rollup_backend(self):
+        self.create_expense()
+
+        self.assertFalse(DailyAmortization.objects.exists())
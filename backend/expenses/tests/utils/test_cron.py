@@ -1,7 +1,8 @@
 import unittest
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 
-from expenses.utils.cron_parser.cron import Cron
+from expenses.utils.cron_parser.batch import CronBatch
+from expenses.utils.cron_parser.cron import Cron, parse_cron
 
 
 class CronTest(unittest.TestCase):
@@ -52,3 +53,74 @@ class CronTest(unittest.TestCase):
         self.assertTrue((datetime(2024, 3, 19, 1, 55)) in Cron("* 1 19 3 2"))
         self.assertFalse((datetime(2024, 4, 19, 1, 55)) in Cron("* 1 19 3 2"))
         self.assertTrue((datetime(2024, 3, 19, 15, 55) in Cron("*/5 9-17/2 * 1-3 1-5")))
+
+    def test_part_next_and_prev_value(self):
+        minutes = Cron("5,20-22,50 * * * *").parts[0]
+        self.assertEqual(minutes.next_value(0), 5)
+        self.assertEqual(minutes.next_value(21), 21)
+        self.assertEqual(minutes.next_value(23), 50)
+        self.assertIsNone(minutes.next_value(51))
+        self.assertEqual(minutes.prev_value(59), 50)
+        self.assertEqual(minutes.prev_value(19), 5)
+        self.assertIsNone(minutes.prev_value(4))
+
+    def test_schedule_next_and_prev(self):
+        start = datetime(2024, 3, 19, 15, 56)
+        # Last minute of the year
+        schedule = Cron("59 23 31 12 *").schedule(start)
+        self.assertEqual(schedule.next(), datetime(2024, 12, 31, 23, 59))
+        self.assertEqual(schedule.next(), datetime(2025, 12, 31, 23, 59))
+        schedule = Cron("59 23 31 12 *").schedule(start)
+        self.assertEqual(schedule.prev(), datetime(2023, 12, 31, 23, 59))
+        # Every 15 minutes of the working hours, Monday to Friday
+        schedule = Cron("*/15 9-17 * * 1-5").schedule(start)
+        self.assertEqual(schedule.next(), datetime(2024, 3, 19, 16, 0))
+        schedule = Cron("*/15 9-17 * * 1-5").schedule(datetime(2024, 3, 22, 17, 50))
+        # 2024-03-25 is a Monday
+        self.assertEqual(schedule.next(), datetime(2024, 3, 25, 9, 0))
+        self.assertEqual(schedule.prev(), datetime(2024, 3, 22, 17, 45))
+        # Leap days
+        schedule = Cron("0 0 29 2 *").schedule(start)
+        self.assertEqual(schedule.next(), datetime(2028, 2, 29, 0, 0))
+        self.assertEqual(schedule.prev(), datetime(2024, 2, 29, 0, 0))
+
+    def test_fires_on(self):
+        # 2024-03-19 is a Tuesday
+        self.assertTrue(Cron("30 18 * * 2").fires_on(date(2024, 3, 19)))
+        self.assertTrue(Cron("30 18 * * 2").fires_on(datetime(2024, 3, 19, 23, 0)))
+        self.assertFalse(Cron("30 18 * * 2").fires_on(date(2024, 3, 20)))
+        self.assertTrue(Cron("0 0 1 * *").fires_on(date(2024, 3, 1)))
+        self.assertFalse(Cron("0 0 1 1-2 *").fires_on(date(2024, 3, 1)))
+
+    def test_parse_cron_is_shared_by_equivalent_schedules(self):
+        cron = parse_cron("0 0 1 JAN *")
+        self.assertIs(parse_cron(" 0  0 1 jan * "), cron)
+        self.assertIsNot(parse_cron("0 0 1 JAN *", {"output_month_names": True}), cron)
+        self.assertEqual(str(cron), "0 0 1 1 *")
+        with self.assertRaises(ValueError):
+            parse_cron("0 0 1 *")
+
+    def test_batch_matches_fires_on(self):
+        crons = [
+            Cron(schedule)
+            for schedule in [
+                "* * * * *",
+                "0 0 1 * *",
+                "30 18 * * 2",
+                "0 0 31 * 5",
+                "0 0 29 2 *",
+                "*/5 9-17/2 * 1-3 1-5",
+            ]
+        ]
+        days = [date(2024, 1, 1) + timedelta(days=i) for i in range(366)]
+
+        fires = CronBatch(crons).fires_on_days(days)
+
+        self.assertEqual(fires.shape, (len(crons), len(days)))
+        for cron, cron_fires in zip(crons, fires):
+            self.assertEqual(list(cron_fires), [cron.fires_on(day) for day in days])
+        self.assertEqual(
+            list(CronBatch(crons).fires_on(date(2024, 2, 29))),
+            [True, False, False, False, True, True],
+        )
+        self.assertEqual(len(CronBatch([]).fires_on(date(2024, 2, 29))), 0)
@@ -0,0 +1,50 @@
+import uuid
+from typing import Callable, Iterable, TypeVar
+
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.connection import ConnectionProxy
+
+__all__ = ["FORECAST", "STATISTICS", "get_or_compute", "invalidate"]
+
+T = TypeVar("T")
+
+# settings.CACHES["shared"], seen by every process
+cache = ConnectionProxy(caches, "shared")
+
+# Namespaces of the data cached per user
+FORECAST = "recurring-forecast"
+STATISTICS = "statistics"
+
+
+def _version_key(namespace: str, user_id: int) -> str:
+    return f"{namespace}-version:{user_id}"
+
+
+def get_or_compute(
+    namespace: str, user_id: int, key: str, timeout: int, compute: Callable[[], T]
+) -> T:
+    """Cached result of compute for timeout seconds, 0 disables the cache.
+
+    Keys include a version of the data of the user, replaced by invalidate, so
+    the entries of the previous data are never read again and just expire.
+    """
+    if not timeout:
+        return compute()
+    version = cache.get_or_set(
+        _version_key(namespace, user_id), lambda: uuid.uuid4().hex, None
+    )
+    full_key = f"{namespace}:{user_id}:{version}:{key}"
+    result = cache.get(full_key)
+    if result is None:
+        result = compute()
+        cache.set(full_key, result, timeout)
+    return result
+
+
+def invalidate(namespace: str, user_ids: Iterable[int]) -> None:
+    keys = [_version_key(namespace, user_id) for user_id in set(user_ids)]
+    cache.delete_many(keys)
+    # A request reading before the commit may have cached the previous data
+    # under the new version
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,62 @@
+from datetime import date
+from typing import Sequence
+
+import numpy as np
+
+from .cron import Cron
+from .sub_modules.utils import iso_to_cron_weekday
+
+
+class CronBatch:
+    """Evaluates many Cron schedules at once.
+
+    The day, month and weekday bitmasks of the schedules are stacked in arrays, so
+    checking which schedules fire on a day is a few vectorized shifts and ANDs.
+
+    Args:
+        crons (Sequence[Cron]): The schedules, in the order of the returned masks.
+    """
+
+    def __init__(self, crons: Sequence[Cron]) -> None:
+        if any(not cron.parts for cron in crons):
+            raise LookupError("No schedule found")
+        # Bit n of a mask is set for value n, the largest one is day 31
+        self.day_masks = np.array(
+            [cron.parts[2].mask for cron in crons], dtype=np.int64
+        )
+        self.month_masks = np.array(
+            [cron.parts[3].mask for cron in crons], dtype=np.int64
+        )
+        self.weekday_masks = np.array(
+            [cron.parts[4].mask for cron in crons], dtype=np.int64
+        )
+
+    def __len__(self) -> int:
+        return len(self.day_masks)
+
+    def fires_on(self, day: date) -> np.ndarray:
+        """Returns the boolean mask of the schedules that run at least once on the day.
+
+        :param day: The day to check.
+        :return: A boolean array with one item per schedule.
+        """
+        return self.fires_on_days([day])[:, 0]
+
+    def fires_on_days(self, days: Sequence[date]) -> np.ndarray:
+        """Returns which schedules run on each of the days.
+
+        :param days: The days to check.
+        :return: A boolean array of shape (schedules, days).
+        """
+        month = np.array([d.month for d in days], dtype=np.int64)
+        day = np.array([d.day for d in days], dtype=np.int64)
+        weekday = np.array(
+            [iso_to_cron_weekday(d.isoweekday()) for d in days], dtype=np.int64
+        )
+        fires = (
+            (self.month_masks[:, np.newaxis] >> month)
+            & (self.day_masks[:, np.newaxis] >> day)
+            & (self.weekday_masks[:, np.newaxis] >> weekday)
+            & 1
+        )
+        return fires.astype(bool)
@@ -1,4 +1,5 @@
 from datetime import date, datetime
+from functools import lru_cache
 from typing import List, Optional, Union
 
 from .sub_modules.part import Part
@@ -95,6 +96,17 @@ class Cron:
         """
         return Seeker(self, start_date, timezone_str)
 
+    def fires_on(self, day: Union[datetime, date]) -> bool:
+        """Returns True if the schedule runs at least once on the day.
+
+        :param day: A date, or a datetime whose date is used.
+
+        :return: True if the day matches the days, months and weekdays of the schedule.
+        """
+        if isinstance(day, datetime):
+            day = day.date()
+        return self.validate(day)
+
     def validate(self, date_time_obj: Union[datetime, date]) -> bool:
         """Returns True if the object passed is within the Cron rule.
 
@@ -106,8 +118,32 @@ class Cron:
         valid = []
         for cron_part, d_par in zip(self.parts, to_parts(date_time_obj)):
             if d_par is not None:
-                valid.append(d_par in cron_part.to_list())
+                valid.append(cron_part.has(d_par))
             else:
                 valid.append(True)
 
         return all(valid)
+
+
+# Maximum number of distinct schedules kept parsed by parse_cron
+CRON_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=CRON_CACHE_SIZE)
+def _parse_cron(cron_string: str, options: tuple) -> Cron:
+    return Cron(cron_string, dict(options))
+
+
+def parse_cron(cron_string: str, options: Optional[dict] = None) -> Cron:
+    """Returns the parsed Cron of a schedule, shared by every caller of the same schedule.
+
+    Schedules are cached by their normalized string and options, the returned Cron must not be modified.
+
+    :param cron_string: (str) The cron string to parse.
+    :param options: (dict) The options to use.
+    :raises ValueError: Incorrect cron string.
+    """
+    if type(cron_string) is not str:
+        raise TypeError("Invalid cron string")
+    normalized = " ".join(cron_string.upper().split())
+    return _parse_cron(normalized, tuple(sorted((options or {}).items())))
@@ -16,7 +16,19 @@ class Part:
     def __init__(self, unit, options):
         self.options = options if bool(options) else dict()
         self.unit = unit
-        self.values: List[int] = []
+        self.values = []
+
+    @property
+    def values(self) -> List[int]:
+        return self._values
+
+    @values.setter
+    def values(self, values: List[int]) -> None:
+        """Sets the values and compiles them into a bitmask, bit n set for value n."""
+        self._values = values
+        self.mask = 0
+        for value in values:
+            self.mask |= 1 << value
 
     def __str__(self) -> str:
         """Print directly the Part Object"""
@@ -331,11 +343,30 @@ class Part:
         :param value: The value to look for.
         :return: Whether the value is present in the range or not.
         """
-        try:
-            self.values.index(value)
-            return True
-        except ValueError:
-            return False
+        return value >= 0 and bool(self.mask >> value & 1)
+
+    def next_value(self, value: int) -> Union[int, None]:
+        """Returns the smallest value in the range greater than or equal to value.
+
+        :param value: The value to start from.
+        :return: The next value, None if there is none.
+        """
+        higher = self.mask >> value
+        if not higher:
+            return None
+        # Index of the lowest set bit
+        return value + (higher & -higher).bit_length() - 1
+
+    def prev_value(self, value: int) -> Union[int, None]:
+        """Returns the largest value in the range lower than or equal to value.
+
+        :param value: The value to start from.
+        :return: The previous value, None if there is none.
+        """
+        lower = self.mask & ((1 << (value + 1)) - 1)
+        if not lower:
+            return None
+        return lower.bit_length() - 1
 
     def to_list(self) -> List[int]:
         """Returns the range as an array of positive integers.
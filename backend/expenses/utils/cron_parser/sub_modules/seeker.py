@@ -128,14 +128,25 @@ class Seeker(Iterator[datetime]):
     def _shift_month(
         self, cron_month_part: "Part", operation: Literal["add", "subtract"]
     ) -> None:
-        """Increments/decrements the month value of a date, until a month that matches the schedule is found.
+        """Moves the date to the next/previous month that matches the schedule, at the start/end of it.
 
         Args:
             cron_month_part (Part): The month 'Part' object.
             operation (Literal['add', 'subtract']): The function to call on date: 'add' or 'subtract'.
         """
-        while self.date.month not in cron_month_part.to_list():
-            self.date = self._calc_months(self.date, 1, operation)
+        month = self.date.month
+        if cron_month_part.has(month):
+            return
+        if operation == "add":
+            target = cron_month_part.next_value(month)
+            if target is None:  # Wrap to the first month of the next year
+                target = cron_month_part.min() + 12
+            self.date = self._calc_months(self.date, target - month, operation)
+        else:
+            target = cron_month_part.prev_value(month)
+            if target is None:  # Wrap to the last month of the previous year
+                target = cron_month_part.max() - 12
+            self.date = self._calc_months(self.date, month - target, operation)
 
     def _shift_day(
         self,
@@ -143,34 +154,59 @@ class Seeker(Iterator[datetime]):
         cron_weekday_part: "Part",
         operation: Literal["add", "subtract"],
     ) -> bool:
-        """Increments/decrements the day value of a date, until a day that matches the schedule is found.
+        """Moves the date to the next/previous day of the month that matches both the days and the weekdays of the schedule.
 
         Args:
             cron_day_part (Part): The days 'Part' object.
+            cron_weekday_part (Part): The weekdays 'Part' object.
             operation (Literal['add', 'subtract']): The function to call on date: 'add' or 'subtract'.
         Returns:
             (boolean): Whether the month of the date was changed.
         """
-        current_month = self.date.month
-        while (
-            self.date.day not in cron_day_part.to_list()
-            or iso_to_cron_weekday(self.date.isoweekday())
-            not in cron_weekday_part.to_list()
-        ):
-            if operation == "add":
-                self.date = self.date + timedelta(days=+1)
-                self.date = self.date.replace(hour=0, minute=0, second=0)
-            else:
-                self.date = self.date + timedelta(days=-1)
-                self.date = self.date.replace(hour=23, minute=59, second=59)
-            if current_month != self.date.month:
-                return True
-        return False
+        days_mask = cron_day_part.mask & self._weekday_days_mask(cron_weekday_part)
+        day = self.date.day
+        if days_mask >> day & 1:
+            return False
+        if operation == "add":
+            higher = days_mask >> day
+            if higher:
+                day += (higher & -higher).bit_length() - 1
+                self.date = self.date.replace(day=day, hour=0, minute=0, second=0)
+                return False
+            # First day of the next month
+            last_day = calendar.monthrange(self.date.year, self.date.month)[1]
+            self.date = self.date + timedelta(days=last_day - day + 1)
+            self.date = self.date.replace(hour=0, minute=0, second=0)
+        else:
+            lower = days_mask & ((1 << day) - 1)
+            if lower:
+                day = lower.bit_length() - 1
+                self.date = self.date.replace(day=day, hour=23, minute=59, second=59)
+                return False
+            # Last day of the previous month
+            self.date = self.date + timedelta(days=-day)
+            self.date = self.date.replace(hour=23, minute=59, second=59)
+        return True
+
+    def _weekday_days_mask(self, cron_weekday_part: "Part") -> int:
+        """Bitmask of the days of the month of the date whose weekday matches the schedule, bit n set for day n."""
+        year, month = self.date.year, self.date.month
+        first_weekday, last_day = calendar.monthrange(year, month)
+        # calendar weekdays are Monday (0) to Sunday (6)
+        first_weekday = iso_to_cron_weekday(first_weekday + 1)
+        week = 0
+        for offset in range(7):
+            if cron_weekday_part.has((first_weekday + offset) % 7):
+                week |= 1 << offset
+        mask = 0
+        for first_day in range(1, last_day + 1, 7):
+            mask |= week << first_day
+        return mask & ((1 << (last_day + 1)) - 1)
 
     def _shift_hour(
         self, cron_hour_part: "Part", operation: Literal["add", "subtract"]
     ) -> bool:
-        """Increments/decrements the hour value of a date, until an hour that matches the schedule is found.
+        """Moves the date to the next/previous hour of the day that matches the schedule.
 
         Args:
             cron_hour_part (Part): The hours 'Part' object
@@ -178,22 +214,29 @@ class Seeker(Iterator[datetime]):
         Returns:
             (boolean): Whether the day of the date was changed
         """
-        current_day = self.date.day
-        while self.date.hour not in cron_hour_part.to_list():
-            if operation == "add":
-                self.date = self.date + timedelta(hours=+1)
-                self.date = self.date.replace(minute=00, second=0)
-            else:
-                self.date = self.date + timedelta(hours=-1)
-                self.date = self.date.replace(minute=59, second=59)
-            if current_day != self.date.day:
-                return True
-        return False
+        hour = self.date.hour
+        if cron_hour_part.has(hour):
+            return False
+        if operation == "add":
+            target = cron_hour_part.next_value(hour)
+            if target is not None:
+                self.date = self.date.replace(hour=target, minute=0, second=0)
+                return False
+            self.date = self.date + timedelta(hours=24 - hour)
+            self.date = self.date.replace(minute=0, second=0)
+        else:
+            target = cron_hour_part.prev_value(hour)
+            if target is not None:
+                self.date = self.date.replace(hour=target, minute=59, second=59)
+                return False
+            self.date = self.date + timedelta(hours=-hour - 1)
+            self.date = self.date.replace(minute=59, second=59)
+        return True
 
     def _shift_minute(
         self, cron_minute_part: "Part", operation: Literal["add", "subtract"]
     ) -> bool:
-        """Increments/decrements the minute value of a date, until a minute that matches the schedule is found.
+        """Moves the date to the next/previous minute of the hour that matches the schedule.
 
         Args:
             cron_minute_part (Part): The minutes 'Part' object.
@@ -202,17 +245,24 @@ class Seeker(Iterator[datetime]):
         Returns:
             (boolean): Whether the hour of the date was changed.
         """
-        current_hour = self.date.hour
-        while self.date.minute not in cron_minute_part.to_list():
-            if operation == "add":
-                self.date = self.date + timedelta(minutes=+1)
-                self.date = self.date.replace(second=0, microsecond=0)
-            else:
-                self.date = self.date + timedelta(minutes=-1)
-                self.date = self.date.replace(second=59, microsecond=0)
-            if current_hour != self.date.hour:
-                return True
-        return False
+        minute = self.date.minute
+        if cron_minute_part.has(minute):
+            return False
+        if operation == "add":
+            target = cron_minute_part.next_value(minute)
+            if target is not None:
+                self.date = self.date.replace(minute=target, second=0, microsecond=0)
+                return False
+            self.date = self.date + timedelta(minutes=60 - minute)
+            self.date = self.date.replace(second=0, microsecond=0)
+        else:
+            target = cron_minute_part.prev_value(minute)
+            if target is not None:
+                self.date = self.date.replace(minute=target, second=59, microsecond=0)
+                return False
+            self.date = self.date + timedelta(minutes=-minute - 1)
+            self.date = self.date.replace(second=59, microsecond=0)
+        return True
 
     @staticmethod
     def _calc_months(
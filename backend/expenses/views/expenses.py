@@ -1,14 +1,22 @@
-import csv
 import datetime as dt
 from io import TextIOWrapper
 
 import django_filters
-from django.db import transaction
-from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from expenses.date_utils import from_italian_date, is_italian_date
-from expenses.models import Expense, ExpenseCategory, Trip
+from expenses.managers.exchange_rate_manager import (
+    ExchangeRateApiError,
+    ExchangeRateError,
+)
+from expenses.managers.expense_export_manager import (
+    EXPORT_FORMATS,
+    export_rows,
+    fetch_missing_rates,
+)
+from expenses.managers.expense_import_manager import IMPORTERS
+from expenses.models import Currency, Expense
 from expenses.serializers.expenses import ExpenseSerializer
+from expenses.views.pagination import KeysetPagination
 from rest_framework import permissions, serializers, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.filters import OrderingFilter
@@ -44,28 +52,18 @@ class ExpenseFilterSet(django_filters.FilterSet):
         queryset = super().filter_queryset(queryset)
         return queryset
 
-    def filter_by_date_range(self, queryset, start_date, end_date):
-        if start_date and end_date:
-            return queryset.filter(
-                (
-                    Q(amortization_start_date__lte=start_date)
-                    & Q(amortization_end_date__gte=start_date)
-                )
-                | (
-                    Q(amortization_start_date__gte=start_date)
-                    & Q(amortization_start_date__lte=end_date)
-                )
-            )
-        elif start_date:
-            return queryset.filter(
-                (
-                    Q(amortization_start_date__lte=start_date)
-                    & Q(amortization_end_date__gte=start_date)
-                )
-                | (Q(amortization_start_date__gte=start_date))
-            )
-        elif end_date:
-            return queryset.filter(amortization_start_date__lte=end_date)
+    @staticmethod
+    def filter_by_date_range(queryset, start_date, end_date):
+        """Keeps the expenses amortized on at least one day of the range.
+
+        Written as a single range condition per column (amortization start dates
+        are never after end dates) so it can be answered from the
+        expense_user_amortization index.
+        """
+        if start_date:
+            queryset = queryset.filter(amortization_end_date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(amortization_start_date__lte=end_date)
         return queryset
 
     class Meta:
@@ -86,6 +84,17 @@ class ExpenseViewSet(viewsets.ModelViewSet):
     ]
     ordering = ["-expense_date"]
 
+    @property
+    def paginator(self):
+        """Page numbers by default, keyset pages with ?pagination=cursor (for
+        infinite scrolling: no count and no offset scans)."""
+        if not hasattr(self, "_paginator"):
+            if self.request.query_params.get("pagination") == "cursor":
+                self._paginator = KeysetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
     def get_queryset(self):
         user = self.request.user
         return (
@@ -94,6 +103,44 @@ class ExpenseViewSet(viewsets.ModelViewSet):
             .order_by("-expense_date")
         )
 
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """Streams the filtered expenses as CSV (default) or NDJSON, with the
+        amounts optionally converted to the currency with id `currency`."""
+        export_format = request.query_params.get("export_format", "csv")
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"error": f"Formato non valido: {export_format}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        currency = None
+        if request.query_params.get("currency"):
+            currency = Currency.objects.filter(
+                id=request.query_params["currency"]
+            ).first()
+            if currency is None:
+                return Response(
+                    {"error": "Valuta non trovata"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if currency is not None:
+            # A failure once the response has started would truncate it
+            try:
+                fetch_missing_rates(queryset, currency)
+            except (ExchangeRateError, ExchangeRateApiError):
+                return Response(
+                    {"error": "Tasso di cambio non disponibile"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        stream, content_type, extension = EXPORT_FORMATS[export_format]
+        rows = export_rows(queryset, currency)
+        response = StreamingHttpResponse(stream(rows), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="expenses.{extension}"'
+        return response
+
     @action(detail=False, methods=["post"])
     def load_from_csv(self, request):
         user = request.user
@@ -103,73 +150,20 @@ class ExpenseViewSet(viewsets.ModelViewSet):
                 {"error": "File non fornito"}, status=status.HTTP_400_BAD_REQUEST
             )
 
+        # "copy" streams very large files through a staging table
+        mode = request.data.get("mode", "batch")
+        if mode not in IMPORTERS:
+            return Response(
+                {"error": f"Modalità non valida: {mode}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
         # Supporta file UTF-8
         csv_file = TextIOWrapper(file, encoding="utf-8")
-        reader = csv.DictReader(csv_file)
-        created = 0
-        errors = []
-        with transaction.atomic():
-            for i, row in enumerate(reader, 1):
-                try:
-                    # Tipologia: True per expense, False per income
-                    is_expense = (
-                        row.get("typology", "expense").strip().lower() != "income"
-                    )
-                    # Categoria: cerca per code, crea se non esiste
-                    cat_code = row["category"].strip()
-                    category, _ = ExpenseCategory.objects.get_or_create(
-                        user=user,
-                        code=cat_code,
-                        defaults={"name": cat_code, "for_expense": is_expense},
-                    )
-                    # Trip: cerca per code, crea se non esiste
-                    trip_code = row["trip"].strip()
-                    trip = None
-                    if trip_code:
-                        trip, _ = Trip.objects.get_or_create(
-                            user=user, code=trip_code, defaults={"name": trip_code}
-                        )
-
-                    # Process date fields
-                    for date_field in [
-                        "expense_date",
-                        "amortization_start_date",
-                        "amortization_end_date",
-                    ]:
-                        if row.get(date_field):
-                            row[date_field] = (
-                                from_italian_date(row[date_field])
-                                if is_italian_date(row[date_field])
-                                else row[date_field]
-                            )
-                    if row.get("amount"):
-                        row["amount"] = (
-                            float(
-                                row["amount"]
-                                .replace(".", "")
-                                .replace(",", ".")
-                                .replace("€", "")
-                                .strip()
-                            )
-                            if isinstance(row["amount"], str)
-                            else row["amount"]
-                        )
-                    # Crea Expense
-                    Expense.objects.create(
-                        user=user,
-                        expense_date=row["expense_date"],
-                        description=row["description"],
-                        amount=row["amount"],
-                        amortization_start_date=row["amortization_start_date"],
-                        amortization_end_date=row["amortization_end_date"],
-                        category=category,
-                        trip=trip,
-                        is_expense=is_expense,
-                    )
-                    created += 1
-                except Exception as e:
-                    errors.append({"row": i, "error": str(e)})
+        result = IMPORTERS[mode](user, csv_file)
         return Response(
-            {"created": created, "errors": errors},
-            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+            {"created": result.created, "errors": result.errors},
+            status=status.HTTP_201_CREATED
+            if result.created
+            else status.HTTP_400_BAD_REQUEST,
         )
@@ -0,0 +1,22 @@
+from expenses.models import ImportJob
+from expenses.serializers.import_jobs import ImportJobSerializer
+from rest_framework import mixins, permissions, viewsets
+from rest_framework.parsers import MultiPartParser
+
+
+class ImportJobViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet,
+):
+    """Queues CSV imports for the process_import_jobs worker, the job is polled
+    with retrieve until its status is COMPLETED or FAILED."""
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ImportJobSerializer
+    parser_classes = [MultiPartParser]
+
+    def get_queryset(self):
+        user = self.request.user
+        return ImportJob.objects.filter(user=user).defer("content").order_by("-id")
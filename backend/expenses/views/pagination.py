@@ -0,0 +1,102 @@
+import base64
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Forward-only cursor pagination keyed on (ordering field, id).
+
+    Each page is read with a range condition on the ordering field and the id
+    of the last row of the previous page, so deep pages cost the same as the
+    first one and no count is needed. Only the first ordering field of the
+    queryset is used, ties are broken by id in the same direction.
+
+    Null values follow the Postgres ordering: last when ascending, first when
+    descending.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Cursore non valido"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.model = queryset.model
+        ordering = queryset.query.order_by[0] if queryset.query.order_by else "id"
+        self.field = ordering.lstrip("-")
+        self.descending = ordering.startswith("-")
+        id_ordering = "-id" if self.descending else "id"
+        queryset = queryset.order_by(
+            *([ordering, id_ordering] if self.field != "id" else [id_ordering])
+        )
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.after(*self.decode_cursor(cursor)))
+
+        rows = list(queryset[: self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+        return self.page
+
+    def after(self, value, pk) -> Q:
+        """Rows coming after (value, pk) in the ordering of the page."""
+        field = self.field
+        beyond = "lt" if self.descending else "gt"
+        id_beyond = Q(**{f"id__{beyond}": pk})
+        if field == "id":
+            return id_beyond
+        if value is None:
+            after = Q(**{f"{field}__isnull": True}) & id_beyond
+            if self.descending:
+                after |= Q(**{f"{field}__isnull": False})
+            return after
+        # The redundant inclusive bound keeps the condition an index range scan
+        after = Q(**{f"{field}__{beyond}e": value}) & (
+            Q(**{f"{field}__{beyond}": value}) | id_beyond
+        )
+        if not self.descending:
+            after |= Q(**{f"{field}__isnull": True})
+        return after
+
+    def encode_cursor(self, row) -> str:
+        position = [self.field, getattr(row, self.field), row.pk]
+        data = json.dumps(position, cls=DjangoJSONEncoder).encode("utf-8")
+        return base64.urlsafe_b64encode(data).decode("ascii")
+
+    def decode_cursor(self, cursor: str):
+        try:
+            field, value, pk = json.loads(base64.urlsafe_b64decode(cursor))
+            if field != self.field:
+                raise ValueError(f"Cursor of another ordering: {field}")
+            return self.model._meta.get_field(field).to_python(value), int(pk)
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.page[-1])
+        )
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -1,10 +1,22 @@
+from collections import defaultdict
+from decimal import Decimal
+
 from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
 from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
 import django_filters
 from django_filters.rest_framework import DjangoFilterBackend
 
 from expenses.models import RecurringExpense
+from expenses.recurring_forecast import get_cached_projected_daily_amounts
 from expenses.serializers.recurring_expenses import RecurringExpenseSerializer
+from expenses.serializers.statistics import AmortizationTimelineSerializer
+from expenses.statistics_engine import compute_statistics
+from expenses.views.statistics import (
+    build_amortization_timeline,
+    get_statistics_input,
+)
 
 
 class RecurringExpenseFilterSet(django_filters.FilterSet):
@@ -35,3 +47,24 @@ class RecurringExpenseViewSet(viewsets.ModelViewSet):
             .filter(user=user)
             .order_by("-start_date")
         )
+
+    @action(detail=False, methods=["GET"])
+    def forecast(self, request, *args, **kwargs):
+        """The amortization timeline of the expenses, plus the ones the recurring
+        expenses will create after today."""
+        user = self.request.user
+        start_date, end_date, currency = get_statistics_input(request)
+        buckets = compute_statistics(
+            user, start_date, end_date, currency, with_trips=False
+        )
+        daily_amounts = defaultdict(lambda: Decimal("0.00"))
+        for amounts in [
+            buckets.daily,
+            get_cached_projected_daily_amounts(user, end_date, currency),
+        ]:
+            for key, amount in amounts.items():
+                daily_amounts[key] += amount
+        result = build_amortization_timeline(daily_amounts, start_date, end_date)
+
+        serializer = AmortizationTimelineSerializer(result, many=True)
+        return Response(serializer.data)
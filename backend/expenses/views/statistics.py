@@ -1,20 +1,19 @@
+import datetime as dt
 from decimal import Decimal
 
-from django.db.models import QuerySet
+from django.conf import settings
+
+from expenses import user_cache
 from expenses.date_utils import all_dates_in_range
-from expenses.models import Currency, Expense, ExpenseCategory, Trip, UserSettings
+from expenses.models import Currency, ExpenseCategory, Trip, User, UserSettings
 from expenses.serializers.statistics import (
     AmortizationTimelineSerializer,
     CategoryStatisticsSerializer,
     StatisticsInputSerializer,
     TripStatisticsSerializer,
 )
-from expenses.statistics_utils import (
-    convert_expenses_to_currency,
-    convert_expenses_to_statistics_expenses,
-    get_expenses_by_day,
-    get_expenses_date_range_in_currency,
-)
+from expenses.serializers.trips import TripSerializer
+from expenses.statistics_engine import StatisticsBuckets, compute_statistics
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -22,246 +21,168 @@ from rest_framework.viewsets import ViewSet
 
 
 class StatisticViewSet(ViewSet):
+    """Every action reads the expenses once with compute_statistics and formats
+    its buckets, summary returns the three of them from the same pass.
+
+    Responses are cached per user for settings.STATISTICS_CACHE_TIMEOUT seconds,
+    any change to the expenses, categories, trips or settings of the user drops
+    them.
+    """
+
     permission_classes = [IsAuthenticated]
 
-    def get_queryset(self):
+    def cached_response(self, name: str, build) -> Response:
+        """Response with build(user, start_date, end_date, currency), cached."""
         user = self.request.user
-        Expense.objects.filter(user=user).select_related("category", "trip")
+        start_date, end_date, currency = get_statistics_input(self.request)
+        data = user_cache.get_or_compute(
+            user_cache.STATISTICS,
+            user.id,
+            f"{name}:{start_date}:{end_date}:{currency.id}",
+            settings.STATISTICS_CACHE_TIMEOUT,
+            lambda: build(user, start_date, end_date, currency),
+        )
+        return Response(data)
 
     @action(detail=False, methods=["GET"])
     def expense_categories(self, request, *args, **kwargs):
-        user = self.request.user
-        queryset: QuerySet[Expense] = Expense.objects.filter(user=user).select_related(
-            "category", "trip"
-        )
-        categories = ExpenseCategory.objects.filter(user=request.user, for_expense=True)
-        input_serializer = StatisticsInputSerializer(data=request.query_params)
-        input_serializer.is_valid(raise_exception=True)
-        start_date = input_serializer.validated_data["start_date"]
-        end_date = input_serializer.validated_data["end_date"]
-        currency: Currency = (
-            input_serializer.validated_data.get("currency")
-            or UserSettings.objects.get(user=user).preferred_currency
-            or Currency.objects.get(code="USD")
-        )
-        all_expenses_in_currency = get_expenses_date_range_in_currency(
-            queryset,
-            currency=currency,
-            start_date=start_date,
-            end_date=end_date,
-        )
-        expenses = {
-            day: [e for e in all_expenses_in_currency[day] if e.is_expense]
-            for day in all_expenses_in_currency
-        }
-        result = {category: {"amount": 0} for category in categories}
+        def build(user, start_date, end_date, currency):
+            buckets = compute_statistics(
+                user, start_date, end_date, currency, with_trips=False
+            )
+            return get_category_statistics(user, buckets, currency)
 
-        for category in categories:
-            for day in all_dates_in_range(start_date, end_date):
-                if day in expenses:
-                    for expense in expenses[day]:
-                        if expense.category == category:
-                            result[category]["amount"] += expense.amount
+        return self.cached_response("expense_categories", build)
 
-        result = [
-            {
-                "category": category,
-                "currency": currency,
-                "amount": data["amount"],
-            }
-            for category, data in result.items()
-        ]
+    @action(detail=False, methods=["GET"])
+    def trips(self, request, *args, **kwargs):
+        def build(user, start_date, end_date, currency):
+            buckets = compute_statistics(user, start_date, end_date, currency)
+            return get_trip_statistics(user, buckets, currency)
 
-        serializer = CategoryStatisticsSerializer(result, many=True)
-        response = list(
-            sorted(
-                serializer.data, key=lambda item: float(item["amount"]), reverse=True
-            )
-        )
-        return Response(response)
+        return self.cached_response("trips", build)
 
     @action(detail=False, methods=["GET"])
-    def trips(self, request, *args, **kwargs):
-        user = self.request.user
-        queryset: QuerySet[Expense] = Expense.objects.filter(user=user).select_related(
-            "category", "trip"
-        )
-        trips = Trip.objects.filter(user=request.user)
-        input_serializer = StatisticsInputSerializer(data=request.query_params)
-        input_serializer.is_valid(raise_exception=True)
-        start_date = input_serializer.validated_data["start_date"]
-        end_date = input_serializer.validated_data["end_date"]
-        currency: Currency = (
-            input_serializer.validated_data.get("currency")
-            or UserSettings.objects.get(user=user).preferred_currency
-            or Currency.objects.get(code="USD")
-        )
+    def amortization_timeline(self, request, *args, **kwargs):
+        def build(user, start_date, end_date, currency):
+            buckets = compute_statistics(
+                user, start_date, end_date, currency, with_trips=False
+            )
+            return get_amortization_timeline(buckets, start_date, end_date)
 
-        # Get original expenses (before amortization) that overlap with date range
-        all_expenses = queryset.filter(is_expense=True)
-        expenses_as_statistics = convert_expenses_to_statistics_expenses(all_expenses)
-        expenses_in_currency = convert_expenses_to_currency(
-            expenses_as_statistics, currency
-        )
+        return self.cached_response("amortization_timeline", build)
 
-        # Initialize result with all trips and None for expenses without a trip
-        trip_amounts = {
-            trip: {
-                "amount_in_dates": Decimal("0.00"),
-                "total_amount": Decimal("0.00"),
-                "start_date": None,
-                "end_date": None,
-                "duration": None,
-                "price_per_day": None,
+    @action(detail=False, methods=["GET"])
+    def summary(self, request, *args, **kwargs):
+        def build(user, start_date, end_date, currency):
+            buckets = compute_statistics(user, start_date, end_date, currency)
+            return {
+                "expense_categories": get_category_statistics(user, buckets, currency),
+                "trips": get_trip_statistics(user, buckets, currency),
+                "amortization_timeline": get_amortization_timeline(
+                    buckets, start_date, end_date
+                ),
             }
-            for trip in trips
+
+        return self.cached_response("summary", build)
+
+
+def get_statistics_input(request) -> tuple[dt.date, dt.date, Currency]:
+    """Dates of the range and currency of the statistics, the preferred
+    currency of the user (or USD) when not given."""
+    input_serializer = StatisticsInputSerializer(data=request.query_params)
+    input_serializer.is_valid(raise_exception=True)
+    currency: Currency = (
+        input_serializer.validated_data.get("currency")
+        or UserSettings.objects.get(user=request.user).preferred_currency
+        or Currency.objects.get(code="USD")
+    )
+    return (
+        input_serializer.validated_data["start_date"],
+        input_serializer.validated_data["end_date"],
+        currency,
+    )
+
+
+def get_category_statistics(
+    user: User, buckets: StatisticsBuckets, currency: Currency
+) -> list[dict]:
+    """Amount of every expense category in the range, largest first."""
+    categories = ExpenseCategory.objects.filter(user=user, for_expense=True)
+    result = [
+        {
+            "category": category,
+            "currency": currency,
+            "amount": buckets.categories.get(category.id, Decimal("0.00")),
         }
-        trip_amounts[None] = {
+        for category in categories
+    ]
+    serializer = CategoryStatisticsSerializer(result, many=True)
+    return sorted(serializer.data, key=lambda item: float(item["amount"]), reverse=True)
+
+
+def get_trip_statistics(
+    user: User, buckets: StatisticsBuckets, currency: Currency
+) -> list[dict]:
+    """Totals of every trip, plus the expenses without a trip, largest first."""
+    no_trip = {"id": None, "code": "", "name": "No Trip", "is_active": False}
+    trips = [
+        (trip.id, TripSerializer(trip).data) for trip in Trip.objects.filter(user=user)
+    ]
+    result = []
+    for trip_id, trip_general_data in [*trips, (None, no_trip)]:
+        bucket = buckets.trips.get(trip_id)
+        data = {
             "amount_in_dates": Decimal("0.00"),
             "total_amount": Decimal("0.00"),
             "start_date": None,
             "end_date": None,
-            "duration": None,
+            "duration": 0,
             "price_per_day": None,
         }
-
-        for expense in expenses_in_currency:
-            current_trip = trip_amounts[expense.trip]
-            # Total amount
-            current_trip["total_amount"] += expense.amount
-
-            # Trip start date
-            if (
-                current_trip["start_date"] is None
-                or expense.amortization_end_date < current_trip["start_date"]
-            ):
-                current_trip["start_date"] = expense.amortization_start_date
-
-            # Trip end date
-            if (
-                current_trip["end_date"] is None
-                or current_trip["end_date"] < expense.amortization_end_date
-            ):
-                current_trip["end_date"] = expense.amortization_end_date
-
-        # Trip duration
-        for trip, data in trip_amounts.items():
-            if data["end_date"] and data["start_date"]:
-                data["duration"] = (data["end_date"] - data["start_date"]).days + 1
-            else:
-                data["duration"] = 0
-            if data["duration"] > 0:
-                data["price_per_day"] = data["total_amount"] / data["duration"]
-
-        expenses_by_day = get_expenses_by_day(expenses_in_currency)
-        for day in all_dates_in_range(start_date, end_date):
-            for expense in expenses_by_day[day]:
-                trip_amounts[expense.trip]["amount_in_dates"] += expense.amount
-
-        result = []
-        for trip, data in trip_amounts.items():
-            # Handle None trips by creating a dict representation
-            if trip is None:
-                trip_general_data = {
-                    "id": None,
-                    "code": "",
-                    "name": "No Trip",
-                    "is_active": False,
-                }
-            else:
-                # Use TripSerializer to serialize the trip instance
-                from expenses.serializers.trips import TripSerializer
-
-                trip_serializer = TripSerializer(trip)
-                trip_general_data = trip_serializer.data
-
-            result.append(
-                {
-                    **trip_general_data,
-                    **data,
-                    "currency": currency,
-                }
+        if bucket is not None:
+            data.update(
+                amount_in_dates=bucket.amount_in_dates,
+                total_amount=bucket.total_amount,
+                start_date=bucket.start_date,
+                end_date=bucket.end_date,
             )
-
-        serializer = TripStatisticsSerializer(result, many=True)
-        response = list(
-            sorted(
-                serializer.data,
-                key=lambda item: float(item["total_amount"]),
-                reverse=True,
-            )
-        )
-        return Response(response)
-
-    @action(detail=False, methods=["GET"])
-    def amortization_timeline(self, request, *args, **kwargs):
-        user = self.request.user
-        queryset: QuerySet[Expense] = Expense.objects.filter(user=user).select_related(
-            "category", "trip"
-        )
-        input_serializer = StatisticsInputSerializer(data=request.query_params)
-        input_serializer.is_valid(raise_exception=True)
-        start_date = input_serializer.validated_data["start_date"]
-        end_date = input_serializer.validated_data["end_date"]
-        currency: Currency = (
-            input_serializer.validated_data.get("currency")
-            or UserSettings.objects.get(user=user).preferred_currency
-            or Currency.objects.get(code="USD")
-        )
-        all_expenses_in_currency = get_expenses_date_range_in_currency(
-            queryset,
-            currency=currency,
-            start_date=start_date,
-            end_date=end_date,
-        )
-        expenses = {
-            day: [e for e in all_expenses_in_currency[day] if e.is_expense]
-            for day in all_expenses_in_currency
-        }
-        non_expenses = {
-            day: [e for e in all_expenses_in_currency[day] if not e.is_expense]
-            for day in all_expenses_in_currency
-        }
-        timeline_data = {}
-
-        cumulative_expense = Decimal("0.00")
-        cumulative_non_expense = Decimal("0.00")
-
-        for day in sorted(all_dates_in_range(start_date, end_date)):
-            # Daily expense amount (not cumulative)
-            expense_amount = Decimal("0.00")
-            if day in expenses:
-                for expense in expenses[day]:
-                    if expense.amount:
-                        expense_amount += expense.amount
-
-            daily_non_expense = Decimal("0.00")
-            if day in non_expenses:
-                for non_expense in non_expenses[day]:
-                    if non_expense.amount:
-                        daily_non_expense += non_expense.amount
-
-            cumulative_expense += expense_amount
-            cumulative_non_expense += daily_non_expense
-
-            difference = cumulative_non_expense - cumulative_expense
-
-            timeline_data[day] = {
-                "expense_amount": cumulative_expense,
-                "non_expense_amount": cumulative_non_expense,
-                "difference": difference,
-            }
-
-        # Convert to list format
-        result = [
+        if data["start_date"] and data["end_date"]:
+            data["duration"] = (data["end_date"] - data["start_date"]).days + 1
+            data["price_per_day"] = data["total_amount"] / data["duration"]
+        result.append({**trip_general_data, **data, "currency": currency})
+
+    serializer = TripStatisticsSerializer(result, many=True)
+    return sorted(
+        serializer.data, key=lambda item: float(item["total_amount"]), reverse=True
+    )
+
+
+def get_amortization_timeline(
+    buckets: StatisticsBuckets, start_date: dt.date, end_date: dt.date
+) -> list[dict]:
+    timeline = build_amortization_timeline(buckets.daily, start_date, end_date)
+    return list(AmortizationTimelineSerializer(timeline, many=True).data)
+
+
+def build_amortization_timeline(
+    daily_amounts: dict[tuple[dt.date, bool], Decimal],
+    start_date: dt.date,
+    end_date: dt.date,
+) -> list[dict]:
+    """Cumulative expense and income amounts of every day of the range."""
+    timeline = []
+    cumulative_expense = Decimal("0.00")
+    cumulative_non_expense = Decimal("0.00")
+    for day in all_dates_in_range(start_date, end_date):
+        cumulative_expense += daily_amounts.get((day, True), Decimal("0.00"))
+        cumulative_non_expense += daily_amounts.get((day, False), Decimal("0.00"))
+        timeline.append(
             {
                 "date": day,
-                "expense_amount": timeline_data[day]["expense_amount"],
-                "non_expense_amount": timeline_data[day]["non_expense_amount"],
-                "difference": timeline_data[day]["difference"],
+                "expense_amount": cumulative_expense,
+                "non_expense_amount": cumulative_non_expense,
+                "difference": cumulative_non_expense - cumulative_expense,
             }
-            for day in sorted(timeline_data.keys())
-        ]
-
-        serializer = AmortizationTimelineSerializer(result, many=True)
-        return Response(serializer.data)
+        )
+    return timeline